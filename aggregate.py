@@ -0,0 +1,272 @@
+"""
+สรุปยอดส่วนแบ่งเงินรางวัลนำจับจากไฟล์รายการค่าปรับขนาดใหญ่ (JSONL หรือ JSONL.gz) แบบ streaming
+
+อ่านไฟล์ทีละชุด (chunk) คำนวณส่วนแบ่งของแต่ละชุดด้วย calculator.calculate_batch แล้วรวมเข้ากับ
+ยอดสะสมตาม (เดือน, พ.ร.บ., มาตรา) ทันที หน่วยความจำที่ใช้จึงขึ้นกับขนาดชุดและจำนวนกลุ่ม
+ไม่ขึ้นกับขนาดไฟล์ ยอดเงินรวมเป็นจำนวนเต็มหน่วยสตางค์ (ดู money.py)
+
+แต่ละบรรทัดเป็น JSON object ที่มี fine_amount, law, section, has_bounty_claimant (ไม่บังคับ)
+และวันที่ (ค่าเริ่มต้นคือคอลัมน์ offense_date เช่น "2024-05-17" หรือปี พ.ศ. "2567-05-17")
+ที่ใช้แบ่งเดือน (ค.ศ.) และเลือกฉบับของกฎที่มีผลในวันนั้น
+
+การใช้งานผ่าน command line:
+    python aggregate.py cases-2024.jsonl.gz -o summary.csv
+    python aggregate.py cases-*.jsonl --workers 4 --chunk-lines 100000
+"""
+import argparse
+import csv
+import gzip
+import json
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from calculator import CASE_COLUMNS, DATE_COLUMN, calculate_batch, offense_days, rule_frame
+from money import to_satang_array
+from rules import RULES_FILE, load_rule_index
+
+# ยอดรวมของแต่ละกลุ่ม (หน่วยสตางค์ ยกเว้น cases และ capped)
+TOTAL_COLUMNS = ("cases", "capped", "fine", "calculated_share", "actual_share", "share1", "share2", "share3")
+
+_AMOUNT_COLUMNS = ("fine_amount", "calculated_share", "actual_share", "share1", "share2", "share3")
+
+
+def open_text(path):
+    """เปิดไฟล์ข้อความ (อ่าน .gz แบบ streaming ได้)"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_line_chunks(paths, chunk_lines=50000):
+    """อ่านบรรทัดจากไฟล์ทั้งหมดตามลำดับ คืนทีละ list ของบรรทัดไม่เกิน chunk_lines บรรทัด"""
+    for path in paths:
+        with open_text(path) as f:
+            while True:
+                chunk = list(islice(f, chunk_lines))
+                if not chunk:
+                    break
+                yield chunk
+
+
+class Aggregates:
+    """ยอดสะสมตาม (เดือน, พ.ร.บ., มาตรา) รวมผลของหลายชุดเข้าด้วยกันได้ด้วย merge"""
+
+    def __init__(self):
+        self.groups = {}
+        self.invalid = 0
+
+    def add(self, key, values):
+        totals = self.groups.get(key)
+        if totals is None:
+            self.groups[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                totals[i] += value
+
+    def merge(self, other):
+        for key, values in other.groups.items():
+            self.add(key, values)
+        self.invalid += other.invalid
+        return self
+
+    @property
+    def cases(self):
+        return sum(values[0] for values in self.groups.values())
+
+    def rows(self):
+        """แถวของรายงานเรียงตามกลุ่ม จำนวนเงินเป็นสตางค์ พร้อมสัดส่วนรายการที่ถูกจำกัดเพดาน"""
+        for key in sorted(self.groups):
+            row = dict(zip(("month", "law", "section"), key))
+            row.update(zip(TOTAL_COLUMNS, self.groups[key]))
+            row["cap_hit_rate"] = row["capped"] / row["cases"] if row["cases"] else 0.0
+            yield row
+
+
+_DECODER = json.JSONDecoder()
+
+
+def parse_lines(lines):
+    """
+    แปลงบรรทัด JSON เป็น list ของ dict คืน (records, จำนวนบรรทัดที่อ่านไม่ได้)
+
+    แต่ละบรรทัดต้องเป็น JSON object หนึ่งตัว (บรรทัดอย่าง {"a": 1}, {"b": 2} นับเป็นบรรทัดที่อ่านไม่ได้)
+    """
+    decode = _DECODER.decode
+    records = []
+    invalid = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = decode(line)
+        except json.JSONDecodeError:
+            invalid += 1
+            continue
+        if not isinstance(record, dict):
+            invalid += 1
+            continue
+        records.append(record)
+    return records, invalid
+
+
+def aggregate_records(records, rule_index, rules=None, date_field=DATE_COLUMN):
+    """คำนวณส่วนแบ่งของ records หนึ่งชุดแล้วรวมเป็น Aggregates"""
+    import numpy as np
+    import pandas as pd
+
+    result = Aggregates()
+    if not records:
+        return result
+
+    cases = pd.DataFrame.from_records(records, columns=CASE_COLUMNS + [date_field])
+    cases["fine_amount"] = pd.to_numeric(cases["fine_amount"], errors="coerce")
+    valid = cases["fine_amount"].notna().to_numpy() & cases["law"].notna().to_numpy()
+    result.invalid = int((~valid).sum())
+    cases = cases[valid]
+    if cases.empty:
+        return result
+    if cases["has_bounty_claimant"].isna().all():
+        cases = cases.drop(columns="has_bounty_claimant")
+
+    computed = calculate_batch(cases, rule_index, rules=rules, date_column=date_field)
+    # แถวที่เหลือซึ่งได้ผลเป็น NaN คือแถวที่วันที่ไม่ถูกต้องหรือค่าปรับเกินช่วงที่คำนวณได้
+    dated = computed["calculated_share"].notna().to_numpy()
+    result.invalid += int((~dated).sum())
+    computed = computed[dated]
+    if computed.empty:
+        return result
+    has_limit = computed["has_limit"].to_numpy()
+    calculated = computed["calculated_share"].to_numpy()
+
+    # เดือนจากวันที่ที่แปลงแล้ว ปี พ.ศ. และ ค.ศ. ของเดือนเดียวกันจึงอยู่กลุ่มเดียวกัน (ไม่มีวันที่ = "")
+    days, _ = offense_days(computed[date_field])
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(str).astype(object)
+    months[computed[date_field].isna().to_numpy()] = ""
+
+    frame = pd.DataFrame({
+        "month": months,
+        "law": computed["law"].astype(str),
+        "section": computed["section"].astype(object).where(computed["section"].notna(), "").astype(str),
+        "cases": 1,
+        "capped": has_limit & (calculated > computed["max_share"].to_numpy()),
+    })
+    for column, source in zip(TOTAL_COLUMNS[2:], _AMOUNT_COLUMNS):
+        frame[column] = to_satang_array(computed[source].to_numpy(dtype=float))
+    frame["capped"] = frame["capped"].astype(np.int64)
+
+    grouped = frame.groupby(["month", "law", "section"], sort=False)[list(TOTAL_COLUMNS)].sum()
+    for key, values in zip(grouped.index, grouped.itertuples(index=False)):
+        result.add(key, [int(value) for value in values])
+    return result
+
+
+# ตารางกฎของแต่ละ worker process (โหลดครั้งเดียวตอนเริ่ม process)
+_worker_state = None
+
+
+def _init_worker(rules_path, date_field):
+    global _worker_state
+    rule_index = load_rule_index(rules_path)
+    _worker_state = (rule_index, rule_frame(rule_index), date_field)
+
+
+def _aggregate_lines(lines):
+    rule_index, rules, date_field = _worker_state
+    records, invalid = parse_lines(lines)
+    result = aggregate_records(records, rule_index, rules, date_field)
+    result.invalid += invalid
+    return result
+
+
+def aggregate_files(paths, rules_path=RULES_FILE, chunk_lines=50000, workers=0, max_in_flight=None,
+                    date_field=DATE_COLUMN, progress=None):
+    """
+    สรุปยอดจากไฟล์ JSONL (หรือ .gz) ทั้งหมดใน paths คืน Aggregates
+
+    workers=0 ทำงานใน process เดียว ถ้ามากกว่า 0 จะส่งแต่ละชุดให้ process pool โดยมีชุดที่ยัง
+    ไม่เสร็จไม่เกิน max_in_flight (ค่าเริ่มต้น workers x 2) progress(cases, invalid)
+    ถูกเรียกหลังรวมแต่ละชุด
+    """
+    total = Aggregates()
+    chunks = iter_line_chunks(paths, chunk_lines)
+
+    def collect(result):
+        total.merge(result)
+        if progress is not None:
+            progress(total.cases, total.invalid)
+
+    if not workers:
+        _init_worker(rules_path, date_field)
+        for lines in chunks:
+            collect(_aggregate_lines(lines))
+        return total
+
+    max_in_flight = max_in_flight or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(rules_path, date_field)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # อ่านชุดถัดไปเฉพาะเมื่อมีชุดค้างน้อยกว่า max_in_flight
+            while not exhausted and len(pending) < max_in_flight:
+                lines = next(chunks, None)
+                if lines is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_aggregate_lines, lines))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                collect(future.result())
+    return total
+
+
+def write_report(aggregates, out):
+    writer = csv.writer(out)
+    writer.writerow(["month", "law", "section", *TOTAL_COLUMNS, "cap_hit_rate"])
+    for row in aggregates.rows():
+        writer.writerow([
+            row["month"], row["law"], row["section"], row["cases"], row["capped"],
+            *(f"{row[column] / 100:.2f}" for column in TOTAL_COLUMNS[2:]),
+            f"{row['cap_hit_rate']:.4f}",
+        ])
+
+
+def _print_progress(cases, invalid):
+    sys.stderr.write(f"\r{cases:,} รายการ (อ่านไม่ได้ {invalid:,})")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สรุปยอดส่วนแบ่งจากไฟล์รายการค่าปรับ JSONL ขนาดใหญ่แบบ streaming")
+    parser.add_argument("paths", nargs="+", help="ไฟล์ .jsonl หรือ .jsonl.gz")
+    parser.add_argument("-o", "--output", default=None, help="ไฟล์ผลลัพธ์ .csv (ค่าเริ่มต้นคือ stdout)")
+    parser.add_argument("--rules", default=RULES_FILE, help="ไฟล์ตารางจำนวนเงินส่วนแบ่งสูงสุด")
+    parser.add_argument("--chunk-lines", type=int, default=50000, help="จำนวนบรรทัดต่อชุด")
+    parser.add_argument("--workers", type=int, default=0, help="จำนวน process (0 = ไม่ใช้ process pool)")
+    parser.add_argument("--date-field", default=DATE_COLUMN, help="ชื่อคอลัมน์วันที่ที่ใช้แบ่งเดือน")
+    args = parser.parse_args(argv)
+
+    aggregates = aggregate_files(
+        args.paths, args.rules,
+        chunk_lines=args.chunk_lines,
+        workers=args.workers,
+        date_field=args.date_field,
+        progress=_print_progress if sys.stderr.isatty() else None,
+    )
+    if sys.stderr.isatty():
+        sys.stderr.write("\n")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8-sig", newline="") as f:
+            write_report(aggregates, f)
+    else:
+        write_report(aggregates, sys.stdout)
+    sys.stderr.write(f"สรุป {aggregates.cases:,} รายการ อ่านไม่ได้ {aggregates.invalid:,} รายการ\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+"""
+HTTP API สำหรับคำนวณส่วนแบ่งเงินรางวัลนำจับและสร้างใบสั่งชำระค่าปรับ (ใช้คู่กับหน้า Streamlit)
+
+เขียนด้วย asyncio ของ standard library การคำนวณทีละรายการทำใน event loop เลย (ใช้เวลาระดับไมโครวินาที)
+ส่วนการเรนเดอร์ .docx และ batch ขนาดใหญ่ส่งไปยัง process pool ที่จำกัดจำนวนงานค้าง
+ถ้างานค้างเต็มจะตอบ 503 พร้อม Retry-After ทันทีแทนการต่อคิวไม่จำกัด
+ทุก worker โหลดตารางกฎครั้งเดียวตอนเริ่ม process
+
+Endpoints:
+    GET  /health
+    GET  /metrics            metrics ในรูปแบบ Prometheus (ดู metrics.py)
+    POST /calculate          {"fine_amount": 150000, "law": "เครื่องสำอาง พ.ศ. 2558", "section": "มาตรา 60",
+                              "offense_date": "2024-05-17"} (offense_date ไม่บังคับ ค่าเริ่มต้นคือวันนี้)
+    POST /calculate/batch    {"cases": [{...}, ...]} ไม่เกิน MAX_BATCH รายการ
+    POST /slip               ข้อมูลเดียวกับ /calculate (+ has_bounty_claimant, offense) คืนไฟล์ .docx
+
+การใช้งาน:
+    python api.py --port 8600 --workers 4
+
+ทดสอบภายใน process โดยไม่เปิด port:
+    with TestClient(RewardAPI(workers=0)) as client:
+        client.post("/calculate", {"fine_amount": 1000, "law": "...", "section": "มาตรา 60"}).json()
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import metrics
+from calculator import calculate_share
+from rules import RULES_FILE, UNSPECIFIED_SECTIONS, day_number, load_rule_index
+from slip import slip_data
+from slip_template import SlipCache
+
+logger = logging.getLogger(__name__)
+
+DOCX_FILENAME = "slip.docx"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+MAX_BODY = 16 * 1024 * 1024
+MAX_BATCH = 10000
+
+# batch ที่เล็กกว่านี้คำนวณใน event loop เลย เพราะเร็วกว่าการส่งข้าม process
+INLINE_BATCH = 256
+
+
+class Overloaded(Exception):
+    """งานที่ส่งไปยัง process pool ค้างอยู่เต็มจำนวนแล้ว"""
+
+
+class Response:
+    def __init__(self, status, body=b"", content_type="application/json; charset=utf-8", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        if headers:
+            self.headers.update(headers)
+
+    @classmethod
+    def from_json(cls, payload, status=200, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(status, body, headers=headers)
+
+    @classmethod
+    def error(cls, status, message, headers=None):
+        return cls.from_json({"error": message}, status, headers)
+
+    def json(self):
+        return json.loads(self.body)
+
+    def encode(self, keep_alive=True):
+        reason = HTTPStatus(self.status).phrase
+        lines = [f"HTTP/1.1 {self.status} {reason}"]
+        lines += [f"{name}: {value}" for name, value in self.headers.items()]
+        lines.append(f"Content-Length: {len(self.body)}")
+        lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+def parse_case(case):
+    """ตรวจและแปลง dict ของ request หนึ่งรายการ (ValueError ถ้าข้อมูลไม่ถูกต้อง)"""
+    if not isinstance(case, dict):
+        raise ValueError("ข้อมูลแต่ละรายการต้องเป็น JSON object")
+
+    fine_amount = case.get("fine_amount")
+    if isinstance(fine_amount, bool) or not isinstance(fine_amount, (int, float)):
+        raise ValueError("fine_amount ต้องเป็นตัวเลข")
+    if not math.isfinite(fine_amount) or fine_amount <= 0:
+        raise ValueError("กรุณากรอกจำนวนเงินค่าปรับมากกว่า 0 บาท")
+
+    law = case.get("law")
+    if not isinstance(law, str) or not law:
+        raise ValueError("กรุณาเลือกพระราชบัญญัติ (law)")
+
+    section = case.get("section")
+    if section is not None and not isinstance(section, str):
+        raise ValueError("section ต้องเป็นข้อความหรือ null")
+
+    offense = case.get("offense")
+    if offense is not None and not isinstance(offense, str):
+        raise ValueError("offense ต้องเป็นข้อความหรือ null")
+
+    offense_date = case.get("offense_date")
+    if offense_date is not None:
+        if not isinstance(offense_date, str):
+            raise ValueError("offense_date ต้องเป็นข้อความ YYYY-MM-DD หรือ null")
+        day_number(offense_date)
+
+    return {
+        "fine_amount": fine_amount,
+        "law": law,
+        "section": section,
+        "offense": offense,
+        "offense_date": offense_date,
+        "has_bounty_claimant": bool(case.get("has_bounty_claimant", False)),
+    }
+
+
+def calculate_case(case, rule_index):
+    """
+    คำนวณหนึ่งรายการจากผลของ parse_case ด้วยกฎเดียวกับหน้าเว็บ
+
+    "ไม่ระบุ" และ "มาตรา อื่นๆ" ถือว่าไม่มีจำนวนเงินส่วนแบ่งสูงสุด ความผิดใช้ค่าจาก request
+    ถ้าไม่ได้ส่งมาจะใช้ค่าจากตารางกฎฉบับที่มีผลในวันที่กระทำความผิด
+    """
+    section = case["section"]
+    section_to_match = None if section in UNSPECIFIED_SECTIONS else section
+    on = case["offense_date"]
+    result = calculate_share(case["fine_amount"], case["law"], section_to_match, rule_index, on)
+
+    offense = case["offense"]
+    if offense is None:
+        rule = rule_index.get(case["law"], section_to_match, on)
+        offense = rule.offense if rule is not None and rule.offense else ""
+
+    return dict(
+        result,
+        law=case["law"],
+        section=section,
+        offense=offense,
+        offense_date=on,
+        has_bounty_claimant=case["has_bounty_claimant"],
+    )
+
+
+def result_json(result):
+    # JSON ไม่มี Infinity จึงส่ง max_share เป็น null เมื่อไม่มีจำนวนเงินส่วนแบ่งสูงสุด
+    if result["max_share"] == float("inf"):
+        return dict(result, max_share=None)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# ฟังก์ชันที่ทำงานใน worker process (ตารางกฎและ cache ของใบสั่งสร้างครั้งเดียวต่อ process)
+
+_worker_rules = None
+_worker_slips = None
+
+
+def _init_worker(rules_path):
+    global _worker_rules, _worker_slips
+    _worker_rules = load_rule_index(rules_path)
+    _worker_slips = SlipCache(maxsize=256)
+
+
+def _calculate_cases(cases):
+    return [result_json(calculate_case(case, _worker_rules)) for case in cases]
+
+
+def _render_slip(data):
+    return _worker_slips.get(data)
+
+
+class RewardAPI:
+    """
+    แอป HTTP ที่ไม่ผูกกับ socket: handle(method, path, body) คืน Response
+
+    workers=0 จะทำงานทั้งหมดใน process เดียว (ใช้ทดสอบ) max_pending คือจำนวนงานที่ค้างใน
+    process pool ได้สูงสุดก่อนตอบ 503
+    """
+
+    def __init__(self, rules_path=RULES_FILE, workers=None, max_pending=None):
+        self.rules_path = rules_path
+        self.workers = os.cpu_count() if workers is None else workers
+        self.max_pending = max_pending or max(1, self.workers) * 64
+        self.rule_index = load_rule_index(rules_path)
+        self.pending = 0
+        self._pool = None
+        self._routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics_text,
+            ("POST", "/calculate"): self.calculate,
+            ("POST", "/calculate/batch"): self.calculate_batch,
+            ("POST", "/slip"): self.slip,
+        }
+
+    def start(self):
+        if self.workers:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.rules_path,))
+        else:
+            _init_worker(self.rules_path)
+        return self
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    async def offload(self, fn, *args):
+        """เรียก fn ใน process pool โดยจำกัดจำนวนงานค้างไม่เกิน max_pending"""
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        self.pending += 1
+        try:
+            if self._pool is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def handle(self, method, path, body=b""):
+        route = self._routes.get((method, path))
+        if route is None:
+            if any(route_path == path for _, route_path in self._routes):
+                return Response.error(405, f"ไม่รองรับ {method} {path}")
+            return Response.error(404, f"ไม่พบ {path}")
+
+        try:
+            return await route(body)
+        except ValueError as e:
+            return Response.error(400, str(e))
+        except Overloaded:
+            return Response.error(503, "มีงานค้างมากเกินไป กรุณาลองใหม่", {"Retry-After": "1"})
+        except Exception:
+            # เช่น BrokenProcessPool เมื่อ worker ตาย ตอบ 500 แทนการปิดการเชื่อมต่อโดยไม่มีคำตอบ
+            logger.exception("เกิดข้อผิดพลาดขณะตอบ %s %s", method, path)
+            return Response.error(500, "เกิดข้อผิดพลาดภายในระบบ")
+
+    def _read_json(self, body):
+        try:
+            return json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("body ต้องเป็น JSON") from None
+
+    async def health(self, body):
+        return Response.from_json({"status": "ok", "rules": len(self.rule_index), "pending": self.pending})
+
+    async def metrics_text(self, body):
+        return Response(200, metrics.render().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+
+    async def calculate(self, body):
+        case = parse_case(self._read_json(body))
+        with metrics.timed("api_calculate"):
+            result = calculate_case(case, self.rule_index)
+        return Response.from_json(result_json(result))
+
+    async def calculate_batch(self, body):
+        payload = self._read_json(body)
+        cases = payload.get("cases") if isinstance(payload, dict) else None
+        if not isinstance(cases, list):
+            raise ValueError('body ต้องมี "cases" เป็น list')
+        if len(cases) > MAX_BATCH:
+            raise ValueError(f"ส่งได้ไม่เกิน {MAX_BATCH:,} รายการต่อครั้ง")
+
+        parsed = []
+        for i, case in enumerate(cases):
+            try:
+                parsed.append(parse_case(case))
+            except ValueError as e:
+                raise ValueError(f"รายการที่ {i}: {e}") from None
+
+        with metrics.timed("api_calculate_batch"):
+            if len(parsed) <= INLINE_BATCH:
+                results = [result_json(calculate_case(case, self.rule_index)) for case in parsed]
+            else:
+                results = await self.offload(_calculate_cases, parsed)
+        return Response.from_json({"results": results})
+
+    async def slip(self, body):
+        case = parse_case(self._read_json(body))
+        result = calculate_case(case, self.rule_index)
+        with metrics.timed("api_render"):
+            document = await self.offload(_render_slip, slip_data(result))
+        metrics.inc(metrics.SLIPS_TOTAL, {"law": case["law"]})
+        metrics.observe(metrics.DOCUMENT_BYTES, len(document))
+        return Response(200, document, DOCX_MIME, {
+            "Content-Disposition": f'attachment; filename="{DOCX_FILENAME}"',
+        })
+
+
+# ---------------------------------------------------------------------------
+# HTTP/1.1 บน asyncio streams (รองรับ keep-alive และ body แบบ Content-Length)
+
+async def _read_request(reader):
+    """คืน (method, path, headers, body) หรือ None ถ้าการเชื่อมต่อปิดแล้ว"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ValueError("request line ไม่ถูกต้อง") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise ValueError("ไม่รองรับ Transfer-Encoding: chunked")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise ValueError("Content-Length ไม่ถูกต้อง") from None
+    if length < 0 or length > MAX_BODY:
+        raise ValueError(f"body ต้องมีขนาดไม่เกิน {MAX_BODY:,} bytes")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method, urlsplit(target).path, keep_alive, body
+
+
+async def handle_connection(api, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ValueError as e:
+                writer.write(Response.error(400, str(e)).encode(keep_alive=False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, path, keep_alive, body = request
+            response = await api.handle(method, path, body)
+            writer.write(response.encode(keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(api, host="127.0.0.1", port=8600):
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(api, reader, writer), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+class TestClient:
+    """เรียก RewardAPI ภายใน process เดียวกันโดยไม่ผ่าน socket"""
+
+    def __init__(self, api):
+        self.api = api
+        self._loop = asyncio.new_event_loop()
+
+    def __enter__(self):
+        self.api.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.api.close()
+        self._loop.close()
+
+    def request(self, method, path, payload=None, body=b""):
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return self._loop.run_until_complete(self.api.handle(method, path, body))
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    def post(self, path, payload=None, body=b""):
+        return self.request("POST", path, payload, body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API คำนวณส่วนแบ่งเงินรางวัลนำจับและสร้างใบสั่งชำระค่าปรับ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--rules", default=RULES_FILE, help="ไฟล์ตารางจำนวนเงินส่วนแบ่งสูงสุด")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="จำนวน process สำหรับเรนเดอร์ (0 = ไม่ใช้ process pool)")
+    parser.add_argument("--max-pending", type=int, default=None, help="จำนวนงานค้างใน process pool ได้สูงสุด (ค่าเริ่มต้น workers x 64)")
+    args = parser.parse_args(argv)
+
+    api = RewardAPI(args.rules, workers=args.workers, max_pending=args.max_pending).start()
+    sys.stderr.write(f"เปิด API ที่ http://{args.host}:{args.port}\n")
+    try:
+        asyncio.run(serve(api, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
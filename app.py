@@ -1,12 +1,18 @@
 import streamlit as st
-import pandas as pd
+import hmac
 import os
-from docx import Document
-from docx.shared import Pt, Inches, Twips
+import sqlite3
+import threading
+import time
 from datetime import datetime
-import base64
-from io import BytesIO
-from lxml import etree
+import metrics
+import jobs
+from rules import RULES_FILE, RuleIndex, load_rule_index
+from search import SearchIndex
+from calculator import calculate_share
+from slip import slip_data
+from slip_template import SlipCache
+from ledger import Ledger, document_hash
 
 # Set page configuration
 st.set_page_config(
@@ -51,335 +57,207 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ส่งออก metrics ตาม REWARD_CAL_METRICS_PORT / REWARD_CAL_METRICS_FILE (ครั้งเดียวต่อ process)
+@st.cache_resource
+def start_metrics_exporter():
+    try:
+        return metrics.start_from_env()
+    except OSError:
+        return {}
+
+# thread ของแต่ละ session ใช้ตรวจว่า load_max_fine_data โหลดใหม่ (cache miss) ในรอบนี้หรือไม่
+_rules_load = threading.local()
+
 # Function to load max fine share data
-@st.cache_data
+# ใช้ cache_resource เพื่อให้ทุก rerun ใช้ดัชนีกฎชุดเดียวกันโดยไม่ต้อง copy
+@st.cache_resource
 def load_max_fine_data():
-    # Try different encodings to handle Thai characters
-    encodings = ['utf-8-sig', 'utf-8', 'cp874', 'tis-620', 'windows-874']
-    
-    # Check if file exists
-    if not os.path.exists("max_fine_shares.csv"):
+    _rules_load.miss = True
+    # สร้างดัชนี (พ.ร.บ., มาตรา) ครั้งเดียว เพื่อค้นหาแบบ O(1)
+    # (โหลดจาก snapshot ถ้าไฟล์ CSV ไม่เปลี่ยนตั้งแต่ครั้งก่อน)
+    try:
+        return load_rule_index(RULES_FILE)
+    except FileNotFoundError:
         st.error("ไม่พบไฟล์ max_fine_shares.csv กรุณาตรวจสอบว่าไฟล์อยู่ในโฟลเดอร์เดียวกับแอปพลิเคชัน")
-        return pd.DataFrame(columns=["พ.ร.บ.", "มาตรา", "จำนวนเงินส่วนแบ่งสูงสุด", "ความผิด"])
-    
-    for encoding in encodings:
-        try:
-            df = pd.read_csv("max_fine_shares.csv", encoding=encoding)
-            # ตรวจสอบว่าข้อมูลถูกต้องหรือไม่ (มีคอลัมน์ที่ต้องการครบ)
-            required_columns = ["พ.ร.บ.", "มาตรา", "จำนวนเงินส่วนแบ่งสูงสุด"]
-            
-            # ถ้าไม่มีคอลัมน์ที่ต้องการ โปรแกรมอาจอ่านไฟล์ได้แต่ encoding ไม่ถูกต้อง
-            if not all(col in df.columns for col in required_columns):
-                continue
-                
-            # แปลงคอลัมน์ 'จำนวนเงินส่วนแบ่งสูงสุด' เป็นตัวเลข
-            df['จำนวนเงินส่วนแบ่งสูงสุด'] = pd.to_numeric(df['จำนวนเงินส่วนแบ่งสูงสุด'], errors='coerce')
-            
-            # เพิ่มคอลัมน์ "ความผิด" หากไม่มี
-            if "ความผิด" not in df.columns:
-                df["ความผิด"] = ""
-                
-            # เพิ่มคอลัมน์ "มีจำนวนเงินส่วนแบ่งสูงสุด" เพื่อระบุว่ากฎหมายนี้มีจำนวนเงินส่วนแบ่งสูงสุดหรือไม่
-            df['มีจำนวนเงินส่วนแบ่งสูงสุด'] = df['จำนวนเงินส่วนแบ่งสูงสุด'].notna()
-                
-            return df
-            
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            pass
-    
-    st.error("ไม่สามารถอ่านไฟล์ข้อมูลได้ กรุณาตรวจสอบรูปแบบไฟล์และ encoding")
-    return pd.DataFrame(columns=["พ.ร.บ.", "มาตรา", "จำนวนเงินส่วนแบ่งสูงสุด", "ความผิด", "มีจำนวนเงินส่วนแบ่งสูงสุด"])
+        return RuleIndex()
+    except ValueError as e:
+        st.error(f"ไม่สามารถอ่านไฟล์ข้อมูลได้ กรุณาตรวจสอบรูปแบบไฟล์และ encoding ({e})")
+        return RuleIndex()
 
-def has_max_share_limit(law_name, section, df):
-    """
-    ตรวจสอบว่ากฎหมายและมาตราที่ระบุมีจำนวนเงินส่วนแบ่งสูงสุดหรือไม่
-    """
-    # ถ้าเป็น "มาตรา อื่นๆ" หรือ "ไม่ระบุ" หรือ None ให้ถือว่าไม่มีจำนวนเงินส่วนแบ่งสูงสุด
-    if section in ["มาตรา อื่นๆ", "ไม่ระบุ", None]:
-        return False, None
-    
-    # ค้นหากฎหมายและมาตราที่ตรงกัน
-    matching_rows = df[(df['พ.ร.บ.'] == law_name) & (df['มาตรา'] == section)]
-    
-    if matching_rows.empty:
-        return False, None
-    
-    # ตรวจสอบว่ามีจำนวนเงินส่วนแบ่งสูงสุดหรือไม่
-    has_limit = matching_rows['มีจำนวนเงินส่วนแบ่งสูงสุด'].iloc[0]
-    max_share = matching_rows['จำนวนเงินส่วนแบ่งสูงสุด'].iloc[0] if has_limit else None
-    
-    return has_limit, max_share
+# ดัชนีค้นหาความผิดและมาตรา สร้างครั้งเดียวต่อตารางกฎที่โหลด
+@st.cache_resource
+def load_search_index():
+    return SearchIndex.from_rule_index(load_max_fine_data())
 
-# Function to create and download Word document
-def create_word_document(data):
-    doc = Document()
-    
-    # Set page width for the document (A4)
-    section = doc.sections[0]
-    section.page_width = Inches(8.27)  # A4 width
-    section.page_height = Inches(11.69)  # A4 height
-    
-    # Add XML parser function
-    def parse_xml(xml_string):
-        return etree.fromstring(xml_string)
-    
-    # Set font for the entire document
-    style = doc.styles['Normal']
-    style.font.name = 'TH SarabunPSK'
-    style.font.size = Pt(16)
-    
-    # Add document heading with proper formatting
-    title = doc.add_heading("", level=0)
-    title_run = title.add_run("ใบสั่งชำระค่าปรับ")
-    title_run.font.name = 'TH SarabunPSK'
-    title_run.font.size = Pt(20)
-    title_run.font.bold = True
-    title.alignment = 1  # Center alignment
+DOCX_FILENAME = "รายงานการคำนวณส่วนแบ่งเงินรางวัลนำจับ.docx"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
-    # Add department info (right-aligned)
-    header_para1 = doc.add_paragraph()
-    header_para1.alignment = 2  # Right alignment
-    header_run1 = header_para1.add_run("สำนักงานสาธารณสุขจังหวัดสมุทรปราการ")
-    header_run1.font.name = 'TH SarabunPSK'
-    header_run1.font.size = Pt(16)
+# Cache of rendered slips shared by every session; identical inputs reuse the same bytes
+@st.cache_resource
+def get_slip_cache():
+    return SlipCache(maxsize=256)
 
-    # Add address (right-aligned)
-    header_para2 = doc.add_paragraph()
-    header_para2.alignment = 2  # Right alignment
-    header_run2 = header_para2.add_run("๑๙ ซอย ๓๕ อัศวนนท์ ๒ สป ๑๐๒๗๐")
-    header_run2.font.name = 'TH SarabunPSK'
-    header_run2.font.size = Pt(16)
+# สมุดบันทึกผลการคำนวณ (ไฟล์ SQLite ตาม REWARD_CAL_LEDGER) ใช้ร่วมกันทุก session
+@st.cache_resource
+def get_ledger():
+    return Ledger()
 
-    # Add date field (right-aligned)
-    header_para3 = doc.add_paragraph()
-    header_para3.alignment = 2  # Right alignment
-    header_run3 = header_para3.add_run("วันที่.....................................................")
-    header_run3.font.name = 'TH SarabunPSK'
-    header_run3.font.size = Pt(16)
+def get_rule_index():
+    _rules_load.miss = False
+    with metrics.timed("load_rules"):
+        rule_index = load_max_fine_data()
+    metrics.cache_result("rules", not _rules_load.miss)
+    return rule_index
 
-    # Add blank space
-    doc.add_paragraph()
+def get_search_index():
+    with metrics.timed("load_search_index"):
+        return load_search_index()
 
-    # Add recipient line
-    recipient_para = doc.add_paragraph()
-    recipient_para.add_run("ถึงเจ้าหน้าที่การเงิน กลุ่มงานบริหาร")
-    recipient_para.alignment = 0  # Left alignment
+def search_hit_label(hit):
+    label = f"{hit.law} — {hit.section or 'ไม่ระบุ'}"
+    return f"{label} — {hit.offense}" if hit.offense else label
 
-    # Add money receipt line
-    receipt_from_para = doc.add_paragraph()
-    receipt_from_para.add_run("โปรดรับเงินจาก.............................................................................")
-    receipt_from_para.alignment = 0  # Left alignment
+# งานเบื้องหลังของทุก session ใช้ worker pool ชุดเดียว (งานที่ค้างจากการรันครั้งก่อนจะทำต่อเมื่อสร้าง)
+# สร้างตั้งแต่การรัน script ครั้งแรกของ process ไม่ว่าจะเปิดหน้าใด งานที่ค้างจึงไม่ต้องรอให้มีคนเปิดหน้างาน
+@st.cache_resource
+def get_job_manager():
+    return jobs.JobManager(max_workers=int(os.environ.get("REWARD_CAL_JOB_WORKERS", "2")))
 
-    
-    # Add fine amount
-    amount_para = doc.add_paragraph()
-    amount_text = f"*จำนวนเงินค่าปรับรวม {data['fine_amount']:,.2f} บาท ({convert_to_thai_text(data['fine_amount'])})"
-    amount_para.add_run(amount_text).bold = True
-    
-    # Add law info
-    law_para = doc.add_paragraph()
-    law_text = f"เป็นค่าปรับ ตามพระราชบัญญัติ{data['law']} และที่แก้ไขเพิ่มเติม"
-    law_para.add_run(law_text)
-    
-    # Add offense description
-    offense_para = doc.add_paragraph()
-    if "offense" in data and data["offense"]:
-        offense_text = f"ข้อกฎหมายความผิด    {data['offense']} มีบทกำหนดโทษตาม {data['section']}"
+def query_param(name):
+    # st.query_params มีตั้งแต่ Streamlit 1.30 รุ่นก่อนหน้าใช้ experimental_get_query_params
+    if hasattr(st, "query_params"):
+        return st.query_params.get(name)
+    values = st.experimental_get_query_params().get(name)
+    return values[0] if values else None
+
+def set_query_param(name, value):
+    # ค่า None จะลบ parameter ออกจาก URL
+    if hasattr(st, "query_params"):
+        if value is None:
+            st.query_params.pop(name, None)
+        else:
+            st.query_params[name] = value
+        return
+    params = {key: values for key, values in st.experimental_get_query_params().items() if key != name}
+    if value is not None:
+        params[name] = value
+    st.experimental_set_query_params(**params)
+
+def rerun():
+    # st.rerun มีตั้งแต่ Streamlit 1.27
+    if hasattr(st, "rerun"):
+        st.rerun()
     else:
-        offense_text = f"ข้อกฎหมายความผิด    .......................................................................................................................................................................................................................................... มีบทกำหนดโทษตามมาตรา {data['section']}"
-    offense_para.add_run(offense_text)
-    
-    # Create a table for the fine calculation (2 columns, 8 rows)
-    fine_table = doc.add_table(rows=8, cols=2)
-    fine_table.style = 'Table Grid'
-    fine_table.autofit = False
-    
-    # กำหนดความกว้างตาราง 50% ของหน้า
-    fine_table._element.tblPr.xpath('./w:tblW')[0].set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}w', '2500')
-    fine_table._element.tblPr.xpath('./w:tblW')[0].set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}type', 'pct')
-    
-    # ลบเส้นตารางภายในและใส่เฉพาะเส้นกรอบภายนอก
-    tblBorders = parse_xml("""
-    <w:tblBorders xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
-      <w:top w:val="single" w:sz="4" w:space="0" w:color="auto"/>
-      <w:left w:val="single" w:sz="4" w:space="0" w:color="auto"/>
-      <w:bottom w:val="single" w:sz="4" w:space="0" w:color="auto"/>
-      <w:right w:val="single" w:sz="4" w:space="0" w:color="auto"/>
-      <w:insideH w:val="nil"/>
-      <w:insideV w:val="nil"/>
-    </w:tblBorders>
-    """)
-    
-    # ดึง tblPr element
-    tblPr = fine_table._element.xpath('./w:tblPr')[0]
-    # ลบ tblBorders เดิมถ้ามี
-    for element in tblPr.xpath('./w:tblBorders'):
-        tblPr.remove(element)
-    # เพิ่ม tblBorders ใหม่
-    tblPr.append(tblBorders)
-    
-    # Add the box title
-    fine_box_cell = fine_table.cell(0, 0)
-    fine_box_cell.merge(fine_table.cell(0, 1))
-    fine_box_para = fine_box_cell.paragraphs[0]
-    fine_box_para.add_run(f"กันเงิน...60...%*").bold = True
-    fine_box_para.alignment = 1  # Center
-    
-    # Add calculation rows
-    fine_table.cell(1, 0).text = "จำนวนเงิน"
-    fine_table.cell(1, 1).text = f"{data['calculated_share']:,.2f} บาท"
-    
-    fine_table.cell(2, 0).text = "สูงสุดไม่เกิน"
-    if data['max_share'] == float('inf'):
-        fine_table.cell(2, 1).text = "ไม่มีกำหนด"
+        st.experimental_rerun()
+
+def is_admin_request():
+    # หน้าผู้ดูแลไม่มีลิงก์ในแอป เปิดด้วย ?admin=<REWARD_CAL_ADMIN_TOKEN>
+    # ถ้าไม่ได้ตั้ง REWARD_CAL_ADMIN_TOKEN จะเปิดหน้าผู้ดูแลไม่ได้
+    value = query_param("admin")
+    token = os.environ.get("REWARD_CAL_ADMIN_TOKEN")
+    if not value or not token:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), token.encode("utf-8"))
+
+# Hidden admin page with the collected metrics
+def admin_page():
+    st.title("📊 สถิติการทำงานของระบบ")
+
+    st.subheader("เวลาแต่ละขั้นตอน")
+    stages = metrics.REGISTRY.stage_summary()
+    if stages:
+        st.table([{
+            "ขั้นตอน": row["stage"],
+            "จำนวนครั้ง": row["count"],
+            "เฉลี่ย (ms)": f"{row['mean_ms']:.2f}",
+            "p95 (ms ไม่เกิน)": f"{row['p95_ms_le']:g}",
+        } for row in stages])
     else:
-        fine_table.cell(2, 1).text = f"{data['max_share']:,.2f} บาท"
-    
-    fine_table.cell(3, 0).text = "เงินสินบนนำจับ"
-    fine_table.cell(3, 1).text = f"{data['share1']:,.2f} บาท(25 %*)"
-    
-    # Add checkboxes based on bounty claimant status and law type
-    check_cell = fine_table.cell(4, 0)
-    check_cell.merge(fine_table.cell(4, 1))
-    check_para = check_cell.paragraphs[0]
-    
-    if data.get('has_bounty_claimant', False):
-        check_para.add_run("☑ จ่ายให้ผู้ขอรับสินบนนำจับ")
+        st.write("ยังไม่มีข้อมูล")
+
+    st.subheader("Cache")
+    caches = {}
+    for key, value in metrics.REGISTRY.counter_values(metrics.CACHE_TOTAL).items():
+        labels = dict(key)
+        caches.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] = value
+    st.table([{"cache": name, "hit": counts["hit"], "miss": counts["miss"]}
+              for name, counts in sorted(caches.items())])
+
+    st.subheader("จำนวนใบสั่งตามพระราชบัญญัติ")
+    slips = metrics.REGISTRY.counter_values(metrics.SLIPS_TOTAL)
+    st.table([{"พระราชบัญญัติ": dict(key)["law"], "จำนวนใบ": value}
+              for key, value in sorted(slips.items(), key=lambda item: -item[1])])
+
+    exposition = metrics.render()
+    st.download_button("📥 ดาวน์โหลด metrics.prom", data=exposition,
+                       file_name="metrics.prom", mime="text/plain")
+    st.code(exposition, language="text")
+
+# หน้าคำนวณจากไฟล์ CSV งานทำใน worker pool นอกรอบ rerun ของ script
+# job id อยู่ใน URL (?job=...) การรีเฟรชหน้าหรือเริ่ม server ใหม่จึงกลับมาดูงานเดิมได้
+def jobs_page():
+    st.title("📂 คำนวณจากไฟล์ CSV")
+    manager = get_job_manager()
+
+    job_id = query_param("job")
+    if not job_id:
+        st.write("ไฟล์ต้องมีคอลัมน์ fine_amount, law, section และ has_bounty_claimant (ไม่บังคับ)")
+        uploaded = st.file_uploader("เลือกไฟล์รายการค่าปรับ", type=["csv"])
+        if uploaded is not None and st.button("เริ่มคำนวณ"):
+            set_query_param("job", manager.submit(uploaded.getvalue(), uploaded.name))
+            rerun()
+        return
+
+    job = manager.status(job_id)
+    if job is None:
+        st.error("ไม่พบงานนี้")
     else:
-        check_para.add_run("□ จ่ายให้ผู้ขอรับสินบนนำจับ")
-    
-    check_cell2 = fine_table.cell(5, 0)
-    check_cell2.merge(fine_table.cell(5, 1))
-    check_para2 = check_cell2.paragraphs[0]
-    
-    if not data.get('has_bounty_claimant', False):
-        # For Cosmetic Act and Medical Device Act, always check "เป็นรายได้แผ่นดิน"
-        if data['law'] in ['เครื่องสำอาง พ.ศ. 2558', 'เครื่องมือแพทย์ พ.ศ. 2551']:
-            check_para2.add_run("☑ เป็นรายได้แผ่นดิน")
+        st.write(f"ไฟล์: **{job['filename']}** (เริ่ม {job['created_at']})")
+        if job["status"] in (jobs.QUEUED, jobs.RUNNING):
+            total = job["total"]
+            if job["status"] == jobs.QUEUED or not total:
+                st.progress(0.0, text="รอคิว..." if job["status"] == jobs.QUEUED else "กำลังคำนวณ...")
+            else:
+                st.progress(min(job["done"] / total, 1.0), text=f"สร้างใบสั่งแล้ว {job['done']:,}/{total:,} ใบ")
+            # อ่านสถานะใหม่ทุกวินาทีจนกว่างานจะเสร็จ
+            time.sleep(1)
+            rerun()
+        elif job["status"] == jobs.FAILED:
+            st.error(f"งานล้มเหลว: {job['error']}")
+            if st.button("ลองใหม่ (ทำต่อจากที่ค้างไว้)"):
+                manager.retry(job_id)
+                rerun()
         else:
-            check_para2.add_run("☑ รวมกับสินบนรางวัล")
-    else:
-        check_para2.add_run("□ เป็นรายได้แผ่นดิน")
-    
-    # Add reward and expense rows
-    fine_table.cell(6, 0).text = "รางวัล"
-    fine_table.cell(6, 1).text = f"{data['share2']:,.2f} บาท(50 %*)"
-    
-    fine_table.cell(7, 0).text = "คชจ."
-    fine_table.cell(7, 1).text = f"{data['share3']:,.2f} บาท(25 %*)"
-    
-    # Set font for all cells
-    for row in fine_table.rows:
-        for cell in row.cells:
-            for paragraph in cell.paragraphs:
-                for run in paragraph.runs:
-                    run.font.size = Pt(14)
-                    run.font.name = 'TH SarabunPSK'
-                paragraph.alignment = 1  # Center align
-    
-    # Add signature section
-    doc.add_paragraph()
-    sig_section = doc.add_paragraph()
-    sig_section.alignment = 2  # Right alignment
-    sig_section.add_run("ผู้รับชำระ.........................................\n")
-    sig_section.add_run("โทร ................................................")
-    
-    # Save to BytesIO object
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    
-    return buffer
+            st.success(f"เสร็จแล้ว {job['total']:,} รายการ")
+            # งานที่สร้างก่อนมีการนับแถวที่ไม่ถูกต้องไม่มีคีย์นี้ใน job.json
+            invalid = job.get("invalid", 0)
+            if invalid:
+                rows = job.get("invalid_rows", [])
+                shown = ", ".join(str(row) for row in rows)
+                more = " ..." if invalid > len(rows) else ""
+                st.warning(f"ไม่ได้ออกใบสั่ง {invalid:,} รายการที่ค่าปรับหรือวันที่ไม่ถูกต้อง (แถวที่ {shown}{more})")
+            with open(manager.path(job_id, jobs.RESULTS_FILE), "rb") as f:
+                st.download_button("📥 ดาวน์โหลดผลการคำนวณ (CSV)", data=f, file_name="results.csv", mime="text/csv")
+            with open(manager.path(job_id, jobs.SLIPS_FILE), "rb") as f:
+                st.download_button("📥 ดาวน์โหลดใบสั่งชำระค่าปรับ (ZIP)", data=f, file_name="slips.zip",
+                                   mime="application/zip")
 
-# Function to convert number to Thai text
-def convert_to_thai_text(number):
-    # A simple implementation to convert numbers to Thai text
-    # This is a basic implementation and might need more sophistication for real use
-    
-    if number == 0:
-        return "ศูนย์บาทถ้วน"
-    
-    # Split into integer and decimal parts
-    integer_part = int(number)
-    decimal_part = int(round((number - integer_part) * 100))
-    
-    # Thai digits
-    thai_digits = ["", "หนึ่ง", "สอง", "สาม", "สี่", "ห้า", "หก", "เจ็ด", "แปด", "เก้า"]
-    
-    # Thai units
-    thai_units = ["", "สิบ", "ร้อย", "พัน", "หมื่น", "แสน", "ล้าน"]
-    
-    # Convert integer part
-    result = ""
-    
-    if integer_part >= 1000000:
-        millions = integer_part // 1000000
-        result += convert_to_thai_text(millions) + "ล้าน"
-        integer_part %= 1000000
-    
-    # Process each digit
-    digits = [int(d) for d in str(integer_part)]
-    length = len(digits)
-    
-    for i in range(length):
-        digit = digits[i]
-        if digit == 0:
-            continue
-            
-        if i == length - 1 and digit == 1 and length > 1:
-            result += "เอ็ด"
-        elif i == length - 2 and digit == 2:
-            result += "ยี่สิบ"
-        elif i == length - 2 and digit == 1:
-            result += "สิบ"
-        else:
-            result += thai_digits[digit] + thai_units[length - i - 1]
-    
-    # Add "baht"
-    result += "บาท"
-    
-    # Add decimal part if exists
-    if decimal_part > 0:
-        if decimal_part < 10:
-            result += thai_digits[decimal_part] + "สตางค์"
-        else:
-            tens = decimal_part // 10
-            ones = decimal_part % 10
-            
-            if tens == 2:
-                result += "ยี่สิบ"
-            elif tens == 1:
-                result += "สิบ"
-            else:
-                result += thai_digits[tens] + "สิบ"
-                
-            if ones == 1:
-                result += "เอ็ดสตางค์"
-            elif ones > 0:
-                result += thai_digits[ones] + "สตางค์"
-            else:
-                result += "สตางค์"
-    else:
-        result += "ถ้วน"
-        
-    return result
+    if st.button("อัปโหลดไฟล์ใหม่"):
+        set_query_param("job", None)
+        rerun()
 
-# Function to get download link for docx
-def get_download_link(buffer, filename="รายงานการคำนวณส่วนแบ่งเงินรางวัลนำจับ.docx"):
-    b64 = base64.b64encode(buffer.getvalue()).decode()
-    return f'<a href="data:application/vnd.openxmlformats-officedocument.wordprocessingml.document;base64,{b64}" download="{filename}">📥 ดาวน์โหลดรายงาน Word</a>'
+PAGES = ("คำนวณทีละรายการ", "คำนวณจากไฟล์ CSV")
 
 # Main function
 def main():
     st.title("💰 ระบบคำนวณส่วนแบ่งเงินรางวัลนำจับ")
     
     # Load max fine data
-    df = load_max_fine_data()
+    rule_index = get_rule_index()
     
     # Get unique laws from the data
-    laws = ["กรุณาเลือก..."] + df["พ.ร.บ."].unique().tolist()
+    laws = ["กรุณาเลือก..."] + rule_index.laws
+    search_index = get_search_index()
     
     with st.container():
         st.markdown('<div class="info-box">', unsafe_allow_html=True)
@@ -388,34 +266,52 @@ def main():
         # Input for fine amount
         fine_amount = st.number_input("จำนวนเงินค่าปรับ (บาท)", min_value=0, value=None, step=100, placeholder="กรอกจำนวนเงิน")
         
+        # ค้นหาจากความผิดหรือเลขมาตราของทุกพระราชบัญญัติ แล้วเลือกพระราชบัญญัติและมาตราให้อัตโนมัติ
+        query = st.text_input("🔎 ค้นหาความผิดหรือมาตรา", placeholder="เช่น 100/1 หรือ โฆษณา")
+        picked = None
+        if query:
+            with metrics.timed("search"):
+                hits = search_index.search(query, limit=20)
+            if hits:
+                picked = st.selectbox("ผลการค้นหา", hits, format_func=search_hit_label)
+            else:
+                st.caption("ไม่พบความผิดหรือมาตราที่ตรงกับคำค้น")
+        
         # Select law
-        selected_law = st.selectbox("เลือกพระราชบัญญัติ", laws)
+        law_index = laws.index(picked.law) if picked is not None and picked.law in laws else 0
+        selected_law = st.selectbox("เลือกพระราชบัญญัติ", laws, index=law_index)
         
         # Filter sections based on selected law
         if selected_law == "กรุณาเลือก...":
             sections = ["กรุณาเลือก..."]
-            filtered_sections = pd.DataFrame(columns=df.columns)
         else:
-            filtered_sections = df[df["พ.ร.บ."] == selected_law]
-            # Replace NaN values with "ไม่ระบุ" for sections
-            sections = ["กรุณาเลือก..."] + [section if pd.notna(section) else "ไม่ระบุ" for section in filtered_sections["มาตรา"].tolist()]
+            # มาตราที่ว่างจะแสดงเป็น "ไม่ระบุ"
+            with metrics.timed("lookup"):
+                sections = ["กรุณาเลือก..."] + rule_index.sections(selected_law)
         
         # Select section
-        selected_section = st.selectbox("เลือกบทกำหนดโทษ", sections)
+        section_index = 0
+        if picked is not None and picked.law == selected_law:
+            picked_section = picked.section if picked.section is not None else "ไม่ระบุ"
+            section_index = sections.index(picked_section) if picked_section in sections else 0
+        selected_section = st.selectbox("เลือกบทกำหนดโทษ", sections, index=section_index)
         
         # Add checkbox for bounty claimant
         has_bounty_claimant = st.checkbox("มีผู้ขอรับสินบนนำจับ")
         
+        # จำนวนเงินส่วนแบ่งสูงสุดใช้ตามฉบับที่มีผลในวันที่กระทำความผิด
+        offense_date = st.date_input("วันที่กระทำความผิด")
+        
         # Get offense information if available
         offense_info = ""
         if selected_section != "กรุณาเลือก..." and selected_law != "กรุณาเลือก...":
             # Handle the case where section is "ไม่ระบุ" or "มาตรา อื่นๆ"
             section_to_match = None if selected_section in ["ไม่ระบุ", "มาตรา อื่นๆ"] else selected_section
-            selected_row = filtered_sections[filtered_sections["มาตรา"] == section_to_match]
-            if not selected_row.empty and "ความผิด" in selected_row.columns:
-                offense_info = selected_row["ความผิด"].values[0]
-                if pd.notna(offense_info) and offense_info:
-                    st.info(f"**ความผิด**: {offense_info}")
+            with metrics.timed("lookup"):
+                selected_rule = rule_index.get(selected_law, section_to_match, offense_date)
+            if selected_rule is not None and selected_rule.offense:
+                offense_info = selected_rule.offense
+                st.info(f"**ความผิด**: {offense_info}")
 
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -428,31 +324,25 @@ def main():
             elif selected_section == "กรุณาเลือก...":
                 st.error("กรุณาเลือกบทกำหนดโทษ")
             else:
-                # Calculate 60% of fine
-                calculated_share = fine_amount * 0.6
-                
                 # Get maximum share for selected law and section
                 # Handle the case where section is "ไม่ระบุ" or "มาตรา อื่นๆ"
                 section_to_match = None if selected_section in ["ไม่ระบุ", "มาตรา อื่นๆ"] else selected_section
-                max_share_row = filtered_sections[filtered_sections["มาตรา"] == section_to_match]
                 
-                # Check if the law has a maximum share limit
-                has_limit, max_share = has_max_share_limit(selected_law, section_to_match, df)
+                # Calculate 60% of fine, capped by the section's maximum share, and split 25/50/25
+                with metrics.timed("calculate"):
+                    result = calculate_share(fine_amount, selected_law, section_to_match, rule_index, offense_date)
+                calculated_share = result["calculated_share"]
+                actual_share = result["actual_share"]
+                max_share = result["max_share"]
+                share1 = result["share1"]  # 25% - เงินสินบนนำจับ
+                share2 = result["share2"]  # 50% - เงินรางวัล
+                share3 = result["share3"]  # 25% - ค่าใช้จ่ายในการดำเนินงาน
                 
-                if not has_limit:
-                    # If no maximum share limit, use the calculated share directly
-                    actual_share = calculated_share
+                if not result["has_limit"]:
                     max_share_display = "ไม่มีกำหนด"
                 else:
-                    # Use the minimum between calculated share and maximum share
-                    actual_share = min(calculated_share, max_share)
                     max_share_display = f"{max_share:,.2f} บาท"
                 
-                # Calculate distribution
-                share1 = actual_share * 0.25  # 25% - เงินสินบนนำจับ
-                share2 = actual_share * 0.50  # 50% - เงินรางวัล
-                share3 = actual_share * 0.25  # 25% - ค่าใช้จ่ายในการดำเนินงาน
-                
                 # Display results
                 st.markdown('<div class="result-box">', unsafe_allow_html=True)
                 st.subheader("💵 ผลการคำนวณ")
@@ -484,35 +374,49 @@ def main():
                 st.markdown("---")
                 
                 # Create Word document
-                data = {
-                    "law": selected_law,
-                    "section": "..............................................................................................." if selected_section in ["ไม่ระบุ", "มาตรา อื่นๆ"] else selected_section,
-                    "fine_amount": fine_amount,
-                    "max_share": max_share if has_limit else float('inf'),
-                    "calculated_share": calculated_share,
-                    "actual_share": actual_share,
-                    "share1": share1,
-                    "share2": share2,
-                    "share3": share3,
-                    "has_bounty_claimant": has_bounty_claimant
-                }
+                data = slip_data(dict(
+                    result,
+                    law=selected_law,
+                    section=selected_section,
+                    offense=offense_info,
+                    has_bounty_claimant=has_bounty_claimant,
+                ))
                 
-                # เพิ่มข้อมูลความผิด (ถ้ามี)
-                if "ความผิด" in max_share_row.columns and not max_share_row.empty:
-                    offense_text = max_share_row["ความผิด"].values[0]
-                    if pd.notna(offense_text) and offense_text:
-                        data["offense"] = offense_text
-                    else:
-                        data["offense"] = "..............................................................................................."
-                else:
-                    data["offense"] = "..............................................................................................."
+                with metrics.timed("render"):
+                    document = get_slip_cache().get(data)
+                metrics.inc(metrics.SLIPS_TOTAL, {"law": selected_law})
+                metrics.observe(metrics.DOCUMENT_BYTES, len(document))
                 
-                buffer = create_word_document(data)
+                # Record the calculation in the ledger
+                try:
+                    with metrics.timed("ledger"):
+                        get_ledger().append(dict(
+                            result,
+                            law=selected_law,
+                            section=section_to_match,
+                            has_bounty_claimant=has_bounty_claimant,
+                            offense_date=offense_date,
+                        ), document_hash=document_hash(document))
+                except sqlite3.Error as e:
+                    st.warning(f"ไม่สามารถบันทึกผลการคำนวณลงสมุดบันทึกได้ ({e})")
                 
-                # Provide download link
-                st.markdown(get_download_link(buffer), unsafe_allow_html=True)
+                # Provide download button (the file is fetched over HTTP only when clicked)
+                with metrics.timed("download"):
+                    st.download_button(
+                        "📥 ดาวน์โหลดรายงาน Word",
+                        data=document,
+                        file_name=DOCX_FILENAME,
+                        mime=DOCX_MIME,
+                    )
                 
                 st.markdown('</div>', unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    start_metrics_exporter()
+    get_job_manager()
+    if is_admin_request():
+        admin_page()
+    elif st.sidebar.radio("เมนู", PAGES, index=1 if query_param("job") else 0) == PAGES[1]:
+        jobs_page()
+    else:
+        main() 
\ No newline at end of file
@@ -0,0 +1,392 @@
+"""
+ชุดวัดประสิทธิภาพของการโหลดตารางกฎ การค้นหา การคำนวณส่วนแบ่ง การกระทบยอด การแปลงจำนวนเงินเป็นข้อความ
+และการสร้างเอกสาร Word
+
+ใช้ตารางกฎสังเคราะห์ขนาด 75, 5,000 และ 50,000 แถว และชุดรายการ 1 ถึง 1,000,000 รายการ
+รายงาน throughput และ latency (p50/p99) ต่อการเรียกหนึ่งครั้ง ทำงานแบบ offline ทั้งหมด
+
+การใช้งาน:
+    python benchmark.py                                  # วัดทั้งหมดแล้วแสดงตาราง
+    python benchmark.py --quick                          # ขนาดเล็ก ใช้ตรวจเร็วๆ
+    python benchmark.py --only thai_text --only render   # เฉพาะชื่อที่มีคำเหล่านี้
+    python benchmark.py --output baseline.json           # บันทึก baseline
+    python benchmark.py --compare baseline.json --threshold 0.2
+                                                         # exit 1 ถ้าช้าลงเกิน 20%
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from calculator import calculate_batch, calculate_share, rule_frame
+from reconcile import reconcile
+from rules import has_max_share_limit, load_rule_index
+from search import SearchIndex
+from slip import create_word_document, slip_data
+from slip_template import SlipCache, get_template
+from thai_text import convert_to_thai_text, convert_to_thai_text_batch
+
+RULE_SIZES = (75, 5000, 50000)
+BATCH_SIZES = (1, 100, 10000, 1000000)
+QUICK_RULE_SIZES = (75, 5000)
+QUICK_BATCH_SIZES = (1, 100, 10000)
+
+SEED = 20240101
+
+# ตารางกฎจริงของแอป (ไม่ขึ้นกับโฟลเดอร์ที่รัน)
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "max_fine_shares.csv")
+
+
+def synthetic_rule_rows(n_rows, seed=SEED):
+    """แถวของตารางกฎสังเคราะห์ (พ.ร.บ., มาตรา, จำนวนเงินส่วนแบ่งสูงสุด, ความผิด)"""
+    rng = random.Random(seed)
+    rows = []
+    n_laws = max(1, n_rows // 50)
+    for i in range(n_rows):
+        law = f"พระราชบัญญัติทดสอบที่ {i % n_laws + 1} พ.ศ. 25{i % 70 + 10}"
+        section = f"มาตรา {i // n_laws + 1}" + (" วรรคสอง" if i % 3 == 0 else "")
+        max_share = "" if rng.random() < 0.1 else str(rng.choice([6000, 30000, 60000, 120000, 300000]))
+        offense = f"ผู้ใดฝ่าฝืนมาตรา {rng.randint(1, 200)} ({rng.randint(1, 9)})"
+        rows.append((law, section, max_share, offense))
+    return rows
+
+
+def synthetic_rule_versions(n_keys, n_versions, seed=SEED):
+    """
+    แถวของตารางกฎสังเคราะห์ที่แต่ละ (พ.ร.บ., มาตรา) มี n_versions ฉบับ ฉบับละหนึ่งปีต่อกัน
+    (พ.ร.บ., มาตรา, จำนวนเงินส่วนแบ่งสูงสุด, ความผิด, มีผลตั้งแต่, มีผลถึง)
+    """
+    rows = []
+    for law, section, max_share, offense in synthetic_rule_rows(n_keys, seed):
+        for year in range(2000, 2000 + n_versions):
+            rows.append((law, section, max_share, offense, f"{year}-01-01", f"{year}-12-31"))
+    return rows
+
+
+def write_rule_csv(rows, path):
+    import csv
+    header = ["พ.ร.บ.", "มาตรา", "จำนวนเงินส่วนแบ่งสูงสุด", "ความผิด"]
+    if rows and len(rows[0]) > len(header):
+        header += ["มีผลตั้งแต่", "มีผลถึง"]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def synthetic_cases(rule_index, n_cases, seed=SEED):
+    """ชุดรายการค่าปรับสังเคราะห์ (dict ของ array) ที่อ้างถึงมาตราในตารางกฎ"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    keys = list(rule_index.rules)
+    picks = rng.integers(0, len(keys), n_cases)
+    return {
+        "fine_amount": rng.integers(1, 2000000, n_cases).astype(float),
+        "law": np.array([keys[i][0] for i in picks], dtype=object),
+        "section": np.array([keys[i][1] for i in picks], dtype=object),
+        "has_bounty_claimant": rng.random(n_cases) < 0.5,
+    }
+
+
+def measure(fn, items=1, min_time=0.5, min_runs=3, max_runs=100000):
+    """
+    เรียก fn ซ้ำจนครบ min_time วินาทีและอย่างน้อย min_runs ครั้ง
+    คืน latency ต่อการเรียก (p50/p99, ms) และ throughput (items ต่อวินาที)
+    """
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+
+    samples.sort()
+    total_ns = sum(samples)
+    return {
+        "runs": len(samples),
+        "items": items,
+        "p50_ms": statistics.median(samples) / 1e6,
+        "p99_ms": samples[min(len(samples) - 1, int(round(0.99 * (len(samples) - 1))))] / 1e6,
+        "throughput": items * len(samples) / (total_ns / 1e9) if total_ns else float("inf"),
+    }
+
+
+def benchmarks(rule_sizes, batch_sizes, workdir):
+    """
+    สร้างรายการ (ชื่อ, setup, items, min_time) ของทุก benchmark
+
+    setup() สร้างข้อมูลของ benchmark แล้วคืน fn ที่ใช้วัด ข้อมูลจึงถูกสร้างเฉพาะ benchmark ที่เลือก
+    ข้อมูลที่หลาย benchmark ใช้ร่วมกัน (เช่นตารางกฎ) สร้างครั้งเดียวผ่าน fixture()
+    """
+    import numpy as np
+    import pandas as pd
+
+    cases = []
+    fixtures = {}
+
+    def fixture(key, build):
+        if key not in fixtures:
+            fixtures[key] = build()
+        return fixtures[key]
+
+    def rule_table(n_rows):
+        def build():
+            path = os.path.join(workdir, f"rules_{n_rows}.csv")
+            write_rule_csv(synthetic_rule_rows(n_rows), path)
+            rule_index = load_rule_index(path)
+            return path, rule_index, rule_frame(rule_index)
+        return fixture(("rules", n_rows), build)
+
+    # ตารางกฎที่มีหลายฉบับต่อมาตรา คำนวณย้อนหลังตามวันที่กระทำความผิด
+    n_keys, n_versions = rule_sizes[0] * 10, 50
+
+    def versioned_rule_table():
+        def build():
+            path = os.path.join(workdir, f"rules_{n_keys}x{n_versions}.csv")
+            write_rule_csv(synthetic_rule_versions(n_keys, n_versions), path)
+            rule_index = load_rule_index(path)
+            return path, rule_index, rule_frame(rule_index)
+        return fixture("versioned_rules", build)
+
+    def dated_cases(rule_index, n_cases):
+        batch = synthetic_cases(rule_index, n_cases)
+        days = np.random.default_rng(SEED).integers(0, n_versions * 365, n_cases)
+        batch["offense_date"] = (np.datetime64("2000-01-01") + days).astype(str)
+        return batch
+
+    def slip_fixture():
+        def build():
+            case = dict(calculate_share(150000, "เครื่องสำอาง พ.ศ. 2558", "มาตรา 60", load_rule_index(RULES_FILE)),
+                        law="เครื่องสำอาง พ.ศ. 2558", section="มาตรา 60", offense="มาตรา 6 (1)",
+                        has_bounty_claimant=True)
+            return slip_data(case), get_template()
+        return fixture("slip", build)
+
+    for n_rows in rule_sizes:
+        def rule_keys(n_rows=n_rows):
+            _, rule_index, _ = rule_table(n_rows)
+            return list(rule_index.rules)[:1000]
+
+        n_keys_looked_up = min(n_rows, 1000)
+
+        def parse_setup(n_rows=n_rows):
+            path, _, _ = rule_table(n_rows)
+            return lambda: load_rule_index(path, use_snapshot=False)
+
+        def snapshot_setup(n_rows=n_rows):
+            path, _, _ = rule_table(n_rows)
+            return lambda: load_rule_index(path)
+
+        def has_limit_setup(n_rows=n_rows):
+            _, rule_index, _ = rule_table(n_rows)
+            keys = rule_keys(n_rows)
+            return lambda: [has_max_share_limit(law, section, rule_index) for law, section in keys]
+
+        def share_setup(n_rows=n_rows):
+            _, rule_index, _ = rule_table(n_rows)
+            keys = rule_keys(n_rows)
+            return lambda: [calculate_share(150000, law, section, rule_index) for law, section in keys]
+
+        def search_build_setup(n_rows=n_rows):
+            _, rule_index, _ = rule_table(n_rows)
+            return lambda: SearchIndex.from_rule_index(rule_index)
+
+        # คำค้นที่พิมพ์ทีละตัวอักษร ทั้งเลขมาตรา ความผิด และคำกว้างๆ ที่ตรงกับทุกแถว
+        queries = [query[:i] for query in ("มาตรา 12", "ฝ่าฝืนมาตรา 150 (3)", "วรรคสอง")
+                   for i in range(2, len(query) + 1)]
+
+        def search_setup(n_rows=n_rows):
+            _, rule_index, _ = rule_table(n_rows)
+            search_index = SearchIndex.from_rule_index(rule_index)
+            return lambda: [search_index.search(query) for query in queries]
+
+        cases.append((f"load_max_fine_data[parse,rules={n_rows}]", parse_setup, 1, 0.5))
+        cases.append((f"load_max_fine_data[snapshot,rules={n_rows}]", snapshot_setup, 1, 0.5))
+        cases.append((f"has_max_share_limit[x{n_keys_looked_up},rules={n_rows}]", has_limit_setup,
+                      n_keys_looked_up, 0.5))
+        cases.append((f"calculate_share[x{n_keys_looked_up},rules={n_rows}]", share_setup, n_keys_looked_up, 0.5))
+        cases.append((f"search_index[build,rules={n_rows}]", search_build_setup, 1, 0.5))
+        cases.append((f"search[x{len(queries)},rules={n_rows}]", search_setup, len(queries), 0.5))
+
+        for n_cases in batch_sizes:
+            # ชุดรายการใหญ่วัดเฉพาะกับตารางกฎขนาดกลางเพื่อไม่ให้ใช้เวลานานเกินไป
+            if n_cases > 10000 and n_rows != rule_sizes[len(rule_sizes) // 2]:
+                continue
+
+            def batch_setup(n_rows=n_rows, n_cases=n_cases):
+                _, rule_index, rules = rule_table(n_rows)
+                batch = synthetic_cases(rule_index, n_cases)
+                return lambda: calculate_batch(batch, rule_index, rules=rules)
+
+            cases.append((f"calculate_batch[cases={n_cases},rules={n_rows}]", batch_setup, n_cases, 1.0))
+
+    for n_cases in batch_sizes:
+        if n_cases > 10000:
+            continue
+
+        def dated_setup(n_cases=n_cases):
+            _, rule_index, rules = versioned_rule_table()
+            batch = dated_cases(rule_index, n_cases)
+            return lambda: calculate_batch(batch, rule_index, rules=rules)
+
+        cases.append((f"calculate_batch[dated,cases={n_cases},rules={n_keys}x{n_versions}]", dated_setup,
+                      n_cases, 1.0))
+
+    # กระทบยอดการชำระที่เรียงคนละลำดับกับรายการ บางรายการไม่มีเลขคดีหรือยอดไม่ตรง
+    # แบบ repeated ค่าปรับมีเพียงไม่กี่ยอด วันที่อยู่ในช่วง 5 วัน และครึ่งหนึ่งไม่มีเลขคดี
+    # (กรณีที่การจับคู่ด้วยจำนวนเงินและวันที่มีรายการที่ตรงเงื่อนไขจำนวนมาก)
+    for n_cases in batch_sizes:
+        if n_cases < 100:
+            continue
+
+        def reconcile_setup(n_cases=n_cases, repeated=False):
+            path, rule_index, rules = versioned_rule_table()
+            rng = np.random.default_rng(SEED)
+            batch = dated_cases(rule_index, n_cases)
+            batch["case_id"] = np.char.add("C", np.arange(n_cases).astype(str))
+            if repeated:
+                batch["fine_amount"] = rng.choice([1000.0, 2000.0, 5000.0], n_cases)
+                batch["offense_date"] = (np.datetime64("2020-01-01") + rng.integers(0, 5, n_cases)).astype(str)
+            name = f"{n_cases}_repeated" if repeated else str(n_cases)
+            results_path = os.path.join(workdir, f"results_{name}.csv")
+            calculate_batch(batch, rule_index, rules=rules).to_csv(results_path, index=False, encoding="utf-8-sig")
+            order = rng.permutation(n_cases)
+            payments = {
+                "case_id": batch["case_id"][order].astype(object),
+                "amount": batch["fine_amount"][order],
+                "paid_date": batch["offense_date"][order],
+            }
+            missing = n_cases // 2 if repeated else n_cases // 100
+            payments["case_id"][:missing] = None
+            payments["amount"][missing: missing + n_cases // 100] += 100
+            payments_path = os.path.join(workdir, f"payments_{name}.csv")
+            pd.DataFrame(payments).to_csv(payments_path, index=False)
+            return lambda: reconcile(payments_path, results_path, io.StringIO(), rules_path=path)
+
+        cases.append((f"reconcile[cases={n_cases}]", reconcile_setup, n_cases, 1.0))
+        cases.append((f"reconcile[repeated,cases={n_cases}]",
+                      lambda n_cases=n_cases: reconcile_setup(n_cases, repeated=True), n_cases, 1.0))
+
+    rng = random.Random(SEED)
+    amounts = [rng.randint(1, 10 ** 9) / 100 for _ in range(1000)]
+    cases.append(("convert_to_thai_text[x1000]",
+                  lambda: lambda: [convert_to_thai_text(amount) for amount in amounts], len(amounts), 0.5))
+    for n_cases in batch_sizes:
+        def thai_batch_setup(n_cases=n_cases):
+            values = np.random.default_rng(SEED).integers(1, 10 ** 9, n_cases) / 100
+            return lambda: convert_to_thai_text_batch(values)
+
+        cases.append((f"convert_to_thai_text_batch[amounts={n_cases}]", thai_batch_setup, n_cases, 1.0))
+
+    def document_setup():
+        data, _ = slip_fixture()
+        return lambda: create_word_document(data)
+
+    def template_setup():
+        data, template = slip_fixture()
+        return lambda: template.render(data)
+
+    def cache_hit_setup():
+        data, _ = slip_fixture()
+        cache = SlipCache(maxsize=1)
+        cache.get(data)
+        return lambda: cache.get(data)
+
+    def cache_miss_setup():
+        data, _ = slip_fixture()
+        cache = SlipCache(maxsize=1)
+        counter = iter(range(10 ** 9))
+        return lambda: cache.get(dict(data, fine_amount=float(next(counter))))
+
+    n_slips = 1000
+
+    def combined_setup():
+        data, template = slip_fixture()
+        combined_path = os.path.join(workdir, "combined.docx")
+        slips = [dict(data, fine_amount=float(i + 1)) for i in range(n_slips)]
+        return lambda: template.write_combined(slips, combined_path)
+
+    cases.append(("create_word_document", document_setup, 1, 1.0))
+    cases.append(("render_slip[template]", template_setup, 1, 0.5))
+    cases.append(("render_slip[cache_hit]", cache_hit_setup, 1, 0.5))
+    cases.append(("render_slip[cache_miss]", cache_miss_setup, 1, 0.5))
+    cases.append((f"render_combined[slips={n_slips}]", combined_setup, n_slips, 1.0))
+    return cases
+
+
+def run(rule_sizes, batch_sizes, only=None, out=sys.stdout):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup, items, min_time in benchmarks(rule_sizes, batch_sizes, workdir):
+            if only and not any(word in name for word in only):
+                continue
+            fn = setup()
+            fn()  # warm-up (โหลด lazy import, cache ของเทมเพลต ฯลฯ)
+            results[name] = measure(fn, items=items, min_time=min_time)
+            r = results[name]
+            print(f"{name:<58} p50 {r['p50_ms']:10.3f} ms  p99 {r['p99_ms']:10.3f} ms  "
+                  f"{r['throughput']:14,.0f} /s", file=out)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """คืนรายการ benchmark ที่ p50 ช้าลงเกิน threshold (สัดส่วน) เมื่อเทียบกับ baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or before["p50_ms"] <= 0:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        marker = "  <-- ช้าลง" if change > threshold else ""
+        print(f"{name:<58} {before['p50_ms']:10.3f} -> {result['p50_ms']:10.3f} ms  {change:+7.1%}{marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="วัดประสิทธิภาพของระบบคำนวณส่วนแบ่งเงินรางวัลนำจับ")
+    parser.add_argument("--quick", action="store_true", help="ใช้ขนาดข้อมูลเล็ก (ไม่รวม 50,000 แถวและ 1,000,000 รายการ)")
+    parser.add_argument("--only", action="append", default=None, help="วัดเฉพาะ benchmark ที่ชื่อมีคำนี้")
+    parser.add_argument("--output", default=None, help="บันทึกผลเป็นไฟล์ JSON (baseline)")
+    parser.add_argument("--compare", default=None, help="เทียบกับไฟล์ baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="สัดส่วนที่ช้าลงได้ก่อนถือว่า regression")
+    args = parser.parse_args(argv)
+
+    rule_sizes = QUICK_RULE_SIZES if args.quick else RULE_SIZES
+    batch_sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    results = run(rule_sizes, batch_sizes, only=args.only)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": platform.processor(),
+                },
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nช้าลงเกิน {args.threshold:.0%}: {len(regressions)} รายการ", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
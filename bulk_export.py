@@ -0,0 +1,230 @@
+"""
+สร้างใบสั่งชำระค่าปรับจำนวนมากแบบขนาน แล้วเขียนลงไฟล์ zip บนดิสก์ทันทีที่เสร็จ
+
+แต่ละรายการจะได้ไฟล์ .docx หนึ่งไฟล์ในรูปแบบเดียวกับ create_word_document
+(เรนเดอร์ผ่าน slip_template) เอกสารที่ยังไม่ได้เขียนลงดิสก์จะมีไม่เกิน max_in_flight ใบ
+ถ้างานหยุดกลางคัน การรันซ้ำด้วย --resume และไฟล์รายการเดิมจะข้ามรายการที่เขียนเสร็จแล้วในไฟล์ zip
+(ไม่ได้ตรวจว่าไฟล์ zip เดิมสร้างจากไฟล์รายการเดียวกัน ถ้าไม่ใช้ --resume จะเขียนไฟล์ zip ใหม่ทั้งหมด)
+
+--combined เขียนทุกใบลงไฟล์ .docx เดียว (หนึ่งใบต่อหน้า) สำหรับพิมพ์รวมครั้งเดียว
+
+การใช้งานผ่าน command line:
+    python bulk_export.py cases.csv -o slips.zip --workers 4
+    python bulk_export.py cases-2024-05-17.csv -o slips-2024-05-17.docx --combined
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+import pandas as pd
+
+from calculator import RESULT_COLUMNS, calculate_batch, read_cases
+from rules import RULES_FILE, load_rule_index
+from slip import has_amounts, slip_data
+from slip_template import get_template
+from zipstream import ZipStreamWriter
+
+
+def slip_name(index, case):
+    """ชื่อไฟล์ในไฟล์ zip ใช้ case_id ถ้ามี ไม่เช่นนั้นใช้ลำดับของรายการ"""
+    case_id = case.get("case_id")
+    if case_id is not None and case_id == case_id:
+        return f"{case_id}.docx"
+    return f"slip_{index + 1:06d}.docx"
+
+
+def _unique_name(name, seen):
+    """ชื่อไฟล์ที่ไม่ซ้ำกับ seen โดยเติม _2, _3, ... ต่อท้ายชื่อเดิม"""
+    stem, extension = os.path.splitext(name)
+    number = 2
+    while f"{stem}_{number}{extension}" in seen:
+        number += 1
+    return f"{stem}_{number}{extension}"
+
+
+def _render_chunk(chunk):
+    template = get_template()
+    return [(name, template.render(data)) for name, data in chunk]
+
+
+def _iter_cases(cases):
+    if isinstance(cases, pd.DataFrame):
+        for chunk_start in range(0, len(cases), 10000):
+            yield from cases.iloc[chunk_start:chunk_start + 10000].to_dict("records")
+    else:
+        yield from cases
+
+
+def _iter_valid(cases, on_invalid):
+    """(ลำดับ, รายการ) ที่ออกใบสั่งได้ รายการที่ค่าปรับไม่ถูกต้องส่งให้ on_invalid(ลำดับ, รายการ) แทน"""
+    for index, case in enumerate(_iter_cases(cases)):
+        if has_amounts(case):
+            yield index, case
+        elif on_invalid is not None:
+            on_invalid(index, case)
+
+
+def _iter_jobs(cases, skip, on_invalid, on_duplicate):
+    # ชื่อที่ซ้ำได้ชื่อใหม่ตามลำดับในไฟล์รายการ การรันซ้ำด้วยไฟล์เดิมจึงได้ชื่อเดิมทุกครั้ง
+    seen = set()
+    for index, case in _iter_valid(cases, on_invalid):
+        name = slip_name(index, case)
+        if name in seen:
+            name = _unique_name(name, seen)
+            if on_duplicate is not None:
+                on_duplicate(index, case, name)
+        seen.add(name)
+        if name not in skip:
+            yield name, slip_data(case)
+
+
+def export_slips(cases, archive_path, workers=None, max_in_flight=256, chunksize=16,
+                 resume=False, progress=None, on_invalid=None, on_duplicate=None):
+    """
+    สร้างใบสั่งชำระค่าปรับของทุกรายการใน cases ลงไฟล์ zip ที่ archive_path
+
+    cases เป็น DataFrame จาก calculator.calculate_batch หรือ iterable ของ dict แบบเดียวกัน
+    workers=0 จะเรนเดอร์ใน process เดียว progress(done, total) ถูกเรียกหลังเขียนแต่ละชุด
+    (total เป็น None ถ้าไม่ทราบจำนวนรายการล่วงหน้า) คืนจำนวนใบที่เขียนในการรันครั้งนี้
+
+    รายการที่ค่าปรับหรือส่วนแบ่งไม่เป็นตัวเลข (ดู slip.has_amounts) ไม่ออกใบสั่ง
+    แต่ส่งให้ on_invalid(ลำดับ, รายการ) และนับรวมใน done
+    รายการที่ชื่อไฟล์ซ้ำกับรายการก่อนหน้า (case_id ซ้ำ) ได้ชื่อใหม่ที่ต่อท้ายด้วย _2, _3, ...
+    และส่งให้ on_duplicate(ลำดับ, รายการ, ชื่อใหม่)
+
+    resume=True ทำต่อจากไฟล์ zip เดิมโดยข้ามชื่อที่เขียนแล้ว ใช้กับไฟล์รายการเดิมเท่านั้น
+    """
+    total = len(cases) if hasattr(cases, "__len__") else None
+    chunksize = max(1, min(chunksize, max_in_flight))
+    max_chunks = max(1, max_in_flight // chunksize)
+    written = 0
+    skipped = 0
+
+    def invalid(index, case):
+        nonlocal skipped
+        skipped += 1
+        if on_invalid is not None:
+            on_invalid(index, case)
+
+    with ZipStreamWriter(archive_path, resume=resume) as archive:
+        done = len(archive.names)
+        jobs = _iter_jobs(cases, set(archive.names), invalid, on_duplicate)
+
+        def write(results):
+            nonlocal done, written
+            for name, content in results:
+                archive.write(name, content)
+            archive.flush()
+            done += len(results)
+            written += len(results)
+            if progress is not None:
+                progress(done + skipped, total)
+
+        if workers == 0:
+            while True:
+                chunk = list(islice(jobs, chunksize))
+                if not chunk:
+                    break
+                write(_render_chunk(chunk))
+            return written
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                # ส่งงานเพิ่มจนกว่าจะถึงจำนวนเอกสารที่ค้างอยู่ได้สูงสุด
+                while not exhausted and len(pending) < max_chunks:
+                    chunk = list(islice(jobs, chunksize))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_render_chunk, chunk))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+
+    return written
+
+
+def export_combined(cases, document_path, progress=None, on_invalid=None):
+    """
+    เขียนใบสั่งชำระค่าปรับของทุกรายการใน cases ลงไฟล์ .docx เดียวที่ document_path
+
+    เอกสารสร้างในรอบเดียวจากเทมเพลตที่คอมไพล์แล้ว (ดู SlipTemplate.write_combined)
+    progress(done, total) ถูกเรียกหลังเขียนแต่ละใบ คืนจำนวนใบที่เขียน
+    รายการที่ออกใบสั่งไม่ได้ส่งให้ on_invalid(ลำดับ, รายการ) แบบเดียวกับ export_slips
+    """
+    total = len(cases) if hasattr(cases, "__len__") else None
+    report = None if progress is None else (lambda done: progress(done, total))
+    items = (slip_data(case) for _, case in _iter_valid(cases, on_invalid))
+    return get_template().write_combined(items, document_path, progress=report)
+
+
+def _print_progress(done, total):
+    if total:
+        sys.stderr.write(f"\r{done:,}/{total:,} ใบ ({done / total:.0%})")
+    else:
+        sys.stderr.write(f"\r{done:,} ใบ")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้างใบสั่งชำระค่าปรับทุกรายการลงไฟล์ zip")
+    parser.add_argument("cases", help="ไฟล์รายการค่าปรับ หรือผลจาก calculator.py (.csv หรือ .jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="ไฟล์ zip ปลายทาง (หรือ .docx เมื่อใช้ --combined)")
+    parser.add_argument("--rules", default=RULES_FILE, help="ไฟล์ตารางจำนวนเงินส่วนแบ่งสูงสุด")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="จำนวน process (0 = ไม่ใช้ process pool)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="จำนวนเอกสารที่ค้างในหน่วยความจำได้สูงสุด")
+    parser.add_argument("--chunksize", type=int, default=16, help="จำนวนใบที่ส่งให้แต่ละ process ต่อครั้ง")
+    parser.add_argument("--resume", action="store_true",
+                        help="ทำต่อจากไฟล์ zip เดิมที่สร้างจากไฟล์รายการเดียวกัน (ข้ามใบที่เขียนแล้ว)")
+    parser.add_argument("--combined", action="store_true", help="เขียนทุกใบลงไฟล์ .docx เดียว คั่นด้วยการขึ้นหน้าใหม่")
+    args = parser.parse_args(argv)
+
+    cases = read_cases(args.cases)
+    if not all(col in cases.columns for col in RESULT_COLUMNS):
+        cases = calculate_batch(cases, load_rule_index(args.rules))
+
+    # ลำดับแถวในไฟล์ (เริ่มที่ 1) ของรายการที่ค่าปรับไม่ถูกต้อง
+    invalid_rows = []
+
+    def on_invalid(index, case):
+        invalid_rows.append(index + 1)
+
+    # (ลำดับแถว, ชื่อไฟล์ใหม่) ของรายการที่ case_id ซ้ำกับแถวก่อนหน้า
+    renamed = []
+
+    def on_duplicate(index, case, name):
+        renamed.append((index + 1, name))
+
+    if args.combined:
+        written = export_combined(cases, args.output, progress=_print_progress, on_invalid=on_invalid)
+    else:
+        written = export_slips(
+            cases, args.output,
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            chunksize=args.chunksize,
+            resume=args.resume,
+            progress=_print_progress,
+            on_invalid=on_invalid,
+            on_duplicate=on_duplicate,
+        )
+    sys.stderr.write(f"\nเขียนใบสั่งชำระค่าปรับ {written:,} ใบลง {args.output}\n")
+    if invalid_rows:
+        shown = ", ".join(str(row) for row in invalid_rows[:20])
+        more = " ..." if len(invalid_rows) > 20 else ""
+        sys.stderr.write(f"ข้าม {len(invalid_rows):,} รายการที่ค่าปรับหรือวันที่ไม่ถูกต้อง (แถวที่ {shown}{more})\n")
+    if renamed:
+        shown = ", ".join(f"แถวที่ {row} -> {name}" for row, name in renamed[:20])
+        more = " ..." if len(renamed) > 20 else ""
+        sys.stderr.write(f"case_id ซ้ำ {len(renamed):,} รายการ ตั้งชื่อไฟล์ใหม่ ({shown}{more})\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
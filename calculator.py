@@ -0,0 +1,282 @@
+"""
+เครื่องคำนวณส่วนแบ่งเงินรางวัลนำจับ (ไม่ขึ้นกับ Streamlit)
+
+คำนวณส่วนแบ่ง 60% ของค่าปรับ ตัดไม่ให้เกินจำนวนเงินส่วนแบ่งสูงสุดตามมาตรา
+แล้วแบ่งเป็น 3 ส่วน (25% / 50% / 25%) ได้ทั้งทีละรายการและแบบ batch
+การคำนวณทำเป็นจำนวนเต็มหน่วยสตางค์ (ดู money.py) ทั้ง 3 ส่วนจึงรวมกันเท่ากับส่วนแบ่งที่ใช้จริงพอดี
+
+การใช้งานผ่าน command line:
+    python calculator.py cases.csv -o results.csv
+    python calculator.py cases.jsonl -o results.jsonl --rules max_fine_shares.csv
+
+ไฟล์รายการต้องมีคอลัมน์ fine_amount, law, section และ has_bounty_claimant (ไม่บังคับ)
+ถ้ามีคอลัมน์ offense_date (YYYY-MM-DD) จะใช้จำนวนเงินส่วนแบ่งสูงสุดฉบับที่มีผลในวันที่กระทำความผิด
+"""
+import argparse
+import sys
+
+# numpy และ pandas ถูก import ภายในฟังก์ชันแบบ batch เท่านั้น
+# calculate_share (ที่หน้าเว็บใช้) จึงไม่ต้องโหลด pandas
+from money import MAX_SATANG, share_breakdown, share_breakdown_array, to_satang, to_satang_array
+from rules import (
+    BUDDHIST_YEAR, MAX_DAY, MIN_DAY, RULES_FILE, UNSPECIFIED_SECTIONS, day_number, has_max_share_limit, load_rule_index, today,
+)
+
+# ส่วนแบ่งที่คำนวณได้คือ 60% ของค่าปรับ
+SHARE_RATE = 0.6
+
+# สินบนนำจับ 25%, เงินรางวัล 50%, ค่าใช้จ่ายในการดำเนินงาน 25%
+SPLIT_RATES = (0.25, 0.50, 0.25)
+
+CASE_COLUMNS = ["fine_amount", "law", "section", "has_bounty_claimant"]
+
+# คอลัมน์วันที่กระทำความผิด (ไม่บังคับ ค่าว่างใช้วันนี้)
+DATE_COLUMN = "offense_date"
+
+RESULT_COLUMNS = [
+    "has_limit", "max_share", "calculated_share", "actual_share",
+    "share1", "share2", "share3", "offense",
+]
+
+_TRUE_STRINGS = {"1", "true", "t", "yes", "y", "มี"}
+
+
+def calculate_share(fine_amount, law, section, rule_index, on=None):
+    """
+    คำนวณส่วนแบ่งของค่าปรับหนึ่งรายการ ตามกฎฉบับที่มีผลในวันที่กระทำความผิด on (ค่าเริ่มต้นคือวันนี้)
+
+    ถ้ามาตราไม่มีจำนวนเงินส่วนแบ่งสูงสุด max_share จะเป็น float('inf')
+    จำนวนเงินที่คืนเป็นบาท (float) ที่แปลงจากผลการคำนวณหน่วยสตางค์
+    """
+    has_limit, max_share = has_max_share_limit(law, section, rule_index, on)
+    if not has_limit:
+        # If no maximum share limit, use the calculated share directly
+        max_share = float('inf')
+
+    calculated, actual, shares = share_breakdown(
+        to_satang(fine_amount), to_satang(max_share) if has_limit else None, SHARE_RATE, SPLIT_RATES)
+
+    return {
+        "fine_amount": fine_amount,
+        "has_limit": has_limit,
+        "max_share": max_share,
+        "calculated_share": calculated / 100,
+        "actual_share": actual / 100,
+        "share1": shares[0] / 100,
+        "share2": shares[1] / 100,
+        "share3": shares[2] / 100,
+    }
+
+
+def rule_frame(rule_index):
+    """
+    แปลง RuleIndex เป็น DataFrame (key_id, law, section, start, end, max_share, offense) สำหรับ join
+
+    หนึ่งแถวต่อหนึ่งฉบับ เรียงตาม (key_id, start) กฎที่ไม่มีช่วงวันที่มีผลจะมี start/end
+    เป็น MIN_DAY/MAX_DAY
+    """
+    import numpy as np
+    import pandas as pd
+
+    rows = []
+    for key_id, (key, rule) in enumerate(rule_index.rules.items()):
+        key_versions = rule_index.versions.get(key)
+        if key_versions is None:
+            rows.append((key_id, *key, MIN_DAY, MAX_DAY, rule))
+        else:
+            rows.extend((key_id, *key, start, end, version)
+                        for start, end, version in zip(key_versions.starts, key_versions.ends, key_versions.rules))
+
+    return pd.DataFrame({
+        "key_id": np.array([row[0] for row in rows], dtype=np.int64),
+        "law": [row[1] for row in rows],
+        "section": [row[2] for row in rows],
+        "start": np.array([row[3] for row in rows], dtype=np.int64),
+        "end": np.array([row[4] for row in rows], dtype=np.int64),
+        "max_share": np.array([row[5].max_share if row[5].has_limit else np.nan for row in rows], dtype=float),
+        "offense": [row[5].offense for row in rows],
+    })
+
+
+def offense_days(values):
+    """
+    แปลงวันที่กระทำความผิดเป็นจำนวนวันนับจาก 1970-01-01 คืน (days, valid)
+
+    แปลงเฉพาะค่าที่ไม่ซ้ำ ค่าว่างใช้วันนี้ ค่าที่ไม่ใช่วันที่จะได้ valid เป็น False
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values)
+    # ช่องสุดท้ายสำหรับค่าว่าง (code -1)
+    days = np.full(len(uniques) + 1, today(), dtype=np.int64)
+    valid = np.ones(len(uniques) + 1, dtype=bool)
+    if not len(uniques):
+        return days[codes], valid[codes]
+
+    if isinstance(uniques, pd.DatetimeIndex):
+        parsed = uniques
+    else:
+        parsed = pd.to_datetime(pd.Index(uniques).astype(str).str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    converted = ~parsed.isna() & (parsed.year <= BUDDHIST_YEAR)
+    days[:-1][converted] = parsed[converted].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    # ปี พ.ศ. และค่าที่ pandas แปลงไม่ได้ ใช้ day_number ทีละค่า
+    for i in np.flatnonzero(~converted):
+        value = uniques[i]
+        try:
+            day = day_number(value)
+        except ValueError:
+            valid[i] = False
+            continue
+        if day is not None:
+            days[i] = day
+    return days[codes], valid[codes]
+
+
+def _match_versions(key_ids, days, rules):
+    """
+    ตำแหน่งแถวใน rules ของฉบับที่มีผลในวันที่ days ของแต่ละ key_id (-1 ถ้าไม่มี)
+
+    ใช้ binary search บน (key_id, start) ครั้งเดียวทั้ง batch
+    """
+    import numpy as np
+
+    if rules.empty:
+        return np.full(len(key_ids), -1)
+    rule_keys = rules["key_id"].to_numpy(dtype=np.int64)
+    ends = rules["end"].to_numpy(dtype=np.int64)
+    # start - MIN_DAY อยู่ในช่วง 32 bit จึงรวม key_id กับวันที่เป็น int64 ค่าเดียวที่เรียงตามลำดับเดิม
+    combined = (rule_keys << 32) | (rules["start"].to_numpy(dtype=np.int64) - MIN_DAY)
+    positions = np.searchsorted(combined, (key_ids << 32) | (days - MIN_DAY), side="right") - 1
+    safe = np.maximum(positions, 0)
+    found = (key_ids >= 0) & (positions >= 0) & (rule_keys[safe] == key_ids) & (days <= ends[safe])
+    return np.where(found, positions, -1)
+
+
+def _as_bool(values):
+    import pandas as pd
+
+    if pd.api.types.is_bool_dtype(values):
+        return values.fillna(False).astype(bool)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.fillna(0).astype(bool)
+    return values.map(lambda v: pd.notna(v) and str(v).strip().lower() in _TRUE_STRINGS).astype(bool)
+
+
+def calculate_batch(cases, rule_index, rules=None, date_column=DATE_COLUMN):
+    """
+    คำนวณส่วนแบ่งของหลายรายการพร้อมกันในครั้งเดียว
+
+    cases เป็น DataFrame หรือ dict ของ array ที่มี fine_amount, law, section
+    และ has_bounty_claimant (ไม่บังคับ) คืน DataFrame ของ cases พร้อมคอลัมน์ผลลัพธ์
+    rules คือผลของ rule_frame(rule_index) ที่คำนวณไว้แล้ว (ถ้ามี)
+
+    ถ้ามีคอลัมน์ date_column จะใช้กฎฉบับที่มีผลในวันที่นั้น (ค่าว่างใช้วันนี้)
+    แถวที่วันที่ไม่ถูกต้องจะได้ผลเป็น NaN เหมือนแถวที่ค่าปรับไม่ใช่ตัวเลขหรือเกิน money.MAX_SATANG สตางค์
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not isinstance(cases, pd.DataFrame):
+        cases = pd.DataFrame(cases)
+
+    missing = [col for col in CASE_COLUMNS[:3] if col not in cases.columns]
+    if missing:
+        raise ValueError(f"ไม่พบคอลัมน์ที่ต้องใช้: {', '.join(missing)}")
+
+    if rules is None:
+        rules = rule_frame(rule_index)
+
+    result = cases.copy()
+    if "has_bounty_claimant" in result.columns:
+        result["has_bounty_claimant"] = _as_bool(result["has_bounty_claimant"])
+    else:
+        result["has_bounty_claimant"] = False
+
+    # มาตราที่ว่าง / "ไม่ระบุ" / "มาตรา อื่นๆ" ถือว่าไม่มีจำนวนเงินส่วนแบ่งสูงสุด
+    sections = cases["section"].astype(object).where(cases["section"].notna(), None)
+    unspecified = sections.isna().to_numpy() | sections.isin(UNSPECIFIED_SECTIONS).to_numpy()
+
+    # join กับ key ของตารางกฎ (key ไม่ซ้ำ จึงได้จำนวนแถวเท่าเดิมและลำดับเดิม)
+    # แล้วเลือกฉบับตามวันที่กระทำความผิด
+    keys = pd.DataFrame({"law": cases["law"].to_numpy(), "section": sections.to_numpy()})
+    rule_keys = rules.drop_duplicates("key_id")[["law", "section", "key_id"]]
+    key_ids = keys.merge(rule_keys, on=["law", "section"], how="left", sort=False)["key_id"]
+    key_ids = key_ids.fillna(-1).to_numpy(dtype=np.int64)
+
+    if date_column in cases.columns:
+        days, date_valid = offense_days(cases[date_column])
+    else:
+        days = np.full(len(cases), today(), dtype=np.int64)
+        date_valid = np.ones(len(cases), dtype=bool)
+    positions = _match_versions(key_ids, days, rules)
+
+    # ต่อท้ายค่าสำหรับแถวที่ไม่พบกฎ (ตำแหน่ง -1)
+    max_share = np.append(rules["max_share"].to_numpy(dtype=float), np.nan)[positions]
+    max_share[unspecified] = np.nan
+    has_limit = ~np.isnan(max_share)
+    max_share[~has_limit] = np.inf
+
+    # คำนวณเป็นสตางค์ แถวที่ค่าปรับไม่ใช่ตัวเลขหรือเกินช่วงที่คำนวณได้แม่นยำจะได้ผลเป็น NaN
+    fine_amount = pd.to_numeric(cases["fine_amount"], errors="coerce").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(fine_amount) & (np.abs(fine_amount) * 100 <= MAX_SATANG) & date_valid
+    calculated, actual, shares = share_breakdown_array(
+        to_satang_array(np.where(valid, fine_amount, 0)),
+        to_satang_array(np.where(has_limit, max_share, 0)),
+        has_limit, SHARE_RATE, SPLIT_RATES)
+
+    def baht(satang):
+        return np.where(valid, satang / 100, np.nan)
+
+    offense = np.append(rules["offense"].to_numpy(dtype=object), "")[positions]
+    offense[unspecified | pd.isna(offense)] = ""
+
+    result["has_limit"] = has_limit
+    result["max_share"] = max_share
+    result["calculated_share"] = baht(calculated)
+    result["actual_share"] = baht(actual)
+    result["share1"] = baht(shares[:, 0])
+    result["share2"] = baht(shares[:, 1])
+    result["share3"] = baht(shares[:, 2])
+    result["offense"] = offense
+    return result
+
+
+def _is_jsonl(path):
+    return path.endswith(".jsonl") or path.endswith(".json")
+
+
+def read_cases(path):
+    import pandas as pd
+
+    if _is_jsonl(path):
+        return pd.read_json(path, lines=True, dtype={"section": str, "law": str})
+    return pd.read_csv(path, encoding="utf-8-sig", dtype={"section": str, "law": str})
+
+
+def write_results(df, path):
+    if path is None or path == "-":
+        df.to_csv(sys.stdout, index=False)
+    elif _is_jsonl(path):
+        df.to_json(path, orient="records", lines=True, force_ascii=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="คำนวณส่วนแบ่งเงินรางวัลนำจับจากไฟล์รายการค่าปรับ (CSV/JSONL)")
+    parser.add_argument("cases", help="ไฟล์รายการค่าปรับ (.csv หรือ .jsonl)")
+    parser.add_argument("-o", "--output", default=None, help="ไฟล์ผลลัพธ์ (.csv หรือ .jsonl) ค่าเริ่มต้นคือ stdout")
+    parser.add_argument("--rules", default=RULES_FILE, help="ไฟล์ตารางจำนวนเงินส่วนแบ่งสูงสุด")
+    args = parser.parse_args(argv)
+
+    rule_index = load_rule_index(args.rules)
+    results = calculate_batch(read_cases(args.cases), rule_index)
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
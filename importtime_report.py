@@ -0,0 +1,127 @@
+"""
+รายงานเวลา import ของโมดูลในโปรเจกต์นี้ (คล้าย python -X importtime แต่แสดงเฉพาะโมดูลของแอป)
+
+แสดงเวลา import สะสมของแต่ละโมดูลในโปรเจกต์ และ package ภายนอกที่แต่ละโมดูลดึงเข้ามา
+พร้อมตรวจว่ามี package ที่ควรโหลดแบบ lazy ถูก import ตั้งแต่เริ่มโปรแกรมหรือไม่
+
+การใช้งาน:
+    python importtime_report.py                      # โมดูล app
+    python importtime_report.py calculator rules     # โมดูลอื่น
+    python importtime_report.py --forbid pandas,docx,lxml   # exit 1 ถ้าถูก import
+    python importtime_report.py --json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# package ที่ใช้เฉพาะตอนสร้างเอกสารหรือคำนวณแบบ batch ไม่ควรถูก import ตอนเริ่มแอป
+DEFAULT_FORBIDDEN = ("pandas", "numpy", "docx", "lxml")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def project_modules():
+    return {name[:-3] for name in os.listdir(PROJECT_DIR) if name.endswith(".py")}
+
+
+def measure(module):
+    """
+    import module ใน process ใหม่ด้วย -X importtime แล้วคืนรายการ
+    (ชื่อโมดูล, ระดับความลึก, self_us, cumulative_us) ตามลำดับที่ Python รายงาน
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} ไม่สำเร็จ:\n{proc.stderr}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def build_report(module):
+    """
+    สรุปเวลา import ของโมดูลในโปรเจกต์ และ package ภายนอกระดับบนสุดที่แต่ละโมดูล import โดยตรง
+    """
+    own = project_modules()
+    entries = measure(module)
+
+    # -X importtime พิมพ์ลูกก่อนแม่ จึงหา parent ได้จากรายการถัดไปที่ตื้นกว่า
+    parents = [None] * len(entries)
+    stack = []
+    for i in range(len(entries) - 1, -1, -1):
+        depth = entries[i][1]
+        while stack and entries[stack[-1]][1] >= depth:
+            stack.pop()
+        parents[i] = stack[-1] if stack else None
+        stack.append(i)
+
+    modules = {}
+    for name, depth, self_us, cumulative_us in entries:
+        if name in own:
+            modules[name] = {"self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000, "imports": {}}
+
+    for i, (name, depth, self_us, cumulative_us) in enumerate(entries):
+        parent = parents[i]
+        if name in own or parent is None or entries[parent][0] not in own:
+            continue
+        top_level = name.split(".")[0]
+        imports = modules[entries[parent][0]]["imports"]
+        imports[top_level] = imports.get(top_level, 0) + cumulative_us / 1000
+
+    return {
+        "module": module,
+        "total_ms": next((cumulative_us for name, depth, _, cumulative_us in entries
+                          if name == module and depth == 0), 0) / 1000,
+        "modules": modules,
+        "loaded": sorted({name.split(".")[0] for name, _, _, _ in entries}),
+    }
+
+
+def print_report(report):
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms")
+    for name, info in sorted(report["modules"].items(), key=lambda item: -item[1]["cumulative_ms"]):
+        print(f"  {name:<20} {info['cumulative_ms']:8.1f} ms  (self {info['self_ms']:.1f} ms)")
+        for package, ms in sorted(info["imports"].items(), key=lambda item: -item[1]):
+            print(f"      {package:<16} {ms:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="รายงานเวลา import ของโมดูลในโปรเจกต์")
+    parser.add_argument("modules", nargs="*", default=["app"], help="โมดูลที่ต้องการวัด (ค่าเริ่มต้น app)")
+    parser.add_argument("--forbid", default=None,
+                        help=f"package ที่ต้องไม่ถูก import คั่นด้วย , (เช่น {','.join(DEFAULT_FORBIDDEN)})")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args(argv)
+
+    forbidden = [name for name in args.forbid.split(",") if name] if args.forbid else []
+    reports = [build_report(module) for module in args.modules]
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+
+    status = 0
+    for report in reports:
+        loaded = [name for name in forbidden if name in report["loaded"]]
+        if loaded:
+            print(f"import {report['module']} โหลด {', '.join(loaded)} ตั้งแต่เริ่มต้น", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
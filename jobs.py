@@ -0,0 +1,183 @@
+"""
+งานเบื้องหลังที่คำนวณส่วนแบ่งและสร้างใบสั่งชำระค่าปรับจากไฟล์ CSV ที่อัปโหลด (ไม่ขึ้นกับ Streamlit)
+
+แต่ละงานมีโฟลเดอร์ของตัวเองใน JOBS_DIR (ตาม REWARD_CAL_JOBS):
+    cases.csv     ไฟล์ที่อัปโหลด
+    results.csv   ผลการคำนวณ (เขียนแบบ atomic ครั้งเดียวเมื่อคำนวณทั้งไฟล์เสร็จ)
+    slips.zip     ใบสั่งชำระค่าปรับ เขียนต่อท้ายทีละชุดด้วย bulk_export.export_slips
+    job.json      สถานะของงาน
+
+ใบสั่งที่เขียนลง slips.zip สมบูรณ์แล้วคือ checkpoint ของงาน งานที่ยังไม่เสร็จเมื่อ process หยุด
+จะถูกส่งเข้าคิวใหม่เมื่อสร้าง JobManager ครั้งถัดไปและทำต่อจากใบสุดท้ายที่เขียนสมบูรณ์
+ทุกงานของทุก session ใช้ thread pool ชุดเดียวที่จำกัดจำนวน worker
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from calculator import calculate_batch, read_cases
+from rules import RULES_FILE, load_rule_index
+
+JOBS_DIR = os.environ.get("REWARD_CAL_JOBS", "jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+CASES_FILE = "cases.csv"
+RESULTS_FILE = "results.csv"
+SLIPS_FILE = "slips.zip"
+STATE_FILE = "job.json"
+
+# เขียน job.json ระหว่างสร้างใบสั่งไม่บ่อยกว่านี้ (วินาที) สถานะในหน่วยความจำอัปเดตทุกชุด
+STATE_INTERVAL = 1.0
+
+# จำนวนแถวที่ค่าปรับไม่ถูกต้องที่เก็บเลขแถวไว้ในสถานะของงาน
+MAX_INVALID_ROWS = 100
+
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class JobManager:
+    """
+    คิวของงานใน directory ที่ทำงานด้วย thread pool ขนาด max_workers ใช้ร่วมกันได้หลาย thread
+
+    submit() คืน job id ที่ใช้กับ status() และ path() ได้ แม้หลังเริ่ม process ใหม่
+    """
+
+    def __init__(self, directory=JOBS_DIR, max_workers=2, rules_path=RULES_FILE):
+        self.directory = directory
+        self.rules_path = rules_path
+        self._lock = threading.Lock()
+        self._states = {}
+        self._saved_at = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reward-cal-job")
+        os.makedirs(directory, exist_ok=True)
+
+        # ทำงานที่ค้างจากการรันครั้งก่อนต่อ
+        for job_id in sorted(os.listdir(directory)):
+            state = self._load_state(job_id)
+            if state is not None and state["status"] in (QUEUED, RUNNING):
+                self._states[job_id] = state
+                self._submit(job_id)
+
+    def close(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def path(self, job_id, filename):
+        return os.path.join(self.directory, job_id, filename)
+
+    def _load_state(self, job_id):
+        try:
+            with open(self.path(job_id, STATE_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _update(self, job_id, save=True, **changes):
+        with self._lock:
+            state = dict(self._states[job_id], **changes)
+            self._states[job_id] = state
+            now = time.monotonic()
+            if not save and now - self._saved_at.get(job_id, 0) < STATE_INTERVAL:
+                return
+            self._saved_at[job_id] = now
+            payload = json.dumps(state, ensure_ascii=False).encode("utf-8")
+            _write_atomic(self.path(job_id, STATE_FILE), lambda f: f.write(payload))
+
+    def submit(self, data, filename="cases.csv"):
+        """เริ่มงานใหม่จาก bytes ของไฟล์ CSV คืน job id"""
+        job_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.directory, job_id))
+        _write_atomic(self.path(job_id, CASES_FILE), lambda f: f.write(data))
+        with self._lock:
+            self._states[job_id] = {
+                "id": job_id,
+                "filename": filename,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "status": QUEUED,
+                "total": None,
+                "done": 0,
+                "invalid": 0,
+                "invalid_rows": [],
+                "error": None,
+            }
+        self._update(job_id)
+        self._submit(job_id)
+        return job_id
+
+    def retry(self, job_id):
+        """ส่งงานที่ล้มเหลวเข้าคิวใหม่ (ทำต่อจาก checkpoint)"""
+        state = self.status(job_id)
+        if state is None or state["status"] != FAILED:
+            return False
+        with self._lock:
+            self._states[job_id] = state
+        self._update(job_id, status=QUEUED, error=None)
+        self._submit(job_id)
+        return True
+
+    def status(self, job_id):
+        """สถานะของงาน (dict) หรือ None ถ้าไม่พบ"""
+        with self._lock:
+            state = self._states.get(job_id)
+        if state is not None:
+            return dict(state)
+        # job id มาจาก URL จึงตรวจก่อนใช้เป็นชื่อโฟลเดอร์
+        if not job_id or os.path.basename(job_id) != job_id or job_id.startswith("."):
+            return None
+        return self._load_state(job_id)
+
+    def _submit(self, job_id):
+        self._pool.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        # bulk_export import pandas ตอนโหลดโมดูล จึง import เมื่อเริ่มงานแรก
+        from bulk_export import export_slips
+
+        try:
+            self._update(job_id, status=RUNNING)
+            results = self._calculate(job_id)
+            total = len(results)
+            self._update(job_id, total=total)
+            # แถวที่ค่าปรับหรือวันที่ไม่ถูกต้องไม่ออกใบสั่ง (ผลใน results.csv เป็นค่าว่าง) และรายงานในสถานะ
+            invalid_rows = []
+
+            def on_invalid(index, case):
+                invalid_rows.append(index + 1)
+
+            export_slips(
+                results, self.path(job_id, SLIPS_FILE), workers=0, resume=True,
+                progress=lambda done, _: self._update(job_id, save=False, done=done),
+                on_invalid=on_invalid,
+            )
+            self._update(job_id, status=DONE, done=total, invalid=len(invalid_rows),
+                         invalid_rows=invalid_rows[:MAX_INVALID_ROWS])
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=str(e) or type(e).__name__)
+
+    def _calculate(self, job_id):
+        import pandas as pd
+
+        results_path = self.path(job_id, RESULTS_FILE)
+        if os.path.exists(results_path):
+            return pd.read_csv(results_path, encoding="utf-8-sig", dtype={"section": str, "law": str})
+
+        results = calculate_batch(read_cases(self.path(job_id, CASES_FILE)), load_rule_index(self.rules_path))
+        _write_atomic(results_path, lambda f: results.to_csv(f, index=False, encoding="utf-8-sig"))
+        return results
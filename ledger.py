@@ -0,0 +1,443 @@
+"""
+สมุดบันทึกผลการคำนวณส่วนแบ่งเงินรางวัลนำจับ (SQLite แบบเพิ่มได้อย่างเดียว)
+
+ทุกการคำนวณถูกบันทึกเป็นหนึ่งแถวในตาราง entries (จำนวนเงินเป็นจำนวนเต็มหน่วยสตางค์)
+ตาราง entries แก้ไขหรือลบไม่ได้ (trigger จะยกเลิกคำสั่ง) และทุกแถวที่เพิ่มจะถูกรวมเข้า
+ตาราง totals ตาม (เดือน, พ.ร.บ., มาตรา) ทันทีด้วย trigger เดือนคือเดือนของวันที่กระทำความผิด
+(offense_date แบบเดียวกับ aggregate.py) รายการที่ไม่มีวันที่กระทำความผิดใช้เดือนที่บันทึก รายงานยอดรวมตาม พ.ร.บ. มาตรา
+หรือเดือนจึงอ่านจาก totals ที่มีขนาดเท่ากับจำนวนกลุ่ม ไม่ต้องสแกน entries ทั้งหมด
+การบันทึกแบบ bulk (append_frame) ปิด trigger ภายใน transaction แล้วรวมยอดของทั้งชุดเข้า
+totals ในครั้งเดียวแทน
+
+การแบ่งเงินค่าปรับหนึ่งรายการ (รวมกันเท่ากับค่าปรับพอดี):
+    รายได้แผ่นดิน   = ค่าปรับ - ส่วนแบ่งที่ใช้จริง (+ ส่วนที่ 1 ถ้าไม่มีผู้ขอรับและเป็น REVENUE_LAWS)
+    เงินรางวัล      = ส่วนที่ 2 (+ ส่วนที่ 1 ถ้าไม่มีผู้ขอรับและไม่ใช่ REVENUE_LAWS)
+    สินบนนำจับ      = ส่วนที่ 1 ถ้ามีผู้ขอรับ
+    ค่าใช้จ่าย       = ส่วนที่ 3
+
+การใช้งานผ่าน command line:
+    python ledger.py import results.csv                 # บันทึกผลจาก calculator.py
+    python ledger.py report --by law --year 2024        # ยอดรวมตาม law / section / month
+    python ledger.py revenue --year 2024                # รายได้แผ่นดินเทียบกับเงินรางวัล
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime, timedelta
+
+from calculator import DATE_COLUMN, offense_days
+from money import to_satang, to_satang_array
+from rules import day_number
+from slip import REVENUE_LAWS
+
+LEDGER_FILE = os.environ.get("REWARD_CAL_LEDGER", "ledger.sqlite3")
+
+# คอลัมน์ยอดรวมใน totals (หน่วยสตางค์ ยกเว้น entries)
+TOTAL_COLUMNS = (
+    "entries", "fine", "actual_share", "share1", "share2", "share3",
+    "bounty", "state_revenue", "reward_pool",
+)
+
+GROUPS = {"law": ("law",), "section": ("law", "section"), "month": ("month",)}
+
+_ENTRY_COLUMNS = (
+    "created_at", "month", "law", "section", "has_bounty_claimant",
+    "fine", "max_share", "calculated_share", "actual_share", "share1", "share2", "share3",
+    "bounty", "state_revenue", "reward_pool", "document_hash",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    month TEXT NOT NULL,
+    law TEXT NOT NULL,
+    section TEXT,
+    has_bounty_claimant INTEGER NOT NULL,
+    fine INTEGER NOT NULL,
+    max_share INTEGER,
+    calculated_share INTEGER NOT NULL,
+    actual_share INTEGER NOT NULL,
+    share1 INTEGER NOT NULL,
+    share2 INTEGER NOT NULL,
+    share3 INTEGER NOT NULL,
+    bounty INTEGER NOT NULL,
+    state_revenue INTEGER NOT NULL,
+    reward_pool INTEGER NOT NULL,
+    document_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_law_section ON entries (law, section);
+CREATE INDEX IF NOT EXISTS entries_month ON entries (month);
+CREATE INDEX IF NOT EXISTS entries_document_hash ON entries (document_hash) WHERE document_hash IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS totals (
+    month TEXT NOT NULL,
+    law TEXT NOT NULL,
+    section TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    fine INTEGER NOT NULL,
+    actual_share INTEGER NOT NULL,
+    share1 INTEGER NOT NULL,
+    share2 INTEGER NOT NULL,
+    share3 INTEGER NOT NULL,
+    bounty INTEGER NOT NULL,
+    state_revenue INTEGER NOT NULL,
+    reward_pool INTEGER NOT NULL,
+    PRIMARY KEY (month, law, section)
+) WITHOUT ROWID;
+
+-- bulk = 1 เฉพาะระหว่าง transaction ของ append_frame (connection อื่นจึงไม่เห็นค่านี้)
+CREATE TABLE IF NOT EXISTS ledger_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bulk INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO ledger_state VALUES (0, 0);
+
+CREATE TRIGGER IF NOT EXISTS entries_no_update BEFORE UPDATE ON entries
+BEGIN
+    SELECT RAISE(ABORT, 'ledger entries are append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS entries_no_delete BEFORE DELETE ON entries
+BEGIN
+    SELECT RAISE(ABORT, 'ledger entries are append-only');
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_totals AFTER INSERT ON entries
+WHEN (SELECT bulk FROM ledger_state) = 0
+BEGIN
+    INSERT INTO totals VALUES (
+        NEW.month, NEW.law, COALESCE(NEW.section, ''), 1, NEW.fine, NEW.actual_share,
+        NEW.share1, NEW.share2, NEW.share3, NEW.bounty, NEW.state_revenue, NEW.reward_pool
+    )
+    ON CONFLICT (month, law, section) DO UPDATE SET
+        entries = entries + 1,
+        fine = fine + excluded.fine,
+        actual_share = actual_share + excluded.actual_share,
+        share1 = share1 + excluded.share1,
+        share2 = share2 + excluded.share2,
+        share3 = share3 + excluded.share3,
+        bounty = bounty + excluded.bounty,
+        state_revenue = state_revenue + excluded.state_revenue,
+        reward_pool = reward_pool + excluded.reward_pool;
+END;
+"""
+
+
+_TOTALS_UPSERT = f"""
+INSERT INTO totals VALUES (?, ?, ?, {', '.join('?' * len(TOTAL_COLUMNS))})
+ON CONFLICT (month, law, section) DO UPDATE SET
+    {', '.join(f'{column} = {column} + excluded.{column}' for column in TOTAL_COLUMNS)}
+"""
+
+
+def document_hash(document):
+    """sha256 ของไฟล์ .docx ที่สร้าง (bytes หรือ BytesIO)"""
+    if hasattr(document, "getvalue"):
+        document = document.getvalue()
+    return hashlib.sha256(document).hexdigest()
+
+
+def distribute(fine, actual_share, share1, share2, share3, has_bounty_claimant, law):
+    """แบ่งค่าปรับ (สตางค์) เป็น (สินบนนำจับ, รายได้แผ่นดิน, เงินรางวัล) ตามใบสั่งชำระค่าปรับ"""
+    if has_bounty_claimant:
+        return share1, fine - actual_share, share2
+    if law in REVENUE_LAWS:
+        return 0, fine - actual_share + share1, share2
+    return 0, fine - actual_share, share2 + share1
+
+
+def entry_month(offense_date, created_at):
+    """เดือน ("YYYY-MM") ของวันที่กระทำความผิด หรือของ created_at ถ้าไม่มีวันที่กระทำความผิด"""
+    day = day_number(offense_date)
+    if day is None:
+        return created_at.strftime("%Y-%m")
+    return (date(1970, 1, 1) + timedelta(days=day)).strftime("%Y-%m")
+
+
+def entry_from_result(result, created_at=None, document_hash=None):
+    """
+    แปลงผลของ calculate_share (พร้อม law, section, has_bounty_claimant และ offense_date ถ้ามี)
+    เป็นแถวของ entries
+    """
+    section = result.get("section")
+    if section is not None and section != section:
+        section = None
+    has_bounty_claimant = bool(result.get("has_bounty_claimant", False))
+    amounts = [to_satang(result[key]) for key in ("fine_amount", "actual_share", "share1", "share2", "share3")]
+    max_share = to_satang(result["max_share"]) if result["has_limit"] else None
+    created_at = created_at or datetime.now()
+
+    return (
+        created_at.isoformat(sep=" ", timespec="seconds"),
+        entry_month(result.get(DATE_COLUMN), created_at),
+        result["law"],
+        section,
+        int(has_bounty_claimant),
+        amounts[0],
+        max_share,
+        to_satang(result["calculated_share"]),
+        *amounts[1:],
+        *distribute(*amounts, has_bounty_claimant, result["law"]),
+        document_hash,
+    )
+
+
+# คอลัมน์จำนวนเงินของผลจาก calculate_batch ที่บันทึกลง entries
+_FRAME_AMOUNTS = ("fine_amount", "calculated_share", "actual_share", "share1", "share2", "share3")
+
+
+class Ledger:
+    """
+    สมุดบันทึกบนไฟล์ SQLite ที่ path (":memory:" สำหรับทดสอบ) ใช้ร่วมกันได้หลาย thread
+    """
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _insert(self, rows, totals=None):
+        """
+        เพิ่มแถวใน transaction เดียว ถ้าส่ง totals (ยอดรวมของ rows ตามกลุ่ม) มาด้วย
+        จะปิด trigger แล้วรวม totals เข้าตารางโดยตรง
+        """
+        sql = f"INSERT INTO entries ({', '.join(_ENTRY_COLUMNS)}) VALUES ({', '.join('?' * len(_ENTRY_COLUMNS))})"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if totals is not None:
+                    self._conn.execute("UPDATE ledger_state SET bulk = 1")
+                self._conn.executemany(sql, rows)
+                if totals is not None:
+                    self._conn.executemany(_TOTALS_UPSERT, totals)
+                    self._conn.execute("UPDATE ledger_state SET bulk = 0")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def append(self, result, created_at=None, document_hash=None):
+        """บันทึกผลการคำนวณหนึ่งรายการ"""
+        self._insert([entry_from_result(result, created_at, document_hash)])
+
+    def append_many(self, results, created_at=None):
+        """บันทึกหลายรายการ (iterable ของ dict แบบเดียวกับ append) ใน transaction เดียว"""
+        self._insert(entry_from_result(result, created_at, result.get("document_hash")) for result in results)
+
+    def append_frame(self, df, created_at=None, chunksize=100000):
+        """
+        บันทึกผลจาก calculator.calculate_batch ทั้ง DataFrame (แปลงเป็นสตางค์แบบ vectorized)
+
+        ใช้คอลัมน์ created_at, offense_date และ document_hash ถ้ามี คืนจำนวนแถวที่บันทึก
+        แถวที่ calculate_batch คำนวณไม่ได้ (จำนวนเงินเป็น NaN) ไม่ถูกบันทึก
+        """
+        import numpy as np
+        import pandas as pd
+
+        amounts = df[list(_FRAME_AMOUNTS)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        df = df[np.isfinite(amounts).all(axis=1)]
+        default_time = created_at or datetime.now()
+        for start in range(0, len(df), chunksize):
+            chunk = df.iloc[start:start + chunksize]
+            if "created_at" in chunk.columns:
+                times = pd.to_datetime(chunk["created_at"]).fillna(pd.Timestamp(default_time))
+            else:
+                times = pd.Series(pd.Timestamp(default_time), index=chunk.index)
+            times = times.dt.strftime("%Y-%m-%d %H:%M:%S")
+
+            amounts = {key: to_satang_array(chunk[key].to_numpy(dtype=float)) for key in _FRAME_AMOUNTS}
+            has_limit = chunk["has_limit"].to_numpy(dtype=bool)
+            max_share = to_satang_array(np.where(has_limit, chunk["max_share"].to_numpy(dtype=float), 0))
+            claimant = chunk["has_bounty_claimant"].to_numpy(dtype=bool)
+            to_revenue = ~claimant & chunk["law"].isin(REVENUE_LAWS).to_numpy()
+            to_reward = ~claimant & ~to_revenue
+
+            share1 = amounts["share1"]
+            bounty = np.where(claimant, share1, 0)
+            state_revenue = amounts["fine_amount"] - amounts["actual_share"] + np.where(to_revenue, share1, 0)
+            reward_pool = amounts["share2"] + np.where(to_reward, share1, 0)
+
+            months = times.str.slice(0, 7)
+            if DATE_COLUMN in chunk.columns:
+                # แถวที่ calculate_batch คำนวณได้มีวันที่ถูกต้องหรือว่าง แถวที่วันที่ว่างใช้เดือนที่บันทึก
+                dates = chunk[DATE_COLUMN]
+                days, _ = offense_days(dates)
+                offense_months = days.astype("datetime64[D]").astype("datetime64[M]").astype(str)
+                months = months.where(dates.isna(), pd.Series(offense_months, index=chunk.index))
+            sections = chunk["section"].astype(object).where(chunk["section"].notna(), None)
+            hashes = (chunk["document_hash"].astype(object).where(chunk["document_hash"].notna(), None)
+                      if "document_hash" in chunk.columns else [None] * len(chunk))
+
+            totals = pd.DataFrame({
+                "month": months.to_numpy(),
+                "law": chunk["law"].to_numpy(),
+                "section": sections.fillna("").to_numpy(),
+                "entries": 1,
+                "fine": amounts["fine_amount"],
+                "actual_share": amounts["actual_share"],
+                "share1": share1,
+                "share2": amounts["share2"],
+                "share3": amounts["share3"],
+                "bounty": bounty,
+                "state_revenue": state_revenue,
+                "reward_pool": reward_pool,
+            }).groupby(["month", "law", "section"], sort=False).sum().reset_index()
+
+            self._insert(zip(
+                times.tolist(),
+                months.tolist(),
+                chunk["law"].tolist(),
+                sections.tolist(),
+                claimant.astype(int).tolist(),
+                amounts["fine_amount"].tolist(),
+                [int(v) if limit else None for v, limit in zip(max_share.tolist(), has_limit.tolist())],
+                amounts["calculated_share"].tolist(),
+                amounts["actual_share"].tolist(),
+                share1.tolist(),
+                amounts["share2"].tolist(),
+                amounts["share3"].tolist(),
+                bounty.tolist(),
+                state_revenue.tolist(),
+                reward_pool.tolist(),
+                list(hashes),
+            ), [tuple(row) for row in totals.itertuples(index=False)])
+        return len(df)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(entries), 0) FROM totals").fetchone()[0]
+
+    def _where(self, year=None, month=None, law=None):
+        clauses, params = [], []
+        if year is not None:
+            clauses.append("month BETWEEN ? AND ?")
+            params += [f"{int(year):04d}-01", f"{int(year):04d}-12"]
+        if month is not None:
+            clauses.append("month = ?")
+            params.append(month)
+        if law is not None:
+            clauses.append("law = ?")
+            params.append(law)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def totals(self, by="law", year=None, month=None, law=None):
+        """
+        ยอดรวม (สตางค์) ตาม by ("law", "section" หรือ "month") กรองด้วยปี ค.ศ. เดือน ("2024-05") หรือ พ.ร.บ.
+
+        คืน list ของ dict ที่มีคอลัมน์กลุ่มและ TOTAL_COLUMNS
+        """
+        if by not in GROUPS:
+            raise ValueError(f"by ต้องเป็นหนึ่งใน {', '.join(GROUPS)}")
+        keys = GROUPS[by]
+        where, params = self._where(year, month, law)
+        sums = ", ".join(f"SUM({column})" for column in TOTAL_COLUMNS)
+        sql = f"SELECT {', '.join(keys)}, {sums} FROM totals{where} GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(keys + TOTAL_COLUMNS, row)) for row in rows]
+
+    def revenue_summary(self, year=None, month=None, law=None):
+        """รายได้แผ่นดิน เงินรางวัล สินบนนำจับ และค่าใช้จ่าย (สตางค์) รวมตามเงื่อนไข"""
+        where, params = self._where(year, month, law)
+        sums = ", ".join(f"COALESCE(SUM({column}), 0)" for column in TOTAL_COLUMNS)
+        with self._lock:
+            row = self._conn.execute(f"SELECT {sums} FROM totals{where}", params).fetchone()
+        return dict(zip(TOTAL_COLUMNS, row))
+
+    def find_document(self, digest):
+        """แถวของ entries ที่สร้างเอกสารที่มี sha256 เป็น digest"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT id, {', '.join(_ENTRY_COLUMNS)} FROM entries WHERE document_hash = ? ORDER BY id", (digest,))
+            return [dict(zip(("id",) + _ENTRY_COLUMNS, row)) for row in cursor.fetchall()]
+
+    def rebuild_totals(self):
+        """สร้างตาราง totals ใหม่จาก entries ทั้งหมด (ใช้ตรวจสอบหรือกู้คืน)"""
+        columns = ", ".join(TOTAL_COLUMNS[1:])
+        sums = ", ".join(f"SUM({column})" for column in TOTAL_COLUMNS[1:])
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM totals")
+                self._conn.execute(
+                    f"INSERT INTO totals (month, law, section, entries, {columns}) "
+                    f"SELECT month, law, COALESCE(section, ''), COUNT(*), {sums} FROM entries "
+                    f"GROUP BY month, law, COALESCE(section, '')")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+
+def format_satang(satang):
+    sign = "-" if satang < 0 else ""
+    baht, satang = divmod(abs(satang), 100)
+    return f"{sign}{baht:,}.{satang:02d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สมุดบันทึกผลการคำนวณส่วนแบ่งเงินรางวัลนำจับ")
+    parser.add_argument("--ledger", default=LEDGER_FILE, help="ไฟล์ SQLite ของสมุดบันทึก")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="บันทึกรายการจากไฟล์รายการค่าปรับหรือผลจาก calculator.py")
+    import_parser.add_argument("cases", help="ไฟล์ .csv หรือ .jsonl")
+    import_parser.add_argument("--rules", default=None, help="ไฟล์ตารางกฎ (ใช้เมื่อไฟล์ยังไม่มีผลการคำนวณ)")
+
+    report_parser = commands.add_parser("report", help="ยอดรวมตาม พ.ร.บ. มาตรา หรือเดือน")
+    report_parser.add_argument("--by", choices=list(GROUPS), default="law")
+
+    revenue_parser = commands.add_parser("revenue", help="รายได้แผ่นดินเทียบกับเงินรางวัล")
+
+    for sub in (report_parser, revenue_parser):
+        sub.add_argument("--year", type=int, default=None, help="ปี ค.ศ.")
+        sub.add_argument("--month", default=None, help="เดือน (YYYY-MM)")
+        sub.add_argument("--law", default=None, help="เฉพาะ พ.ร.บ. นี้")
+    args = parser.parse_args(argv)
+
+    with Ledger(args.ledger) as ledger:
+        if args.command == "import":
+            from calculator import RESULT_COLUMNS, calculate_batch, read_cases
+            from rules import RULES_FILE, load_rule_index
+
+            cases = read_cases(args.cases)
+            if not all(col in cases.columns for col in RESULT_COLUMNS):
+                cases = calculate_batch(cases, load_rule_index(args.rules or RULES_FILE))
+            recorded = ledger.append_frame(cases)
+            print(f"บันทึก {recorded:,} รายการ")
+            if recorded < len(cases):
+                print(f"ข้าม {len(cases) - recorded:,} รายการที่ค่าปรับหรือวันที่ไม่ถูกต้อง", file=sys.stderr)
+        elif args.command == "report":
+            keys = GROUPS[args.by]
+            print("\t".join(keys + TOTAL_COLUMNS))
+            for row in ledger.totals(args.by, args.year, args.month, args.law):
+                print("\t".join([str(row[key]) for key in keys] + [str(row["entries"])]
+                                + [format_satang(row[column]) for column in TOTAL_COLUMNS[1:]]))
+        else:
+            summary = ledger.revenue_summary(args.year, args.month, args.law)
+            print(f"จำนวนรายการ\t{summary['entries']:,}")
+            for column, label in (("fine", "ค่าปรับรวม"), ("state_revenue", "รายได้แผ่นดิน"),
+                                  ("reward_pool", "เงินรางวัล"), ("bounty", "สินบนนำจับ"),
+                                  ("share3", "ค่าใช้จ่ายในการดำเนินงาน")):
+                print(f"{label}\t{format_satang(summary[column])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+ทดสอบภาระของหน้า Streamlit ด้วย AppTest ภายใน process เดียว (ไม่ต้องเปิด server หรือ browser)
+
+จำลองเจ้าหน้าที่ N คนที่เปิด session พร้อมกัน แต่ละคนทำตามขั้นตอน เปิดหน้า -> เลือกพระราชบัญญัติ
+-> เลือกบทกำหนดโทษ -> กรอกค่าปรับ -> คำนวณ -> ดาวน์โหลด ขั้นตอนของทุก session ทำสลับกันทีละขั้น
+(AppTest ใช้ runtime ร่วมกันทั้ง process จึงรันพร้อมกันหลาย thread ไม่ได้) และทุก session
+ยังเปิดค้างไว้จนจบการทดสอบเหมือนแท็บที่ยังไม่ปิด
+
+รายงาน latency (p50/p95/p99) ของแต่ละขั้นตอน RSS ที่เพิ่มขึ้นต่อ session และ RSS สูงสุดของ process
+ตัวเลขหน่วยความจำอ่านจาก /proc/self/status (Linux) ระบบอื่นรายงานได้เฉพาะค่าสูงสุด
+
+การใช้งาน (รันจากโฟลเดอร์ของแอป):
+    python loadtest.py --sessions 50
+    python loadtest.py --sessions 20 --output loadtest.json --max-growth-kb 2048
+                                                         # exit 1 ถ้าแต่ละ session ใช้หน่วยความจำเกิน 2 MiB
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+STEPS = ("open", "select_law", "select_section", "enter_fine", "calculate", "download")
+
+SEED = 20240101
+
+
+def memory_kb():
+    """(RSS ปัจจุบัน, RSS สูงสุด) ของ process หน่วย KiB (RSS ปัจจุบันเป็น None ถ้าอ่านไม่ได้)"""
+    values = {}
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("VmRSS", "VmHWM"):
+                    values[name] = int(value.split()[0])
+    except OSError:
+        pass
+    if "VmHWM" not in values:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS รายงาน ru_maxrss เป็น bytes
+        values["VmHWM"] = peak // 1024 if sys.platform == "darwin" else peak
+    return values.get("VmRSS"), values["VmHWM"]
+
+
+def _widget(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"ไม่พบ widget: {label}")
+
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def clerk(session_id, app_file=APP_FILE, timeout=30):
+    """
+    ขั้นตอนของเจ้าหน้าที่หนึ่งคน เป็น generator ที่ yield (ขั้นตอน, ms) หลังแต่ละขั้น
+    และคืน AppTest ของ session (เพื่อให้ผู้เรียกเปิด session ค้างไว้ได้)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(SEED + session_id)
+    at = AppTest.from_file(app_file, default_timeout=timeout)
+
+    def step(name, action):
+        start = time.perf_counter_ns()
+        action()
+        elapsed = (time.perf_counter_ns() - start) / 1e6
+        _check(at)
+        return name, elapsed
+
+    yield step("open", at.run)
+
+    laws = _widget(at.selectbox, "เลือกพระราชบัญญัติ")
+    law = rng.choice(laws.options[1:])
+    yield step("select_law", lambda: laws.set_value(law).run())
+
+    sections = _widget(at.selectbox, "เลือกบทกำหนดโทษ")
+    section = rng.choice(sections.options[1:])
+    yield step("select_section", lambda: sections.set_value(section).run())
+
+    fine = _widget(at.number_input, "จำนวนเงินค่าปรับ (บาท)")
+    amount = rng.randrange(100, 2000000, 100)
+    yield step("enter_fine", lambda: fine.set_value(amount).run())
+
+    yield step("calculate", lambda: _widget(at.button, "คำนวณส่วนแบ่ง").click().run())
+
+    # การกดดาวน์โหลดทำให้ script รันใหม่หนึ่งรอบ (AppTest รุ่นเก่าไม่มี DownloadButton จึงข้ามขั้นนี้)
+    downloads = at.get("download_button")
+    if not downloads:
+        raise RuntimeError("ไม่พบปุ่มดาวน์โหลดหลังคำนวณ")
+    if hasattr(downloads[0], "click"):
+        yield step("download", lambda: downloads[0].click().run())
+    return at
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run(sessions, app_file=APP_FILE, timeout=30, out=sys.stdout):
+    """รันการทดสอบ คืน dict ของผลลัพธ์ (latency ต่อขั้นตอน และหน่วยความจำ)"""
+    gc.collect()
+    rss_start, _ = memory_kb()
+
+    # session แรกโหลดตารางกฎ เทมเพลต และ cache ต่างๆ จึงไม่นับรวมกับ session ที่วัด
+    warmup = clerk(-1, app_file, timeout)
+    warm_app = None
+    try:
+        while True:
+            next(warmup)
+    except StopIteration as stop:
+        warm_app = stop.value
+    gc.collect()
+    rss_warm, _ = memory_kb()
+
+    latencies = {name: [] for name in STEPS}
+    active = [clerk(i, app_file, timeout) for i in range(sessions)]
+    apps = []
+    started = time.perf_counter()
+    while active:
+        remaining = []
+        for session in active:
+            try:
+                name, elapsed = next(session)
+            except StopIteration as stop:
+                apps.append(stop.value)
+                continue
+            latencies[name].append(elapsed)
+            remaining.append(session)
+        active = remaining
+    duration = time.perf_counter() - started
+
+    gc.collect()
+    rss_end, rss_peak = memory_kb()
+    result = {
+        "sessions": sessions,
+        "duration_s": duration,
+        "steps": {
+            name: {
+                "count": len(samples),
+                "p50_ms": percentile(samples, 0.50),
+                "p95_ms": percentile(samples, 0.95),
+                "p99_ms": percentile(samples, 0.99),
+            }
+            for name, samples in latencies.items() if samples
+        },
+        "memory_kb": {
+            "start": rss_start,
+            "after_warmup": rss_warm,
+            "end": rss_end,
+            "peak": rss_peak,
+            "growth_per_session": (rss_end - rss_warm) / sessions if rss_end is not None and sessions else None,
+        },
+    }
+    del apps, warm_app
+
+    for name, row in result["steps"].items():
+        print(f"{name:<16} n={row['count']:<6} p50 {row['p50_ms']:9.1f} ms  p95 {row['p95_ms']:9.1f} ms  "
+              f"p99 {row['p99_ms']:9.1f} ms", file=out)
+    memory = result["memory_kb"]
+    if memory["growth_per_session"] is not None:
+        print(f"RSS {memory['after_warmup'] / 1024:,.1f} MiB หลัง warm-up -> {memory['end'] / 1024:,.1f} MiB "
+              f"({memory['growth_per_session']:,.0f} KiB ต่อ session)", file=out)
+    print(f"RSS สูงสุด {memory['peak'] / 1024:,.1f} MiB  เวลารวม {duration:,.1f} วินาที "
+          f"({sessions:,} session)", file=out)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ทดสอบภาระของหน้า Streamlit ด้วย session พร้อมกันหลาย session")
+    parser.add_argument("--sessions", type=int, default=20, help="จำนวนเจ้าหน้าที่ (session) ที่เปิดพร้อมกัน")
+    parser.add_argument("--app", default=APP_FILE, help="ไฟล์ script ของ Streamlit")
+    parser.add_argument("--timeout", type=float, default=30, help="เวลาสูงสุดของการรัน script แต่ละรอบ (วินาที)")
+    parser.add_argument("--output", default=None, help="บันทึกผลเป็นไฟล์ JSON")
+    parser.add_argument("--max-growth-kb", type=float, default=None,
+                        help="RSS ที่เพิ่มต่อ session ได้สูงสุด (KiB) ถ้าเกินจะ exit 1")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # สมุดบันทึกและงานเบื้องหลังของการทดสอบแยกจากข้อมูลจริง
+        os.environ["REWARD_CAL_LEDGER"] = os.path.join(workdir, "ledger.sqlite3")
+        os.environ["REWARD_CAL_JOBS"] = os.path.join(workdir, "jobs")
+        result = run(args.sessions, args.app, args.timeout)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(result, created=datetime.now().isoformat(timespec="seconds")),
+                      f, ensure_ascii=False, indent=2)
+
+    growth = result["memory_kb"]["growth_per_session"]
+    if args.max_growth_kb is not None and growth is not None and growth > args.max_growth_kb:
+        print(f"RSS เพิ่ม {growth:,.0f} KiB ต่อ session เกิน {args.max_growth_kb:,.0f} KiB", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
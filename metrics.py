@@ -0,0 +1,234 @@
+"""
+ตัวชี้วัดการทำงานของแอป (เวลาแต่ละขั้นตอน จำนวนใบสั่ง cache hit/miss ขนาดเอกสาร)
+ในรูปแบบ Prometheus text exposition
+
+ใช้เฉพาะ standard library และเก็บค่าเป็นตัวนับในหน่วยความจำ (มี lock) จึงเปิดไว้ตลอดได้
+ส่งออกได้ 2 ทาง (กำหนดด้วย environment variable แล้วเรียก start_from_env()):
+    REWARD_CAL_METRICS_PORT=9108        เปิด http://127.0.0.1:9108/metrics
+    REWARD_CAL_METRICS_FILE=metrics.prom เขียนไฟล์ทุก REWARD_CAL_METRICS_INTERVAL วินาที (ค่าเริ่มต้น 15)
+"""
+import bisect
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGE_SECONDS = "reward_cal_stage_seconds"
+SLIPS_TOTAL = "reward_cal_slips_total"
+CACHE_TOTAL = "reward_cal_cache_total"
+DOCUMENT_BYTES = "reward_cal_document_bytes"
+
+_STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_BYTE_BUCKETS = (8192, 16384, 32768, 65536, 131072, 262144, 524288, 1048576)
+
+# ชื่อ -> (ประเภท, คำอธิบาย, buckets ของ histogram)
+METRICS = {
+    STAGE_SECONDS: ("histogram", "Time spent in each processing stage", _STAGE_BUCKETS),
+    SLIPS_TOTAL: ("counter", "Fine slips generated per law", None),
+    CACHE_TOTAL: ("counter", "Cache lookups by cache and result (hit/miss)", None),
+    DOCUMENT_BYTES: ("histogram", "Size of generated DOCX documents", _BYTE_BUCKETS),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """ที่เก็บค่าของ counter และ histogram ทั้งหมด (ใช้ร่วมกันได้หลาย thread)"""
+
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        buckets = self.metrics[name][2]
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: [list(h[0]), h[1], h[2]] for key, h in self._histograms.items()}
+        return counters, histograms
+
+    def render(self):
+        """ค่าทั้งหมดในรูปแบบ Prometheus text exposition format (version 0.0.4)"""
+        counters, histograms = self.snapshot()
+        lines = []
+        for name, (kind, help_text, buckets) in self.metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, key), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                continue
+            for (metric, key), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + [float("inf")], counts):
+                    cumulative += bucket_count
+                    le = _format_value(bound if bound == float("inf") else float(bound))
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self):
+        """สรุปเวลาแต่ละขั้นตอน: จำนวนครั้ง เวลาเฉลี่ย และ p95 โดยประมาณจาก bucket (ms)"""
+        _, histograms = self.snapshot()
+        buckets = self.metrics[STAGE_SECONDS][2]
+        rows = []
+        for (metric, key), (counts, total, count) in sorted(histograms.items()):
+            if metric != STAGE_SECONDS or not count:
+                continue
+            target = 0.95 * count
+            cumulative = 0
+            p95 = float("inf")
+            for bound, bucket_count in zip(list(buckets) + [float("inf")], counts):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    p95 = bound
+                    break
+            rows.append({
+                "stage": dict(key).get("stage", ""),
+                "count": count,
+                "mean_ms": total / count * 1000,
+                "p95_ms_le": p95 * 1000,
+            })
+        return rows
+
+    def counter_values(self, name):
+        counters, _ = self.snapshot()
+        return {key: value for (metric, key), value in counters.items() if metric == name}
+
+
+REGISTRY = Registry()
+
+
+def inc(name, labels=None, value=1):
+    REGISTRY.inc(name, labels, value)
+
+
+def observe(name, value, labels=None):
+    REGISTRY.observe(name, value, labels)
+
+
+@contextmanager
+def timed(stage):
+    """จับเวลาขั้นตอน stage ลง histogram reward_cal_stage_seconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(STAGE_SECONDS, time.perf_counter() - start, {"stage": stage})
+
+
+def cache_result(cache, hit):
+    REGISTRY.inc(CACHE_TOTAL, {"cache": cache, "result": "hit" if hit else "miss"})
+
+
+def render():
+    return REGISTRY.render()
+
+
+def dump(path):
+    """เขียนค่าทั้งหมดลงไฟล์แบบ atomic (ใช้กับ textfile collector ของ node_exporter ได้)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, addr="127.0.0.1"):
+    """เปิด endpoint /metrics ใน daemon thread แล้วคืน server"""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_file_dumper(path, interval=15.0):
+    """เขียนไฟล์ metrics ทุก interval วินาทีใน daemon thread"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                dump(path)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_from_env(environ=os.environ):
+    """เริ่มการส่งออกตาม REWARD_CAL_METRICS_PORT / REWARD_CAL_METRICS_FILE (ถ้ากำหนดไว้)"""
+    started = {}
+    port = environ.get("REWARD_CAL_METRICS_PORT")
+    if port:
+        addr = environ.get("REWARD_CAL_METRICS_ADDR", "127.0.0.1")
+        started["http"] = start_http_server(int(port), addr)
+    path = environ.get("REWARD_CAL_METRICS_FILE")
+    if path:
+        interval = float(environ.get("REWARD_CAL_METRICS_INTERVAL", "15"))
+        started["file"] = start_file_dumper(path, interval)
+    return started
@@ -0,0 +1,135 @@
+"""
+คำนวณจำนวนเงินแบบจำนวนเต็มหน่วยสตางค์ (ไม่มีความคลาดเคลื่อนของ float)
+
+กฎการปัดเศษ:
+    - แปลงบาทเป็นสตางค์: ปัดครึ่งขึ้นจากค่าทศนิยมที่เขียนไว้ (1.005 -> 101 สตางค์, 0.125 -> 13 สตางค์)
+      โดยตัดความคลาดเคลื่อนของ float ที่ต่ำกว่า 1e-6 สตางค์ทิ้งก่อนปัด
+    - คูณด้วยอัตรา (เช่นส่วนแบ่ง 60%): คำนวณเป็นเศษส่วนจำนวนเต็มแล้วปัดครึ่งขึ้น floor(x + 1/2)
+    - แบ่งเป็นหลายส่วน: วิธีเศษเหลือมากที่สุด (largest remainder) แต่ละส่วนได้ค่าปัดลงของสัดส่วน
+      แล้วสตางค์ที่เหลือให้ส่วนที่มีเศษมากที่สุดก่อน ถ้าเศษเท่ากันให้ส่วนที่อยู่ก่อน
+      ผลรวมของทุกส่วนจึงเท่ากับยอดที่แบ่งพอดีเสมอ และแต่ละส่วนคลาดจากสัดส่วนจริงไม่เกิน 1 สตางค์
+
+ทุกฟังก์ชันมีทั้งแบบค่าเดียว (int ของ Python ไม่ต้องใช้ NumPy) และแบบ *_array ที่ทำงานกับ
+NumPy array ของ int64 ทั้งคอลัมน์ในครั้งเดียว ซึ่งให้ผลตรงกันทุกค่า
+"""
+import math
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+from functools import lru_cache, reduce
+from numbers import Integral
+
+# float แทนจำนวนเต็มได้ตรงทุกค่าไม่เกิน 2**53 จึงรับจำนวนเงินได้ไม่เกิน 2**53 สตางค์
+MAX_SATANG = 2 ** 53
+
+
+@lru_cache(maxsize=None)
+def ratio(rate):
+    """อัตรา (เช่น 0.6) เป็นเศษส่วนจำนวนเต็ม (3, 5) ตามค่าทศนิยมที่เขียนไว้"""
+    fraction = Fraction(str(rate))
+    return fraction.numerator, fraction.denominator
+
+
+@lru_cache(maxsize=None)
+def split_weights(rates):
+    """อัตราการแบ่ง (เช่น 0.25, 0.50, 0.25) เป็นน้ำหนักจำนวนเต็ม (1, 2, 1)"""
+    fractions = [Fraction(str(rate)) for rate in rates]
+    denominator = reduce(lambda a, b: a * b // math.gcd(a, b), (f.denominator for f in fractions), 1)
+    weights = tuple(int(f * denominator) for f in fractions)
+    if sum(weights) != denominator:
+        raise ValueError(f"อัตราการแบ่ง {rates} รวมกันไม่เท่ากับ 1")
+    return weights
+
+
+def to_satang(amount):
+    """แปลงจำนวนเงิน (บาท) เป็นจำนวนเต็มหน่วยสตางค์"""
+    if isinstance(amount, Integral):
+        satang = int(amount) * 100
+    elif isinstance(amount, Decimal):
+        if not amount.is_finite():
+            raise ValueError(f"ไม่สามารถแปลงจำนวนเงิน {amount} เป็นสตางค์ได้")
+        satang = int((amount * 100).to_integral_value(ROUND_HALF_UP))
+    else:
+        amount = float(amount)
+        if not math.isfinite(amount):
+            raise ValueError(f"ไม่สามารถแปลงจำนวนเงิน {amount} เป็นสตางค์ได้")
+        satang = round(amount * 100, 6)
+    if abs(satang) > MAX_SATANG:
+        raise ValueError(f"จำนวนเงิน {amount} เกินช่วงที่คำนวณได้แม่นยำ")
+    return satang if isinstance(satang, int) else math.floor(satang + 0.5)
+
+
+def to_satang_array(amounts):
+    """แปลง array ของจำนวนเงิน (บาท) เป็น int64 หน่วยสตางค์ ด้วยกฎเดียวกับ to_satang"""
+    import numpy as np
+
+    amounts = np.asarray(amounts)
+    if amounts.dtype.kind in "iub":
+        # ตรวจก่อนคูณ 100 เพราะ int64 ล้นเงียบ ๆ (uint64 ขนาดใหญ่ก็ล้นตอนแปลงเป็น int64)
+        if amounts.size and (amounts.max() > MAX_SATANG // 100 or amounts.min() < -(MAX_SATANG // 100)):
+            raise ValueError("มีจำนวนเงินที่เกินช่วงที่คำนวณได้แม่นยำ")
+        return amounts.astype(np.int64) * 100
+    amounts = amounts.astype(float)
+    if not np.isfinite(amounts).all():
+        raise ValueError("ไม่สามารถแปลงจำนวนเงินที่เป็น NaN หรือ inf เป็นสตางค์ได้")
+    scaled = np.round(amounts * 100, 6)
+    if (np.abs(scaled) > MAX_SATANG).any():
+        raise ValueError("มีจำนวนเงินที่เกินช่วงที่คำนวณได้แม่นยำ")
+    return np.floor(scaled + 0.5).astype(np.int64)
+
+
+def apply_rate(satang, rate):
+    """satang * rate ปัดครึ่งขึ้น ใช้ได้ทั้ง int และ NumPy array ของ int64"""
+    numerator, denominator = ratio(rate)
+    return (satang * (2 * numerator) + denominator) // (2 * denominator)
+
+
+def split(total, rates):
+    """แบ่ง total (สตางค์) ตามอัตรา rates คืน list ของแต่ละส่วนที่รวมกันเท่ากับ total พอดี"""
+    weights = split_weights(rates)
+    denominator = sum(weights)
+    parts = [total * weight // denominator for weight in weights]
+    remainders = [total * weight % denominator for weight in weights]
+    order = sorted(range(len(weights)), key=lambda i: (-remainders[i], i))
+    for i in order[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+def split_array(totals, rates):
+    """split แบบ vectorized คืน int64 array ขนาด (len(totals), len(rates))"""
+    import numpy as np
+
+    weights = np.array(split_weights(rates), dtype=np.int64)
+    n_parts = len(weights)
+    totals = np.asarray(totals, dtype=np.int64)
+
+    parts, remainders = np.divmod(totals[:, None] * weights, weights.sum())
+    leftover = totals - parts.sum(axis=1)
+
+    # ลำดับที่ได้สตางค์ที่เหลือ: เศษมากก่อน ถ้าเศษเท่ากันส่วนที่อยู่ก่อนได้ก่อน
+    priority = remainders * n_parts + (n_parts - 1 - np.arange(n_parts))
+    order = np.argsort(-priority, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(np.arange(n_parts), order.shape), axis=1)
+    parts += rank < leftover[:, None]
+    return parts
+
+
+def share_breakdown(fine_satang, max_satang, share_rate, split_rates):
+    """
+    ส่วนแบ่งของค่าปรับหนึ่งรายการ (สตางค์) max_satang เป็น None ถ้าไม่มีจำนวนเงินส่วนแบ่งสูงสุด
+
+    คืน (calculated, actual, [ส่วนที่ 1, 2, 3, ...])
+    """
+    calculated = apply_rate(fine_satang, share_rate)
+    actual = calculated if max_satang is None else min(calculated, max_satang)
+    return calculated, actual, split(actual, split_rates)
+
+
+def share_breakdown_array(fine_satang, max_satang, has_limit, share_rate, split_rates):
+    """share_breakdown แบบ vectorized (max_satang ของแถวที่ has_limit เป็น False จะไม่ถูกใช้)"""
+    import numpy as np
+
+    calculated = apply_rate(np.asarray(fine_satang, dtype=np.int64), share_rate)
+    actual = np.where(has_limit, np.minimum(calculated, max_satang), calculated)
+    return calculated, actual, split_array(actual, split_rates)
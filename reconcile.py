@@ -0,0 +1,477 @@
+"""
+กระทบยอดไฟล์การชำระค่าปรับจากธนาคาร/คลัง กับรายการที่คำนวณส่วนแบ่งและออกใบสั่งชำระค่าปรับไปแล้ว
+
+1. อ่านไฟล์รายการของเรา (ผลจาก calculator.py / bulk_export.py) ทีละชุด คำนวณเพดานส่วนแบ่งใหม่ด้วย
+   calculate_batch แล้วเก็บเฉพาะคอลัมน์ที่ใช้เป็น array หน่วยสตางค์ พร้อม hash index ของ case_id
+2. อ่านไฟล์การชำระทีละชุด หา case_id ใน hash index ทั้งชุดในครั้งเดียว (hash join)
+   แล้วคำนวณส่วนแบ่งจากยอดที่ชำระจริงเทียบกับส่วนแบ่งและเพดานที่บันทึกไว้ในใบสั่ง
+3. รายการชำระที่ไม่มี case_id หรือไม่พบ case_id จะจับคู่กับรายการที่ยังไม่มีการชำระ
+   ด้วยจำนวนเงินและวันที่ที่ต่างกันไม่เกินค่าที่ยอมรับได้ (เลือกคู่ที่ใกล้ที่สุด ตามลำดับในไฟล์การชำระ)
+
+รายงานมีเฉพาะรายการที่ต้องตรวจสอบ (ดู DISCREPANCY_TYPES) หนึ่งแถวต่อหนึ่งปัญหา
+หน่วยความจำที่ใช้ขึ้นกับจำนวนรายการของเราและขนาดชุด ไม่ขึ้นกับขนาดไฟล์การชำระ
+
+การใช้งานผ่าน command line:
+    python reconcile.py payments-2024-05.csv results.csv -o discrepancies.csv
+    python reconcile.py payments.csv.gz results.csv --key ref_no --amount-column paid --date-column paid_on \\
+        --amount-tolerance 0.5 --date-tolerance 3
+"""
+import argparse
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from calculator import CASE_COLUMNS, DATE_COLUMN, SHARE_RATE, SPLIT_RATES, calculate_batch, offense_days, rule_frame
+from money import share_breakdown_array, to_satang_array
+from rules import RULES_FILE, load_rule_index
+
+CASE_KEY = "case_id"
+
+# ประเภทของปัญหาในรายงาน
+AMOUNT_MISMATCH = "amount_mismatch"        # ยอดที่ชำระไม่เท่ากับค่าปรับในใบสั่ง
+SHARE_MISMATCH = "share_mismatch"          # ส่วนแบ่งหรือเพดานในใบสั่งไม่ตรงกับที่คำนวณใหม่
+AMOUNT_DATE_MATCH = "amount_date_match"    # จับคู่ด้วยจำนวนเงินและวันที่ (ยอดตรง ควรยืนยันเลขคดี)
+DUPLICATE_PAYMENT = "duplicate_payment"    # ชำระซ้ำสำหรับรายการที่จับคู่แล้ว
+UNMATCHED_PAYMENT = "unmatched_payment"    # ไม่พบรายการที่ตรงกับการชำระ
+INVALID_PAYMENT = "invalid_payment"        # ยอดหรือวันที่ชำระอ่านไม่ได้
+UNPAID_CASE = "unpaid_case"                # ไม่พบการชำระของรายการ
+DUPLICATE_CASE = "duplicate_case"          # case_id ซ้ำในไฟล์รายการ (ใช้แถวแรก)
+INVALID_CASE = "invalid_case"              # ค่าปรับหรือวันที่กระทำความผิดอ่านไม่ได้
+
+DISCREPANCY_TYPES = (
+    AMOUNT_MISMATCH, SHARE_MISMATCH, AMOUNT_DATE_MATCH, DUPLICATE_PAYMENT, UNMATCHED_PAYMENT,
+    INVALID_PAYMENT, UNPAID_CASE, DUPLICATE_CASE, INVALID_CASE,
+)
+
+REPORT_COLUMNS = [
+    "type", "match", "case_id", "payment_row", "payment_key", "paid_amount", "paid_date",
+    "fine_amount", "expected_share", "recorded_share", "fields",
+]
+
+# ผลในใบสั่งที่ตรวจ (max_share ที่ไม่มีเพดานเก็บเป็น -1)
+RECORDED_COLUMNS = ("actual_share", "share1", "share2", "share3", "max_share")
+
+# ค่าที่บันทึกไว้แต่อ่านไม่ได้ (ไม่เท่ากับผลการคำนวณใดๆ)
+_UNREADABLE = -2
+
+
+def _is_jsonl(path):
+    if path.endswith(".gz"):
+        path = path[:-3]
+    return path.endswith(".jsonl") or path.endswith(".json")
+
+
+def read_chunks(path, chunk_rows, columns=None, text_columns=()):
+    """อ่าน CSV หรือ JSONL (รวม .gz) ทีละ DataFrame ไม่เกิน chunk_rows แถว"""
+    import pandas as pd
+
+    dtype = {column: str for column in text_columns}
+    if _is_jsonl(path):
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=dtype or True):
+            yield chunk if columns is None else chunk[[column for column in chunk.columns if column in columns]]
+    else:
+        usecols = None if columns is None else (lambda column: column in columns)
+        yield from pd.read_csv(path, encoding="utf-8-sig", chunksize=chunk_rows, usecols=usecols, dtype=dtype)
+
+
+def parse_amounts(values):
+    """จำนวนเงิน (บาท) เป็น float รองรับตัวคั่นหลักพัน ("1,234.50") ค่าที่อ่านไม่ได้เป็น NaN"""
+    import pandas as pd
+
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+
+
+def _keys(values):
+    """case key เป็นข้อความที่ตัดช่องว่าง (ค่าว่างเป็น None)"""
+    keys = values.astype(str).str.strip()
+    keys = keys.where(values.notna() & (keys != ""), None)
+    return keys.to_numpy(dtype=object)
+
+
+def _satang(amounts, missing):
+    import numpy as np
+
+    finite = np.isfinite(amounts)
+    return np.where(finite, to_satang_array(np.where(finite, amounts, 0)), missing)
+
+
+def _baht(satang):
+    import numpy as np
+
+    return np.where(satang >= 0, satang / 100, np.nan)
+
+
+class CaseTable:
+    """
+    รายการของเราที่ใช้ join เก็บเป็น array หนึ่งช่องต่อหนึ่งรายการ (จำนวนเงินเป็นสตางค์)
+
+    cap คือเพดานส่วนแบ่งที่คำนวณใหม่จากตารางกฎ (-1 = ไม่มีเพดาน)
+    recorded คือ RECORDED_COLUMNS ที่บันทึกไว้ในไฟล์ (ถ้าไฟล์ไม่มีผลการคำนวณ ใช้ผลที่คำนวณใหม่)
+    """
+
+    def __init__(self, ids, fine, cap, recorded, days, has_day):
+        import numpy as np
+        import pandas as pd
+
+        self.ids = ids
+        self.fine = fine
+        self.cap = cap
+        self.recorded = recorded
+        self.days = days
+        self.has_day = has_day
+        self.paid = np.zeros(len(ids), dtype=bool)
+        # hash index ของ case_id ที่ไม่ว่างและไม่ซ้ำ (แถวแรกของ id ที่ซ้ำ)
+        ids = pd.Series(ids)
+        self.duplicated = (ids.duplicated() & ids.notna()).to_numpy()
+        self._positions = np.flatnonzero(ids.notna().to_numpy() & ~self.duplicated & (fine >= 0))
+        self._index = pd.Index(ids.to_numpy()[self._positions])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path, rule_index, rules=None, key=CASE_KEY, date_column=DATE_COLUMN, chunk_rows=200000):
+        """อ่านไฟล์รายการทีละชุดแล้วคำนวณเพดานใหม่ด้วย calculate_batch"""
+        import numpy as np
+
+        if rules is None:
+            rules = rule_frame(rule_index)
+        columns = {key, date_column, *CASE_COLUMNS, *RECORDED_COLUMNS}
+        parts = []
+        for chunk in read_chunks(path, chunk_rows, columns, text_columns=(key, "law", "section", date_column)):
+            if key not in chunk.columns:
+                raise ValueError(f"ไม่พบคอลัมน์ {key} ในไฟล์รายการ")
+            computed = calculate_batch(chunk, rule_index, rules=rules, date_column=date_column)
+            # แถวที่ค่าปรับหรือวันที่อ่านไม่ได้จะได้ผลเป็น NaN และมีค่าปรับเป็น -1
+            valid = computed["calculated_share"].notna().to_numpy()
+            fine = np.where(valid, _satang(parse_amounts(computed["fine_amount"]), -1), -1)
+            has_limit = computed["has_limit"].to_numpy(dtype=bool)
+            cap = np.where(has_limit, _satang(np.where(has_limit, computed["max_share"].to_numpy(dtype=float), 0), -1), -1)
+
+            recorded = np.empty((len(chunk), len(RECORDED_COLUMNS)), dtype=np.int64)
+            for i, column in enumerate(RECORDED_COLUMNS):
+                source = chunk if column in chunk.columns else computed
+                values = parse_amounts(source[column])
+                recorded[:, i] = _satang(values, _UNREADABLE)
+                if column == "max_share":
+                    # ไม่มีเพดานเขียนเป็น inf ใน CSV และ null ใน JSONL
+                    recorded[~np.isfinite(values), i] = -1
+
+            if date_column in chunk.columns:
+                days, date_valid = offense_days(chunk[date_column])
+                has_day = date_valid & chunk[date_column].notna().to_numpy()
+            else:
+                days = np.zeros(len(chunk), dtype=np.int64)
+                has_day = np.zeros(len(chunk), dtype=bool)
+            parts.append((_keys(chunk[key]), fine, cap, recorded, days, has_day))
+
+        if not parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(np.zeros(0, dtype=object), empty, empty, np.zeros((0, len(RECORDED_COLUMNS)), dtype=np.int64),
+                       empty, np.zeros(0, dtype=bool))
+        return cls(*(np.concatenate(arrays) for arrays in zip(*parts)))
+
+    def lookup(self, keys):
+        """ตำแหน่งของแต่ละ key ในตาราง (-1 ถ้าไม่พบ)"""
+        import numpy as np
+
+        found = self._index.get_indexer(keys)
+        return np.where(found >= 0, self._positions[np.maximum(found, 0)], -1)
+
+
+def compare(table, positions, paid):
+    """
+    คำนวณส่วนแบ่งจากยอดที่ชำระ paid (สตางค์) ด้วยเพดานของรายการที่ positions
+    คืน (ส่วนแบ่งที่ควรได้, ยอดไม่ตรง, ผลในใบสั่งไม่ตรง, ชื่อคอลัมน์ที่ไม่ตรงของแต่ละแถว)
+    """
+    import numpy as np
+
+    cap = table.cap[positions]
+    _, actual, shares = share_breakdown_array(paid, np.maximum(cap, 0), cap >= 0, SHARE_RATE, SPLIT_RATES)
+    differs = np.column_stack([actual, shares, cap]) != table.recorded[positions]
+    share_differs = differs.any(axis=1)
+    fields = np.full(len(positions), "", dtype=object)
+    fields[share_differs] = [
+        "|".join(column for column, differ in zip(RECORDED_COLUMNS, row) if differ) for row in differs[share_differs]
+    ]
+    return actual, paid != table.fine[positions], share_differs, fields
+
+
+def _report_frame(kind, match=None, table=None, positions=None, rows=None, payment_keys=None,
+                  paid=None, paid_dates=None, expected=None, fields=None):
+    """แถวของรายงาน (ช่องที่ไม่เกี่ยวข้องเว้นว่าง)"""
+    import numpy as np
+    import pandas as pd
+
+    size = len(positions) if positions is not None else len(rows)
+    frame = pd.DataFrame({"type": kind if isinstance(kind, np.ndarray) else np.full(size, kind, dtype=object)})
+    frame["match"] = match or ""
+    if positions is not None:
+        frame["case_id"] = table.ids[positions]
+        frame["fine_amount"] = _baht(table.fine[positions])
+        frame["recorded_share"] = _baht(table.recorded[positions, 0])
+    if rows is not None:
+        frame["payment_row"] = rows
+        frame["payment_key"] = payment_keys
+        frame["paid_amount"] = paid
+        frame["paid_date"] = paid_dates
+    if expected is not None:
+        frame["expected_share"] = _baht(expected)
+    if fields is not None:
+        frame["fields"] = fields
+    return frame.reindex(columns=REPORT_COLUMNS)
+
+
+class Reconciler:
+    """
+    จับคู่การชำระกับ CaseTable ทีละชุดด้วย add_payments() แล้วจับคู่ที่เหลือด้วย finish()
+
+    ทุกเมธอดเขียนแถวของรายงานผ่าน write(DataFrame) และนับจำนวนแต่ละประเภทใน counts
+    """
+
+    def __init__(self, table, write, amount_tolerance=0, date_tolerance=3):
+        self.table = table
+        self.write = write
+        self.amount_tolerance = amount_tolerance
+        self.date_tolerance = date_tolerance
+        self.counts = Counter()
+        self._unmatched = []
+
+    def _emit(self, frame):
+        if len(frame):
+            self.counts.update(frame["type"].value_counts().to_dict())
+            self.write(frame)
+
+    def _matched(self, match, positions, rows, keys, paid, paid_dates):
+        import numpy as np
+
+        self.table.paid[positions] = True
+        self.counts[f"matched_by_{match}"] += len(positions)
+        expected, amount_differs, share_differs, fields = compare(self.table, positions, paid)
+        kind = np.where(amount_differs, AMOUNT_MISMATCH, np.where(share_differs, SHARE_MISMATCH, AMOUNT_DATE_MATCH))
+        # รายการที่จับคู่ด้วย case_id และทุกอย่างตรงกันไม่ต้องรายงาน
+        report = amount_differs | share_differs | (match != "key")
+        self._emit(_report_frame(
+            kind[report].astype(object), match, self.table, positions[report], rows[report], keys[report],
+            _baht(paid[report]), paid_dates[report], expected[report], fields[report],
+        ))
+
+    def add_payments(self, first_row, keys, amounts, dates):
+        """
+        รายการชำระหนึ่งชุด first_row คือลำดับแถวแรกของชุดในไฟล์ (เริ่มที่ 1)
+
+        keys เป็น array ของ case key (None ถ้าไม่มี) amounts เป็นบาท dates เป็นข้อความวันที่
+        """
+        import numpy as np
+        import pandas as pd
+
+        keys = np.asarray(keys, dtype=object)
+        size = len(keys)
+        self.counts["payments"] += size
+        rows = np.arange(first_row, first_row + size)
+        dates = pd.Series(dates, dtype=object)
+        days, date_valid = offense_days(dates)
+        has_day = date_valid & dates.notna().to_numpy()
+        paid_dates = dates.to_numpy(dtype=object)
+        valid = np.isfinite(amounts) & (amounts >= 0) & (date_valid | dates.isna().to_numpy())
+        paid = _satang(amounts, -1)
+
+        invalid = ~valid
+        self._emit(_report_frame(INVALID_PAYMENT, rows=rows[invalid], payment_keys=keys[invalid],
+                                 paid=amounts[invalid], paid_dates=paid_dates[invalid]))
+
+        positions = np.where(valid, self.table.lookup(keys), -1)
+        hit = positions >= 0
+        # รายการที่ชำระแล้ว (ในชุดก่อนหรือแถวก่อนหน้าในชุดนี้) เป็นการชำระซ้ำ
+        first = ~pd.Series(positions).duplicated().to_numpy()
+        duplicate = hit & (self.table.paid[np.maximum(positions, 0)] | ~first)
+        self._emit(_report_frame(
+            DUPLICATE_PAYMENT, "key", self.table, positions[duplicate], rows[duplicate], keys[duplicate],
+            amounts[duplicate], paid_dates[duplicate],
+        ))
+
+        matched = hit & ~duplicate
+        self._matched("key", positions[matched], rows[matched], keys[matched], paid[matched], paid_dates[matched])
+
+        # เก็บรายการที่ไม่พบ case key ไว้จับคู่ด้วยจำนวนเงินและวันที่เมื่ออ่านครบทุกชุด
+        rest = valid & ~hit
+        if rest.any():
+            self._unmatched.append((rows[rest], keys[rest], amounts[rest], paid_dates[rest], paid[rest],
+                                    days[rest], has_day[rest]))
+
+    def _fallback(self, paid, days, has_day):
+        """จับคู่การชำระแต่ละรายการกับรายการที่ยังไม่ได้ชำระซึ่งใกล้ที่สุด คืนตำแหน่ง (-1 ถ้าไม่พบ)"""
+        import numpy as np
+
+        table = self.table
+        candidates = np.flatnonzero(~table.paid & table.has_day & (table.fine >= 0) & ~table.duplicated)
+        # เรียงตาม (ค่าปรับ, วันที่) แต่ละยอดเงินจึงเป็นช่วงต่อเนื่องที่เรียงตามวันที่
+        candidates = candidates[np.lexsort((table.days[candidates], table.fine[candidates]))]
+        fines = table.fine[candidates]
+        dates = table.days[candidates]
+        size = len(candidates)
+        tolerance = int(round(self.amount_tolerance * 100))
+
+        # ช่วงของยอดเงินที่ยอมรับได้ของทุกรายการในครั้งเดียว
+        starts = np.searchsorted(fines, paid - tolerance, side="left")
+        stops = np.searchsorted(fines, paid + tolerance, side="right")
+        # ช่วงของแต่ละยอดเงิน (ค่าปรับเท่ากัน) ในลำดับที่เรียงแล้ว
+        bounds = np.flatnonzero(np.diff(fines)) + 1
+        group_starts = np.concatenate(([0], bounds)).tolist()
+        group_stops = np.concatenate((bounds, [size])).tolist()
+        group_of = np.searchsorted(bounds, np.arange(size), side="right").tolist()
+
+        # รายการที่จับคู่แล้วถูกข้ามด้วยตัวชี้ (union-find แบบ path compression) แทนการไล่ดูทีละช่อง
+        # next_free[j] ชี้ไปยังช่องถัดไปที่อาจยังว่าง (size = ไม่มี) prev_free[j + 1] ชี้ย้อนกลับ (0 = ไม่มี)
+        next_free = list(range(size + 1))
+        prev_free = list(range(size + 1))
+
+        def find(pointers, j):
+            root = j
+            while pointers[root] != root:
+                root = pointers[root]
+            while pointers[j] != root:
+                pointers[j], j = root, pointers[j]
+            return root
+
+        fines_list = fines.tolist()
+        dates_list = dates.tolist()
+        paid_list, days_list = paid.tolist(), days.tolist()
+        starts_list, stops_list = starts.tolist(), stops.tolist()
+        result = np.full(len(paid), -1)
+        for i in np.flatnonzero(has_day & (stops > starts)).tolist():
+            amount, day, stop = paid_list[i], days_list[i], stops_list[i]
+            best = None
+            group = group_of[starts_list[i]]
+            while group < len(group_starts) and group_starts[group] < stop:
+                group_start, group_stop = group_starts[group], group_stops[group]
+                low = bisect_left(dates_list, day - self.date_tolerance, group_start, group_stop)
+                high = bisect_right(dates_list, day + self.date_tolerance, group_start, group_stop)
+                middle = bisect_left(dates_list, day, group_start, group_stop)
+                # รายการที่ยังว่างซึ่งวันที่ใกล้ที่สุดอยู่ถัดจากหรือก่อนหน้าวันที่ชำระ
+                after = find(next_free, middle)
+                before = find(prev_free, middle) - 1
+                if before >= low:
+                    # วันที่เท่ากันให้เลือกรายการแรกที่ยังว่าง (ลำดับน้อยที่สุด)
+                    first = bisect_left(dates_list, dates_list[before], group_start, group_stop)
+                    before = find(next_free, first)
+                for j in (before, after):
+                    if low <= j < high:
+                        distance = (abs(fines_list[j] - amount), abs(dates_list[j] - day), j)
+                        if best is None or distance < best:
+                            best = distance
+                group += 1
+            if best is not None:
+                j = best[2]
+                next_free[j] = j + 1
+                prev_free[j + 1] = j
+                result[i] = candidates[j]
+        return result
+
+    def finish(self):
+        """จับคู่ด้วยจำนวนเงินและวันที่ แล้วรายงานการชำระและรายการที่ไม่มีคู่ คืน counts"""
+        import numpy as np
+
+        if self._unmatched:
+            rows, keys, amounts, paid_dates, paid, days, has_day = (
+                np.concatenate(arrays) for arrays in zip(*self._unmatched))
+            self._unmatched = []
+            positions = self._fallback(paid, days, has_day)
+            found = positions >= 0
+            self._matched("amount_date", positions[found], rows[found], keys[found], paid[found], paid_dates[found])
+            missing = ~found
+            self._emit(_report_frame(UNMATCHED_PAYMENT, rows=rows[missing], payment_keys=keys[missing],
+                                     paid=amounts[missing], paid_dates=paid_dates[missing]))
+
+        table = self.table
+        invalid = table.fine < 0
+        self._emit(_report_frame(INVALID_CASE, table=table, positions=np.flatnonzero(invalid)))
+        self._emit(_report_frame(DUPLICATE_CASE, table=table, positions=np.flatnonzero(table.duplicated)))
+        unpaid = ~table.paid & ~invalid & ~table.duplicated
+        self._emit(_report_frame(UNPAID_CASE, table=table, positions=np.flatnonzero(unpaid)))
+        self.counts["cases"] = len(table)
+        return self.counts
+
+
+def reconcile(payments_path, cases_path, out, rules_path=RULES_FILE, key=CASE_KEY, amount_column="amount",
+              date_column="paid_date", case_key=CASE_KEY, case_date_column=DATE_COLUMN,
+              amount_tolerance=0, date_tolerance=3, chunk_rows=200000, progress=None):
+    """
+    กระทบยอดไฟล์การชำระกับไฟล์รายการ เขียนรายงาน CSV ลง out (text file) คืน Counter ของจำนวนแต่ละประเภท
+
+    amount_tolerance เป็นบาท date_tolerance เป็นจำนวนวัน (ใช้เฉพาะการจับคู่ด้วยจำนวนเงินและวันที่)
+    progress(payments) ถูกเรียกหลังอ่านการชำระแต่ละชุด
+    """
+    import pandas as pd
+
+    rule_index = load_rule_index(rules_path)
+    table = CaseTable.load(cases_path, rule_index, key=case_key, date_column=case_date_column, chunk_rows=chunk_rows)
+
+    def write(frame):
+        frame.to_csv(out, header=False, index=False, float_format="%.2f")
+
+    pd.DataFrame(columns=REPORT_COLUMNS).to_csv(out, index=False)
+    reconciler = Reconciler(table, write, amount_tolerance, date_tolerance)
+    first_row = 1
+    columns = {key, amount_column, date_column}
+    for chunk in read_chunks(payments_path, chunk_rows, columns, text_columns=(key, date_column)):
+        if amount_column not in chunk.columns:
+            raise ValueError(f"ไม่พบคอลัมน์ {amount_column} ในไฟล์การชำระ")
+        keys = _keys(chunk[key]) if key in chunk.columns else [None] * len(chunk)
+        dates = chunk[date_column] if date_column in chunk.columns else [None] * len(chunk)
+        reconciler.add_payments(first_row, keys, parse_amounts(chunk[amount_column]), dates)
+        first_row += len(chunk)
+        if progress is not None:
+            progress(reconciler.counts["payments"])
+    return reconciler.finish()
+
+
+def _print_progress(payments):
+    sys.stderr.write(f"\r{payments:,} รายการชำระ")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="กระทบยอดไฟล์การชำระค่าปรับกับรายการที่คำนวณส่วนแบ่งแล้ว")
+    parser.add_argument("payments", help="ไฟล์การชำระจากธนาคาร/คลัง (.csv หรือ .jsonl รวม .gz)")
+    parser.add_argument("cases", help="ไฟล์รายการที่คำนวณแล้ว (.csv หรือ .jsonl รวม .gz)")
+    parser.add_argument("-o", "--output", default=None, help="ไฟล์รายงาน .csv (ค่าเริ่มต้นคือ stdout)")
+    parser.add_argument("--rules", default=RULES_FILE, help="ไฟล์ตารางจำนวนเงินส่วนแบ่งสูงสุด")
+    parser.add_argument("--key", default=CASE_KEY, help="คอลัมน์เลขคดีในไฟล์การชำระ")
+    parser.add_argument("--amount-column", default="amount", help="คอลัมน์ยอดที่ชำระ (บาท)")
+    parser.add_argument("--date-column", default="paid_date", help="คอลัมน์วันที่ชำระ")
+    parser.add_argument("--case-key", default=CASE_KEY, help="คอลัมน์เลขคดีในไฟล์รายการ")
+    parser.add_argument("--case-date-column", default=DATE_COLUMN,
+                        help="คอลัมน์วันที่ในไฟล์รายการ (ใช้เลือกฉบับของกฎและจับคู่ด้วยวันที่)")
+    parser.add_argument("--amount-tolerance", type=float, default=0, help="ยอดเงินที่ต่างกันได้เมื่อจับคู่โดยไม่มีเลขคดี (บาท)")
+    parser.add_argument("--date-tolerance", type=int, default=3, help="จำนวนวันที่ต่างกันได้เมื่อจับคู่โดยไม่มีเลขคดี")
+    parser.add_argument("--chunk-rows", type=int, default=200000, help="จำนวนแถวต่อชุด")
+    args = parser.parse_args(argv)
+
+    options = dict(
+        rules_path=args.rules, key=args.key, amount_column=args.amount_column, date_column=args.date_column,
+        case_key=args.case_key, case_date_column=args.case_date_column, amount_tolerance=args.amount_tolerance,
+        date_tolerance=args.date_tolerance, chunk_rows=args.chunk_rows,
+        progress=_print_progress if sys.stderr.isatty() else None,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8-sig", newline="") as f:
+            counts = reconcile(args.payments, args.cases, f, **options)
+    else:
+        counts = reconcile(args.payments, args.cases, sys.stdout, **options)
+    if sys.stderr.isatty():
+        sys.stderr.write("\n")
+
+    sys.stderr.write(
+        f"การชำระ {counts['payments']:,} รายการ รายการของเรา {counts['cases']:,} รายการ "
+        f"จับคู่ด้วยเลขคดี {counts['matched_by_key']:,} ด้วยจำนวนเงินและวันที่ {counts['matched_by_amount_date']:,}\n")
+    for kind in DISCREPANCY_TYPES:
+        if counts[kind]:
+            sys.stderr.write(f"  {kind}: {counts[kind]:,}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
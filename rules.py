@@ -0,0 +1,357 @@
+"""
+ดัชนีกฎจำนวนเงินส่วนแบ่งสูงสุดตามพระราชบัญญัติและมาตรา
+
+สร้างครั้งเดียวจากตาราง max_fine_shares.csv แล้วใช้ค้นหาแบบ O(1)
+แทนการกรอง DataFrame ทุกครั้งที่ผู้ใช้เปลี่ยนค่าในฟอร์ม
+
+แถวในตารางอาจมีช่วงวันที่มีผล (คอลัมน์ "มีผลตั้งแต่" และ "มีผลถึง" แบบ YYYY-MM-DD
+ปี ค.ศ. หรือ พ.ศ. ก็ได้ รวมวันแรกและวันสุดท้าย ว่างได้) (พ.ร.บ., มาตรา) เดียวกันจึงมีได้หลายฉบับ
+ที่ช่วงวันที่ไม่ทับกัน และค้นหาฉบับที่ใช้กับวันที่กระทำความผิดได้ด้วย binary search
+"""
+import bisect
+import codecs
+import csv
+import hashlib
+import io
+import math
+import os
+import pickle
+import tempfile
+from collections import namedtuple
+from datetime import date, datetime
+
+import metrics
+
+RULES_FILE = "max_fine_shares.csv"
+
+REQUIRED_COLUMNS = ["พ.ร.บ.", "มาตรา", "จำนวนเงินส่วนแบ่งสูงสุด"]
+
+# คอลัมน์ช่วงวันที่มีผลของแต่ละฉบับ (ไม่บังคับ)
+EFFECTIVE_FROM_COLUMN = "มีผลตั้งแต่"
+EFFECTIVE_TO_COLUMN = "มีผลถึง"
+
+# snapshot ของดัชนีกฎที่คอมไพล์แล้ว (เปลี่ยน SNAPSHOT_VERSION เมื่อโครงสร้าง RuleIndex เปลี่ยน)
+SNAPSHOT_DIR = ".rules_cache"
+SNAPSHOT_VERSION = 2
+
+# ค่าที่ถือว่าว่าง (ตรงกับค่าเริ่มต้นของ pandas.read_csv)
+_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+# มาตราที่ถือว่าไม่มีจำนวนเงินส่วนแบ่งสูงสุด
+UNSPECIFIED_SECTIONS = ("มาตรา อื่นๆ", "ไม่ระบุ", None)
+
+Rule = namedtuple("Rule", ["max_share", "has_limit", "offense"])
+
+# วันที่เก็บเป็นจำนวนวันนับจาก 1970-01-01 ช่วงที่ไม่มีกำหนดใช้ค่าต่ำสุด/สูงสุดนี้
+_EPOCH = date(1970, 1, 1).toordinal()
+MIN_DAY = -(2 ** 31)
+MAX_DAY = 2 ** 31 - 1
+
+# ปีที่มากกว่านี้ถือเป็นปี พ.ศ.
+BUDDHIST_YEAR = 2400
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def day_number(value):
+    """
+    แปลงวันที่ (date, datetime, "YYYY-MM-DD" ปี ค.ศ. หรือ พ.ศ.) เป็นจำนวนวันนับจาก 1970-01-01
+
+    คืน None ถ้าค่าว่าง ยก ValueError ถ้ารูปแบบไม่ถูกต้อง
+    """
+    # value != value จับ NaN และ pandas.NaT
+    if _is_missing(value) or value != value or value in _NA_VALUES:
+        return None
+    if isinstance(value, datetime):  # รวม pandas.Timestamp
+        value = value.date()
+    if isinstance(value, date):
+        return value.toordinal() - _EPOCH
+    text = str(value).strip()[:10]
+    try:
+        year, month, day = (int(part) for part in text.split("-"))
+        if year > BUDDHIST_YEAR:
+            year -= 543
+        return date(year, month, day).toordinal() - _EPOCH
+    except ValueError:
+        raise ValueError(f"วันที่ {value!r} ไม่ถูกต้อง (ต้องเป็น YYYY-MM-DD)") from None
+
+
+def today():
+    return date.today().toordinal() - _EPOCH
+
+
+class RuleVersions:
+    """
+    ฉบับของกฎหนึ่ง (พ.ร.บ., มาตรา) เรียงตามวันเริ่มมีผล ช่วงวันที่ไม่ทับกัน
+
+    starts / ends เป็นวันแรกและวันสุดท้ายที่มีผล (จำนวนวันนับจาก 1970-01-01)
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.rules = []
+
+    def add(self, start, end, rule):
+        """เพิ่มฉบับ คืน False ถ้าช่วงวันที่ทับกับฉบับที่มีอยู่"""
+        i = bisect.bisect_right(self.starts, start)
+        if (i > 0 and self.ends[i - 1] >= start) or (i < len(self.starts) and self.starts[i] <= end):
+            return False
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.rules.insert(i, rule)
+        return True
+
+    def lookup(self, day):
+        """ฉบับที่มีผลในวันที่ day หรือ None (O(log n))"""
+        i = bisect.bisect_right(self.starts, day) - 1
+        if i >= 0 and day <= self.ends[i]:
+            return self.rules[i]
+        return None
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def detect_encoding(raw):
+    """
+    เลือก encoding ของไฟล์จาก BOM หรือจากการถอดรหัสเป็น UTF-8
+    (ไฟล์ภาษาไทยที่ไม่ใช่ UTF-8 ถือเป็น cp874 ซึ่งครอบคลุม TIS-620)
+    """
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return "cp874"
+    return "utf-8"
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_rule_records(raw):
+    """
+    แปลง bytes ของไฟล์ CSV เป็นรายการ
+    (พ.ร.บ., มาตรา, จำนวนเงินส่วนแบ่งสูงสุด, ความผิด, มีผลตั้งแต่, มีผลถึง)
+    ด้วยโมดูล csv โดยไม่ต้องใช้ pandas ค่าว่างและค่าใน _NA_VALUES เป็น None
+
+    ยก ValueError หากอ่านไฟล์ไม่ได้หรือไม่มีคอลัมน์ที่ต้องการ
+    """
+    encoding = detect_encoding(raw)
+    try:
+        rows = csv.reader(io.StringIO(raw.decode(encoding)))
+        header = next(rows, [])
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"ไม่สามารถอ่านไฟล์ได้ ({encoding}): {e}") from e
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f"ไม่พบคอลัมน์ที่ต้องใช้ ({encoding}): {', '.join(missing)}")
+
+    law_col, section_col, max_share_col = (header.index(col) for col in REQUIRED_COLUMNS)
+    offense_col, from_col, to_col = (
+        header.index(col) if col in header else None
+        for col in ("ความผิด", EFFECTIVE_FROM_COLUMN, EFFECTIVE_TO_COLUMN)
+    )
+
+    def cell(row, col):
+        value = row[col] if col is not None and col < len(row) else ""
+        return None if value in _NA_VALUES else value
+
+    records = []
+    try:
+        for row in rows:
+            if not row:
+                continue
+            max_share = cell(row, max_share_col)
+            records.append((
+                cell(row, law_col),
+                cell(row, section_col),
+                _to_float(max_share) if max_share is not None else None,
+                cell(row, offense_col),
+                cell(row, from_col),
+                cell(row, to_col),
+            ))
+    except csv.Error as e:
+        raise ValueError(f"ไม่สามารถอ่านไฟล์ได้ ({encoding}): {e}") from e
+    return records
+
+
+class RuleIndex:
+    """
+    ดัชนีกฎที่คอมไพล์แล้ว
+
+    rules: dict ที่ใช้ (พ.ร.บ., มาตรา) เป็น key และเก็บ Rule (ฉบับที่เริ่มมีผลล่าสุด)
+    versions: dict ของ (พ.ร.บ., มาตรา) -> RuleVersions เฉพาะ key ที่มีช่วงวันที่มีผล
+    sections_by_law: dict ของ พ.ร.บ. -> รายการมาตราตามลำดับในไฟล์
+    """
+
+    def __init__(self, rules=None, sections_by_law=None, versions=None):
+        self.rules = rules if rules is not None else {}
+        self.sections_by_law = sections_by_law if sections_by_law is not None else {}
+        self.versions = versions if versions is not None else {}
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        สร้างดัชนีจาก iterable ของ (พ.ร.บ., มาตรา, จำนวนเงินส่วนแบ่งสูงสุด, ความผิด)
+        หรือ (..., มีผลตั้งแต่, มีผลถึง) มาตราที่ว่างจะถูกเก็บเป็น None
+
+        แถวที่ไม่มีวันที่ของ (พ.ร.บ., มาตรา) ที่ซ้ำกันจะใช้แถวแรก ส่วนฉบับที่มีวันที่ต้องมีช่วงที่ไม่ทับกัน
+        (ยก ValueError ถ้าทับกัน)
+        """
+        versions = {}
+        sections_by_law = {}
+        for law, section, max_share, offense, *dates in records:
+            if _is_missing(law):
+                continue
+            if _is_missing(section):
+                section = None
+            has_limit = not _is_missing(max_share)
+            rule = Rule(
+                max_share=float(max_share) if has_limit else None,
+                has_limit=has_limit,
+                offense="" if _is_missing(offense) else str(offense),
+            )
+            start, end = (day_number(value) for value in (dates + [None, None])[:2])
+            dated = start is not None or end is not None
+            start = MIN_DAY if start is None else start
+            end = MAX_DAY if end is None else end
+            if start > end:
+                raise ValueError(f"ช่วงวันที่มีผลของ {law} {section or ''} ไม่ถูกต้อง")
+
+            key = (law, section)
+            if key not in versions:
+                versions[key] = RuleVersions()
+                sections_by_law.setdefault(law, []).append(section)
+            if not versions[key].add(start, end, rule) and dated:
+                raise ValueError(f"ช่วงวันที่มีผลของ {law} {section or ''} ทับกัน")
+
+        rules = {key: key_versions.rules[-1] for key, key_versions in versions.items()}
+        versions = {key: key_versions for key, key_versions in versions.items()
+                    if key_versions.starts != [MIN_DAY] or key_versions.ends != [MAX_DAY]}
+        return cls(rules, sections_by_law, versions)
+
+    @property
+    def laws(self):
+        return list(self.sections_by_law)
+
+    def sections(self, law):
+        """รายการมาตราสำหรับแสดงผล (มาตราที่ว่างจะแสดงเป็น "ไม่ระบุ")"""
+        return [section if section is not None else "ไม่ระบุ"
+                for section in self.sections_by_law.get(law, [])]
+
+    def get(self, law, section, on=None):
+        """
+        กฎของ (พ.ร.บ., มาตรา) ที่มีผลในวันที่ on (date หรือ "YYYY-MM-DD" ค่าเริ่มต้นคือวันนี้)
+        """
+        key_versions = self.versions.get((law, section))
+        if key_versions is None:
+            return self.rules.get((law, section))
+        day = day_number(on)
+        return key_versions.lookup(today() if day is None else day)
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def snapshot_path(path):
+    """ไฟล์ snapshot ของ path อยู่ในโฟลเดอร์ .rules_cache ข้างไฟล์ CSV"""
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, SNAPSHOT_DIR, filename + ".pkl")
+
+
+def _read_snapshot(path, stat):
+    """
+    คืน (snapshot, raw) โดย snapshot เป็น None ถ้าใช้ไม่ได้
+
+    ถ้า mtime และขนาดไฟล์ตรงกับ snapshot จะไม่อ่านไฟล์ CSV เลย (raw เป็น None)
+    ถ้าไม่ตรงจะอ่านไฟล์แล้วเทียบ hash ก่อนตัดสินว่าต้อง parse ใหม่หรือไม่
+    """
+    try:
+        with open(snapshot_path(path), "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        snapshot = None
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        snapshot = None
+    elif (snapshot["mtime_ns"], snapshot["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return snapshot, None
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    if snapshot is not None and snapshot["sha256"] != hashlib.sha256(raw).hexdigest():
+        snapshot = None
+    return snapshot, raw
+
+
+def _write_snapshot(path, snapshot):
+    # เขียนแบบ atomic; ถ้าเขียนไม่ได้ (เช่นระบบไฟล์อ่านอย่างเดียว) ก็ใช้งานต่อได้ตามปกติ
+    target = snapshot_path(path)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+    except OSError:
+        pass
+
+
+def load_rule_index(path=RULES_FILE, use_snapshot=True):
+    """
+    อ่านตารางกฎจากไฟล์และคอมไพล์เป็น RuleIndex (ใช้นอก Streamlit)
+
+    ใช้ parse_rule_records จึงไม่ต้อง import pandas
+    ดัชนีที่คอมไพล์แล้วจะถูกเก็บเป็น snapshot (pickle) ที่ผูกกับ mtime และ hash ของไฟล์ CSV
+    การเริ่มโปรแกรมครั้งต่อไปจึงโหลดจาก snapshot และ parse ใหม่เฉพาะเมื่อไฟล์ CSV เปลี่ยนจริง
+    """
+    if not use_snapshot:
+        with open(path, "rb") as f:
+            return RuleIndex.from_records(parse_rule_records(f.read()))
+
+    stat = os.stat(path)
+    snapshot, raw = _read_snapshot(path, stat)
+    metrics.cache_result("rules_snapshot", snapshot is not None)
+    if snapshot is not None:
+        if raw is not None:
+            # เนื้อหาไม่เปลี่ยน มีเพียง mtime ที่เปลี่ยน
+            snapshot.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _write_snapshot(path, snapshot)
+        return snapshot["index"]
+
+    rule_index = RuleIndex.from_records(parse_rule_records(raw))
+    _write_snapshot(path, {
+        "version": SNAPSHOT_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "index": rule_index,
+    })
+    return rule_index
+
+
+def has_max_share_limit(law_name, section, rule_index, on=None):
+    """
+    ตรวจสอบว่ากฎหมายและมาตราที่ระบุมีจำนวนเงินส่วนแบ่งสูงสุดหรือไม่ (ตามฉบับที่มีผลในวันที่ on)
+    """
+    # ถ้าเป็น "มาตรา อื่นๆ" หรือ "ไม่ระบุ" หรือ None ให้ถือว่าไม่มีจำนวนเงินส่วนแบ่งสูงสุด
+    if section in UNSPECIFIED_SECTIONS:
+        return False, None
+
+    rule = rule_index.get(law_name, section, on)
+    if rule is None:
+        return False, None
+
+    return rule.has_limit, rule.max_share
@@ -0,0 +1,143 @@
+"""
+ค้นหาความผิดและมาตราจากข้อความอิสระด้วย inverted index ของ n-gram ตัวอักษร
+
+ภาษาไทยไม่เว้นวรรคระหว่างคำ จึงแบ่งข้อความเป็น bigram ของตัวอักษรแทนการตัดคำ ก่อนแบ่งจะตัดช่องว่าง
+แปลงเลขไทยเป็นเลขอารบิก และจัดลำดับสระ/วรรณยุกต์ที่พิมพ์ได้หลายแบบให้เป็นแบบเดียวกัน
+("ํา" -> "ำ", วรรณยุกต์ก่อนสระบน -> สระบนก่อนวรรณยุกต์)
+
+ดัชนีสร้างครั้งเดียวจาก RuleIndex การค้นหาเริ่มจาก posting ที่สั้นที่สุดแล้วตรวจ bigram ที่เหลือด้วย set
+จึงใช้เวลาตามจำนวนกฎที่ตรงกับ bigram ที่พบน้อยที่สุด ไม่ใช่ตามขนาดของตาราง กฎที่ตรงถูกจัดอันดับ
+ตามลำดับในตารางแล้วเลือก limit อันดับแรกด้วย heap การไล่หยุดเมื่อพบกฎที่ได้คะแนนสูงสุดที่เป็นไปได้ครบ limit รายการ
+(กฎที่อยู่หลังในตารางไม่มีทางได้อันดับดีกว่า) คำค้นกว้างๆ เช่น "มาตรา" จึงไม่ต้องจัดอันดับทุกแถว
+"""
+import heapq
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+NGRAM = 2
+
+SearchHit = namedtuple("SearchHit", ["law", "section", "offense", "score"])
+
+# คะแนนตามช่องที่พบคำค้นทั้งคำ (0 = พบทุก bigram แต่ไม่ต่อเนื่องกัน)
+SCORE_SECTION = 3
+SCORE_OFFENSE = 2
+SCORE_LAW = 1
+
+_THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+_HAS_THAI_DIGIT = re.compile("[๐-๙]")
+_IGNORED = re.compile(r"[\s\u200b\u200c\u200d\ufeff]+")
+_TONE_BEFORE_VOWEL = re.compile("([\u0e48-\u0e4b])([\u0e31\u0e34-\u0e37\u0e47])")
+_NIKHAHIT_AA = re.compile("\u0e4d([\u0e48-\u0e4b]?)\u0e32")
+_SECTION_NUMBER = re.compile(r"\d+(?:/\d+)?")
+
+
+def normalize(text):
+    """ข้อความสำหรับทำดัชนีและค้นหา (ไม่มีช่องว่าง เลขอารบิก ตัวพิมพ์เล็ก)"""
+    text = unicodedata.normalize("NFC", str(text)).lower()
+    if _HAS_THAI_DIGIT.search(text):
+        text = text.translate(_THAI_DIGITS)
+    text = _IGNORED.sub("", text)
+    text = _NIKHAHIT_AA.sub("\\1\u0e33", text)
+    return _TONE_BEFORE_VOWEL.sub(r"\2\1", text)
+
+
+def ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """
+    inverted index ของ (พ.ร.บ., มาตรา, ความผิด)
+
+    entries: list ของ (พ.ร.บ., มาตรา, ความผิด) ตามลำดับในตารางกฎ (มาตราที่ว่างเป็น None)
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self._fields = []
+        self._numbers = []
+        postings = defaultdict(list)
+        # พ.ร.บ. และความผิดซ้ำกันหลายแถว จึงแปลงแต่ละข้อความครั้งเดียว
+        normalized = {}
+        grams = {}
+        for doc_id, (law, section, offense) in enumerate(self.entries):
+            fields = []
+            for text in (section or "", offense or "", law):
+                if text not in normalized:
+                    normalized[text] = normalize(text)
+                    grams[text] = ngrams(normalized[text])
+                fields.append(normalized[text])
+            self._fields.append(tuple(fields))
+            self._numbers.append(frozenset(_SECTION_NUMBER.findall(fields[0])))
+            # bigram ไม่คร่อมระหว่างช่อง และ doc_id เพิ่มขึ้นเสมอ posting จึงเรียงและไม่ซ้ำ
+            for gram in grams[section or ""] | grams[offense or ""] | grams[law]:
+                postings[gram].append(doc_id)
+        self._postings = dict(postings)
+        # set ของแต่ละ posting สร้างเมื่อ bigram นั้นถูกค้นครั้งแรก
+        self._sets = {}
+
+    @classmethod
+    def from_rule_index(cls, rule_index):
+        return cls((law, section, rule.offense) for (law, section), rule in rule_index.rules.items())
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _posting_set(self, gram):
+        posting_set = self._sets.get(gram)
+        if posting_set is None:
+            posting_set = self._sets[gram] = frozenset(self._postings[gram])
+        return posting_set
+
+    def _matches(self, query):
+        """doc_id ของทุกกฎที่มีทุก bigram ของ query เรียงจากน้อยไปมาก"""
+        grams = sorted(ngrams(query), key=lambda gram: len(self._postings.get(gram, ())))
+        if not grams or grams[0] not in self._postings:
+            return []
+        # intersection ของ set เริ่มจาก set ที่เล็กที่สุด
+        matches = self._posting_set(grams[0])
+        for gram in grams[1:]:
+            matches = matches & self._posting_set(gram)
+            if not matches:
+                return []
+        return sorted(matches)
+
+    def search(self, query, limit=10):
+        """
+        กฎที่ตรงกับ query เรียงตามความเกี่ยวข้อง คืน list ของ SearchHit ไม่เกิน limit รายการ
+
+        กฎต้องมีทุก bigram ของ query คะแนนขึ้นกับช่องที่พบ query ทั้งคำ (มาตรา > ความผิด > พ.ร.บ.)
+        ถ้า query มีเลขมาตรา (เช่น "100/1") มาตราที่มีเลขนั้นพอดีจะอยู่ก่อนมาตราที่ขึ้นต้นเหมือนกัน (100/10)
+        """
+        query = normalize(query)
+        if len(query) < NGRAM:
+            return []
+        numbers = set(_SECTION_NUMBER.findall(query))
+
+        # อันดับ (-คะแนน, ไม่ตรงเลขมาตรา, ตำแหน่งที่พบ, doc_id) ของกฎที่ตรงทีละกฎตามลำดับในตาราง
+        # เมื่อพบกฎที่ได้อันดับดีที่สุดที่เป็นไปได้ (ตรงช่องมาตราที่ตำแหน่งแรก) ครบ limit รายการ
+        # กฎที่ตามมา (doc_id มากกว่า) จะไม่ได้อันดับดีกว่า จึงหยุดไล่ได้
+        fields = self._fields
+        doc_numbers = self._numbers
+        keys = []
+        perfect = 0
+        for doc_id in self._matches(query):
+            section, offense, law = fields[doc_id]
+            position = section.find(query)
+            score = SCORE_SECTION
+            if position < 0:
+                position = offense.find(query)
+                score = SCORE_OFFENSE
+                if position < 0:
+                    position = law.find(query)
+                    score = SCORE_LAW
+                    if position < 0:
+                        score, position = 0, 0
+            inexact = not (numbers and numbers & doc_numbers[doc_id])
+            keys.append((-score, inexact, position, doc_id))
+            if score == SCORE_SECTION and position == 0 and inexact == (not numbers):
+                perfect += 1
+                if perfect >= limit:
+                    break
+        return [SearchHit(*self.entries[key[3]], -key[0]) for key in heapq.nsmallest(limit, keys)]
@@ -0,0 +1,284 @@
+"""
+ใบสั่งชำระค่าปรับ (เอกสาร Word) สร้างด้วย python-docx
+"""
+import math
+from io import BytesIO
+
+# python-docx และ lxml ถูก import ใน build_document เมื่อสร้างเอกสารครั้งแรกเท่านั้น
+from rules import UNSPECIFIED_SECTIONS
+from thai_text import convert_to_thai_text
+
+# ช่องว่างให้กรอกเองเมื่อไม่ระบุมาตราหรือความผิด
+BLANK_FIELD = "..............................................................................................."
+
+# พ.ร.บ. ที่สินบนนำจับส่งเป็นรายได้แผ่นดินเมื่อไม่มีผู้ขอรับ (พ.ร.บ. อื่นรวมกับเงินรางวัล)
+REVENUE_LAWS = ("เครื่องสำอาง พ.ศ. 2558", "เครื่องมือแพทย์ พ.ศ. 2551")
+
+# ผลการคำนวณที่ใช้ในใบสั่ง (จาก calculator)
+AMOUNT_KEYS = [
+    "fine_amount", "max_share", "calculated_share", "actual_share", "share1", "share2", "share3",
+]
+
+
+def has_amounts(case):
+    """
+    รายการที่ออกใบสั่งได้ (ค่าปรับและส่วนแบ่งทุกช่องเป็นตัวเลข)
+
+    calculate_batch ให้ผลเป็น NaN สำหรับแถวที่ค่าปรับหรือวันที่กระทำความผิดไม่ถูกต้อง
+    """
+    for key in AMOUNT_KEYS:
+        try:
+            value = float(case[key])
+        except (KeyError, TypeError, ValueError):
+            return False
+        # max_share เป็น inf เมื่อไม่มีเพดาน
+        if value != value or (key != "max_share" and not math.isfinite(value)):
+            return False
+    return True
+
+
+def slip_data(case):
+    """
+    แปลงผลการคำนวณหนึ่งรายการเป็น data dict ของใบสั่งชำระค่าปรับ
+
+    case คือ dict ที่มีผลจาก calculator.calculate_share() หรือแถวจาก calculate_batch()
+    พร้อม law, section, offense และ has_bounty_claimant
+    """
+    section = case.get("section")
+    if section in UNSPECIFIED_SECTIONS or section != section:
+        section = BLANK_FIELD
+
+    offense = case.get("offense")
+    if not offense or offense != offense:
+        offense = BLANK_FIELD
+
+    data = {key: float(case[key]) for key in AMOUNT_KEYS}
+    data["law"] = case["law"]
+    data["section"] = section
+    data["offense"] = offense
+    data["has_bounty_claimant"] = bool(case.get("has_bounty_claimant", False))
+    return data
+
+
+def slip_texts(data):
+    """
+    ข้อความที่เปลี่ยนไปตามข้อมูลของใบสั่งชำระค่าปรับแต่ละใบ
+
+    คืน dict ของข้อความแต่ละ run ที่ใช้ทั้งใน create_word_document และ slip_template
+    """
+    texts = {}
+
+    # Add fine amount
+    texts["amount"] = f"*จำนวนเงินค่าปรับรวม {data['fine_amount']:,.2f} บาท ({convert_to_thai_text(data['fine_amount'])})"
+
+    # Add law info
+    texts["law"] = f"เป็นค่าปรับ ตามพระราชบัญญัติ{data['law']} และที่แก้ไขเพิ่มเติม"
+
+    # Add offense description
+    if "offense" in data and data["offense"]:
+        texts["offense"] = f"ข้อกฎหมายความผิด    {data['offense']} มีบทกำหนดโทษตาม {data['section']}"
+    else:
+        texts["offense"] = f"ข้อกฎหมายความผิด    .......................................................................................................................................................................................................................................... มีบทกำหนดโทษตามมาตรา {data['section']}"
+
+    # Add calculation rows
+    texts["calculated_share"] = f"{data['calculated_share']:,.2f} บาท"
+    if data['max_share'] == float('inf'):
+        texts["max_share"] = "ไม่มีกำหนด"
+    else:
+        texts["max_share"] = f"{data['max_share']:,.2f} บาท"
+    texts["share1"] = f"{data['share1']:,.2f} บาท(25 %*)"
+
+    # Add checkboxes based on bounty claimant status and law type
+    if data.get('has_bounty_claimant', False):
+        texts["bounty_check"] = "☑ จ่ายให้ผู้ขอรับสินบนนำจับ"
+    else:
+        texts["bounty_check"] = "□ จ่ายให้ผู้ขอรับสินบนนำจับ"
+
+    if not data.get('has_bounty_claimant', False):
+        # For Cosmetic Act and Medical Device Act, always check "เป็นรายได้แผ่นดิน"
+        if data['law'] in REVENUE_LAWS:
+            texts["revenue_check"] = "☑ เป็นรายได้แผ่นดิน"
+        else:
+            texts["revenue_check"] = "☑ รวมกับสินบนรางวัล"
+    else:
+        texts["revenue_check"] = "□ เป็นรายได้แผ่นดิน"
+
+    # Add reward and expense rows
+    texts["share2"] = f"{data['share2']:,.2f} บาท(50 %*)"
+    texts["share3"] = f"{data['share3']:,.2f} บาท(25 %*)"
+
+    return texts
+
+
+def build_document(texts):
+    """
+    สร้างใบสั่งชำระค่าปรับด้วย python-docx จากข้อความที่ได้จาก slip_texts()
+    """
+    from docx import Document
+    from docx.shared import Pt, Inches
+    from lxml import etree
+
+    doc = Document()
+    
+    # Set page width for the document (A4)
+    section = doc.sections[0]
+    section.page_width = Inches(8.27)  # A4 width
+    section.page_height = Inches(11.69)  # A4 height
+    
+    # Add XML parser function
+    def parse_xml(xml_string):
+        return etree.fromstring(xml_string)
+    
+    # Set font for the entire document
+    style = doc.styles['Normal']
+    style.font.name = 'TH SarabunPSK'
+    style.font.size = Pt(16)
+    
+    # Add document heading with proper formatting
+    title = doc.add_heading("", level=0)
+    title_run = title.add_run("ใบสั่งชำระค่าปรับ")
+    title_run.font.name = 'TH SarabunPSK'
+    title_run.font.size = Pt(20)
+    title_run.font.bold = True
+    title.alignment = 1  # Center alignment
+
+    # Add department info (right-aligned)
+    header_para1 = doc.add_paragraph()
+    header_para1.alignment = 2  # Right alignment
+    header_run1 = header_para1.add_run("สำนักงานสาธารณสุขจังหวัดสมุทรปราการ")
+    header_run1.font.name = 'TH SarabunPSK'
+    header_run1.font.size = Pt(16)
+
+    # Add address (right-aligned)
+    header_para2 = doc.add_paragraph()
+    header_para2.alignment = 2  # Right alignment
+    header_run2 = header_para2.add_run("๑๙ ซอย ๓๕ อัศวนนท์ ๒ สป ๑๐๒๗๐")
+    header_run2.font.name = 'TH SarabunPSK'
+    header_run2.font.size = Pt(16)
+
+    # Add date field (right-aligned)
+    header_para3 = doc.add_paragraph()
+    header_para3.alignment = 2  # Right alignment
+    header_run3 = header_para3.add_run("วันที่.....................................................")
+    header_run3.font.name = 'TH SarabunPSK'
+    header_run3.font.size = Pt(16)
+
+    # Add blank space
+    doc.add_paragraph()
+
+    # Add recipient line
+    recipient_para = doc.add_paragraph()
+    recipient_para.add_run("ถึงเจ้าหน้าที่การเงิน กลุ่มงานบริหาร")
+    recipient_para.alignment = 0  # Left alignment
+
+    # Add money receipt line
+    receipt_from_para = doc.add_paragraph()
+    receipt_from_para.add_run("โปรดรับเงินจาก.............................................................................")
+    receipt_from_para.alignment = 0  # Left alignment
+
+    
+    # Add fine amount
+    amount_para = doc.add_paragraph()
+    amount_para.add_run(texts["amount"]).bold = True
+    
+    # Add law info
+    law_para = doc.add_paragraph()
+    law_para.add_run(texts["law"])
+    
+    # Add offense description
+    offense_para = doc.add_paragraph()
+    offense_para.add_run(texts["offense"])
+    
+    # Create a table for the fine calculation (2 columns, 8 rows)
+    fine_table = doc.add_table(rows=8, cols=2)
+    fine_table.style = 'Table Grid'
+    fine_table.autofit = False
+    
+    # กำหนดความกว้างตาราง 50% ของหน้า
+    fine_table._element.tblPr.xpath('./w:tblW')[0].set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}w', '2500')
+    fine_table._element.tblPr.xpath('./w:tblW')[0].set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}type', 'pct')
+    
+    # ลบเส้นตารางภายในและใส่เฉพาะเส้นกรอบภายนอก
+    tblBorders = parse_xml("""
+    <w:tblBorders xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+      <w:top w:val="single" w:sz="4" w:space="0" w:color="auto"/>
+      <w:left w:val="single" w:sz="4" w:space="0" w:color="auto"/>
+      <w:bottom w:val="single" w:sz="4" w:space="0" w:color="auto"/>
+      <w:right w:val="single" w:sz="4" w:space="0" w:color="auto"/>
+      <w:insideH w:val="nil"/>
+      <w:insideV w:val="nil"/>
+    </w:tblBorders>
+    """)
+    
+    # ดึง tblPr element
+    tblPr = fine_table._element.xpath('./w:tblPr')[0]
+    # ลบ tblBorders เดิมถ้ามี
+    for element in tblPr.xpath('./w:tblBorders'):
+        tblPr.remove(element)
+    # เพิ่ม tblBorders ใหม่
+    tblPr.append(tblBorders)
+    
+    # Add the box title
+    fine_box_cell = fine_table.cell(0, 0)
+    fine_box_cell.merge(fine_table.cell(0, 1))
+    fine_box_para = fine_box_cell.paragraphs[0]
+    fine_box_para.add_run(f"กันเงิน...60...%*").bold = True
+    fine_box_para.alignment = 1  # Center
+    
+    # Add calculation rows
+    fine_table.cell(1, 0).text = "จำนวนเงิน"
+    fine_table.cell(1, 1).text = texts["calculated_share"]
+    
+    fine_table.cell(2, 0).text = "สูงสุดไม่เกิน"
+    fine_table.cell(2, 1).text = texts["max_share"]
+    
+    fine_table.cell(3, 0).text = "เงินสินบนนำจับ"
+    fine_table.cell(3, 1).text = texts["share1"]
+    
+    # Add checkboxes based on bounty claimant status and law type
+    check_cell = fine_table.cell(4, 0)
+    check_cell.merge(fine_table.cell(4, 1))
+    check_para = check_cell.paragraphs[0]
+    check_para.add_run(texts["bounty_check"])
+    
+    check_cell2 = fine_table.cell(5, 0)
+    check_cell2.merge(fine_table.cell(5, 1))
+    check_para2 = check_cell2.paragraphs[0]
+    check_para2.add_run(texts["revenue_check"])
+    
+    # Add reward and expense rows
+    fine_table.cell(6, 0).text = "รางวัล"
+    fine_table.cell(6, 1).text = texts["share2"]
+    
+    fine_table.cell(7, 0).text = "คชจ."
+    fine_table.cell(7, 1).text = texts["share3"]
+    
+    # Set font for all cells
+    for row in fine_table.rows:
+        for cell in row.cells:
+            for paragraph in cell.paragraphs:
+                for run in paragraph.runs:
+                    run.font.size = Pt(14)
+                    run.font.name = 'TH SarabunPSK'
+                paragraph.alignment = 1  # Center align
+    
+    # Add signature section
+    doc.add_paragraph()
+    sig_section = doc.add_paragraph()
+    sig_section.alignment = 2  # Right alignment
+    sig_section.add_run("ผู้รับชำระ.........................................\n")
+    sig_section.add_run("โทร ................................................")
+    
+    return doc
+
+
+# Function to create and download Word document
+def create_word_document(data):
+    doc = build_document(slip_texts(data))
+    
+    # Save to BytesIO object
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    
+    return buffer
@@ -0,0 +1,219 @@
+"""
+เรนเดอร์ใบสั่งชำระค่าปรับจากเทมเพลต XML ที่คอมไพล์ไว้แล้ว
+
+เทมเพลตสร้างครั้งเดียวจาก build_document() ใน slip.py โดยใส่ตัวยึดตำแหน่ง (placeholder)
+แทนข้อความที่เปลี่ยนไปในแต่ละใบ แล้วเก็บ document.xml เป็นชิ้นส่วน bytes และเก็บส่วนอื่นของ
+ไฟล์ .docx ที่บีบอัดแล้ว การเรนเดอร์แต่ละใบจึงเป็นเพียงการแทนค่าข้อความแล้วเขียนไฟล์ zip
+จาก bytes ที่ cache ไว้ โดยไม่ผ่าน object model ของ python-docx
+
+รูปแบบเอกสารที่ได้จึงตรงกับ create_word_document ทุกประการ
+
+write_combined เขียนใบสั่งหลายใบลงไฟล์ .docx เดียวโดยใช้ styles, fonts และเส้นตารางของเทมเพลตชุดเดียว
+เนื้อหาของแต่ละใบ (ส่วนของ <w:body>) ถูกบีบอัดและเขียนลงไฟล์ต่อกันทีละใบ คั่นด้วยการขึ้นหน้าใหม่
+"""
+import hashlib
+import json
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import metrics
+from slip import build_document, slip_texts
+from zipstream import ZipEntry, ZipStreamWriter, build_zip
+
+# ข้อความที่เปลี่ยนไปในแต่ละใบ (key ของ slip_texts)
+SLIP_FIELDS = (
+    "amount", "law", "offense", "calculated_share", "max_share",
+    "share1", "bounty_check", "revenue_check", "share2", "share3",
+)
+
+DOCUMENT_PART = "word/document.xml"
+
+_PLACEHOLDER_RE = re.compile(rb'<w:t(?: [^>]*)?>@@(\w+)@@</w:t>')
+
+BODY_START = b"<w:body>"
+SECTION_START = b"<w:sectPr"
+PAGE_BREAK = b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_RUN_BREAK_RE = re.compile(r'([\t\r\n])')
+
+
+def _run_text_xml(text):
+    """
+    แปลงข้อความของ run เป็น XML แบบเดียวกับที่ python-docx สร้าง
+    (tab เป็น <w:tab/>, ขึ้นบรรทัดใหม่เป็น <w:br/> และ xml:space="preserve" เมื่อมีช่องว่างหัวท้าย)
+    """
+    parts = []
+    for piece in _RUN_BREAK_RE.split(text):
+        if not piece:
+            continue
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in "\r\n":
+            parts.append("<w:br/>")
+        elif len(piece.strip()) < len(piece):
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+        else:
+            parts.append(f"<w:t>{escape(piece)}</w:t>")
+    return "".join(parts).encode("utf-8")
+
+
+class SlipTemplate:
+    """
+    เทมเพลตใบสั่งชำระค่าปรับที่คอมไพล์แล้ว
+
+    ใช้ SlipTemplate.compile() สร้างครั้งเดียว แล้วเรียก render(data) ได้หลายครั้ง
+    """
+
+    def __init__(self, parts, document_index, chunks, fields):
+        self.parts = parts
+        self.document_index = document_index
+        self.chunks = chunks
+        self.fields = fields
+
+    @classmethod
+    def compile(cls, build=build_document):
+        """สร้างเอกสารตัวอย่างที่มี placeholder แล้วแยก document.xml ออกเป็นชิ้นส่วนคงที่"""
+        doc = build({field: f"@@{field}@@" for field in SLIP_FIELDS})
+        buffer = BytesIO()
+        doc.save(buffer)
+
+        parts = []
+        document_index = None
+        with zipfile.ZipFile(buffer) as archive:
+            for name in archive.namelist():
+                if name == DOCUMENT_PART:
+                    document_index = len(parts)
+                    document_xml = archive.read(name)
+                    parts.append(None)
+                else:
+                    parts.append(ZipEntry(name, archive.read(name)))
+
+        if document_index is None:
+            raise ValueError(f"ไม่พบ {DOCUMENT_PART} ในเอกสารตัวอย่าง")
+
+        # แยก document.xml ตามตำแหน่ง placeholder: chunks[i] อยู่ก่อน fields[i]
+        chunks = []
+        fields = []
+        position = 0
+        for match in _PLACEHOLDER_RE.finditer(document_xml):
+            chunks.append(document_xml[position:match.start()])
+            fields.append(match.group(1).decode("ascii"))
+            position = match.end()
+        chunks.append(document_xml[position:])
+
+        if sorted(fields) != sorted(SLIP_FIELDS):
+            raise ValueError(f"placeholder ในเทมเพลตไม่ครบหรือซ้ำ: {fields}")
+
+        return cls(parts, document_index, chunks, fields)
+
+    def _fill(self, chunks, texts):
+        out = [chunks[0]]
+        for field, chunk in zip(self.fields, chunks[1:]):
+            out.append(_run_text_xml(texts[field]))
+            out.append(chunk)
+        return b"".join(out)
+
+    def document_xml(self, texts):
+        return self._fill(self.chunks, texts)
+
+    def body_chunks(self):
+        """
+        แยก document.xml เป็น (หัวเอกสารจนถึง <w:body>, chunks ของเนื้อหาหนึ่งใบ, sectPr และท้ายเอกสาร)
+        """
+        first, last = self.chunks[0], self.chunks[-1]
+        head_end = first.index(BODY_START) + len(BODY_START)
+        tail_start = last.rindex(SECTION_START)
+        chunks = [first[head_end:], *self.chunks[1:-1], last[:tail_start]]
+        return first[:head_end], chunks, last[tail_start:]
+
+    def write_combined(self, items, path, progress=None):
+        """
+        เขียนใบสั่งของทุก data dict ใน items ลงไฟล์ .docx เดียวที่ path คั่นแต่ละใบด้วยการขึ้นหน้าใหม่
+
+        ส่วนอื่นของไฟล์ใช้ bytes ที่บีบอัดไว้ของเทมเพลต document.xml ถูกเขียนลงไฟล์ทีละใบ
+        progress(done) ถูกเรียกหลังเขียนแต่ละใบ คืนจำนวนใบที่เขียน
+        """
+        head, chunks, tail = self.body_chunks()
+        count = 0
+        with ZipStreamWriter(path) as archive:
+            for index, entry in enumerate(self.parts):
+                if index != self.document_index:
+                    archive.append(entry)
+                    continue
+                with archive.open(DOCUMENT_PART) as document:
+                    document.write(head)
+                    for data in items:
+                        if count:
+                            document.write(PAGE_BREAK)
+                        document.write(self._fill(chunks, slip_texts(data)))
+                        count += 1
+                        if progress is not None:
+                            progress(count)
+                    document.write(tail)
+        return count
+
+    def render_texts(self, texts):
+        """เรนเดอร์ไฟล์ .docx (bytes) จาก dict ของข้อความตาม SLIP_FIELDS"""
+        entries = list(self.parts)
+        entries[self.document_index] = ZipEntry(DOCUMENT_PART, self.document_xml(texts))
+        return build_zip(entries)
+
+    def render(self, data):
+        """เรนเดอร์ไฟล์ .docx (bytes) จาก data dict แบบเดียวกับ create_word_document"""
+        return self.render_texts(slip_texts(data))
+
+
+@lru_cache(maxsize=None)
+def get_template():
+    return SlipTemplate.compile()
+
+
+def slip_key(data):
+    """hash ของ data dict ของใบสั่ง ข้อมูลเดียวกันได้ key เดียวกันเสมอ"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SlipCache:
+    """
+    cache ของไฟล์ .docx ที่เรนเดอร์แล้วแบบ LRU จำกัดจำนวน (maxsize) ใช้ร่วมกันได้หลาย thread
+
+    ข้อมูลเดียวกัน (ตาม slip_key) จะได้ bytes ชุดเดิมโดยไม่ต้องเรนเดอร์ใหม่
+    """
+
+    def __init__(self, maxsize=256, template=None):
+        self.maxsize = maxsize
+        self.template = template
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, data):
+        key = slip_key(data)
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.cache_result("slips", True)
+                return document
+            self.misses += 1
+        metrics.cache_result("slips", False)
+
+        template = self.template if self.template is not None else get_template()
+        document = template.render(data)
+
+        with self._lock:
+            self._entries[key] = document
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return document
+
+    def __len__(self):
+        return len(self._entries)
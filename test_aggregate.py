@@ -0,0 +1,28 @@
+from aggregate import aggregate_records, parse_lines
+from rules import load_rule_index
+
+RULES = load_rule_index()
+LAW, SECTION = next(iter(RULES.rules))
+
+
+def test_parse_lines_counts_each_bad_line_once():
+    lines = ['{"a": 1}, {"b": 2}\n', "1, 2\n", '{"c": 3}\n', "\n", "[1]\n", '{"d":\n']
+    assert parse_lines(lines) == ([{"c": 3}], 4)
+
+
+def test_parse_lines_does_not_depend_on_other_lines():
+    bad = '{"a": 1}, {"b": 2}\n'
+    assert parse_lines([bad, '{"c": 3}\n']) == ([{"c": 3}], 1)
+    assert parse_lines([bad, '{"c": 3}\n', "not json\n"]) == ([{"c": 3}], 2)
+
+
+def test_months_follow_normalized_offense_date():
+    records = [
+        {"fine_amount": 1000, "law": LAW, "section": SECTION, "offense_date": "2024-05-01"},
+        {"fine_amount": 2000, "law": LAW, "section": SECTION, "offense_date": "2567-05-31"},
+        {"fine_amount": 3000, "law": LAW, "section": SECTION, "offense_date": "2024-06-01"},
+        {"fine_amount": 1e20, "law": LAW, "section": SECTION, "offense_date": "2024-06-01"},
+    ]
+    result = aggregate_records(records, RULES)
+    assert {row["month"]: row["cases"] for row in result.rows()} == {"2024-05": 2, "2024-06": 1}
+    assert result.invalid == 1
@@ -0,0 +1,90 @@
+import io
+import zipfile
+
+import pytest
+
+import api
+from calculator import calculate_share
+
+RULES = api.load_rule_index()
+LAW, SECTION = next((key for key, rule in RULES.rules.items() if rule.has_limit and key[1] is not None))
+
+
+@pytest.fixture
+def client():
+    with api.TestClient(api.RewardAPI(workers=0)) as client:
+        yield client
+
+
+def test_health(client):
+    response = client.get("/health")
+    assert response.status == 200
+    assert response.json() == {"status": "ok", "rules": len(RULES), "pending": 0}
+
+
+@pytest.mark.parametrize("fine_amount", [1000, 150000.5, 10 ** 9])
+def test_calculate_matches_calculate_share(client, fine_amount):
+    response = client.post("/calculate", {"fine_amount": fine_amount, "law": LAW, "section": SECTION})
+    assert response.status == 200
+    result = response.json()
+    expected = calculate_share(fine_amount, LAW, SECTION, RULES)
+    for key in ("calculated_share", "actual_share", "share1", "share2", "share3", "max_share"):
+        assert result[key] == expected[key]
+
+
+def test_calculate_without_limit_returns_null_max_share(client):
+    result = client.post("/calculate", {"fine_amount": 1000, "law": LAW, "section": "ไม่ระบุ"}).json()
+    assert result["has_limit"] is False
+    assert result["max_share"] is None
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b'{"fine_amount": "1000", "law": "x"}',
+    b'{"fine_amount": -5, "law": "x"}',
+    b'{"fine_amount": 1000}',
+    b'{"fine_amount": 1000, "law": "x", "offense_date": "2024-13-01"}',
+])
+def test_bad_input_is_400(client, body):
+    response = client.post("/calculate", body=body)
+    assert response.status == 400
+    assert response.json()["error"]
+
+
+def test_unknown_route_and_method(client):
+    assert client.get("/nope").status == 404
+    assert client.get("/calculate").status == 405
+
+
+def test_batch_offloaded_matches_inline(client):
+    cases = [{"fine_amount": 1000 + i, "law": LAW, "section": SECTION} for i in range(api.INLINE_BATCH + 1)]
+    offloaded = client.post("/calculate/batch", {"cases": cases}).json()["results"]
+    inline = client.post("/calculate/batch", {"cases": cases[:api.INLINE_BATCH]}).json()["results"]
+    assert offloaded[:api.INLINE_BATCH] == inline
+
+
+def test_slip_returns_docx(client):
+    response = client.post("/slip", {"fine_amount": 150000, "law": LAW, "section": SECTION})
+    assert response.status == 200
+    assert response.headers["Content-Type"] == api.DOCX_MIME
+    with zipfile.ZipFile(io.BytesIO(response.body)) as document:
+        assert "word/document.xml" in document.namelist()
+
+
+def test_overloaded_pool_is_503(client):
+    client.api.pending = client.api.max_pending
+    response = client.post("/slip", {"fine_amount": 150000, "law": LAW, "section": SECTION})
+    assert response.status == 503
+    assert response.headers["Retry-After"] == "1"
+    # งานที่ไม่ส่งไปยัง process pool ยังตอบได้ตามปกติ
+    assert client.post("/calculate", {"fine_amount": 1000, "law": LAW, "section": SECTION}).status == 200
+
+
+def test_unexpected_error_is_500(client, monkeypatch):
+    def broken(data):
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(api, "_render_slip", broken)
+    response = client.post("/slip", {"fine_amount": 150000, "law": LAW, "section": SECTION})
+    assert response.status == 500
+    assert client.api.pending == 0
@@ -0,0 +1,119 @@
+import zipfile
+
+import docx
+import pytest
+
+from bulk_export import export_combined, export_slips
+from calculator import calculate_batch
+from rules import load_rule_index
+from zipstream import ZipStreamWriter
+
+RULES = load_rule_index()
+LAW, SECTION = next(iter(RULES.rules))
+
+
+def make_cases(case_ids):
+    return calculate_batch({
+        "case_id": case_ids,
+        "fine_amount": [1000.0 * (i + 1) for i in range(len(case_ids))],
+        "law": [LAW] * len(case_ids),
+        "section": [SECTION] * len(case_ids),
+    }, RULES)
+
+
+def test_recover_truncates_partly_written_entry(tmp_path):
+    path = tmp_path / "out.zip"
+    with ZipStreamWriter(path) as archive:
+        archive.write("a.txt", b"first")
+        archive.write("b.txt", b"second")
+        second = archive.offsets[1]
+    with open(path, "r+b") as f:
+        f.truncate(second + 10)
+
+    with ZipStreamWriter(path, resume=True) as archive:
+        assert archive.names == {"a.txt"}
+        archive.write("c.txt", b"third")
+
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["a.txt", "c.txt"]
+        assert archive.testzip() is None
+        assert archive.read("c.txt") == b"third"
+
+
+def test_recover_skips_unfinished_stream(tmp_path):
+    path = tmp_path / "out.zip"
+    archive = ZipStreamWriter(path)
+    archive.write("a.txt", b"first")
+    stream = archive.open("b.txt")
+    stream.write(b"not finished")
+    # process หยุดก่อนปิดรายการและเขียน central directory
+    archive._file.close()
+
+    with ZipStreamWriter(path, resume=True) as resumed:
+        assert resumed.names == {"a.txt"}
+
+
+def test_writer_rejects_duplicate_names(tmp_path):
+    with ZipStreamWriter(tmp_path / "out.zip") as archive:
+        archive.write("a.txt", b"first")
+        with pytest.raises(ValueError):
+            archive.write("a.txt", b"again")
+        with pytest.raises(ValueError):
+            archive.open("a.txt")
+
+
+def test_resume_skips_slips_already_written(tmp_path):
+    path = tmp_path / "slips.zip"
+    cases = make_cases(["A", "B", "C", "D"])
+    assert export_slips(cases.iloc[:2], path, workers=0) == 2
+    assert export_slips(cases, path, workers=0, resume=True) == 2
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == ["A.docx", "B.docx", "C.docx", "D.docx"]
+
+
+def test_export_starts_over_without_resume(tmp_path):
+    path = tmp_path / "slips.zip"
+    export_slips(make_cases(["OLD"]), path, workers=0)
+    assert export_slips(make_cases(["A", "B"]), path, workers=0) == 2
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == ["A.docx", "B.docx"]
+
+
+def test_duplicate_case_ids_get_unique_names(tmp_path):
+    path = tmp_path / "slips.zip"
+    renamed = []
+    export_slips(make_cases(["A", "A", None]), path, workers=0,
+                 on_duplicate=lambda index, case, name: renamed.append((index, name)))
+    assert renamed == [(1, "A_2.docx")]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["A.docx", "A_2.docx", "slip_000003.docx"]
+
+
+def test_combined_document_opens_with_one_page_per_slip(tmp_path):
+    path = tmp_path / "combined.docx"
+    assert export_combined(make_cases(["A1", "A2", "A3"]), str(path)) == 3
+
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+    document = docx.Document(str(path))
+    body = document.element.body
+    assert len(body.xpath('.//w:br[@w:type="page"]')) == 2
+    assert len(body.xpath("./w:sectPr")) == 1
+    totals = [p.text for p in document.paragraphs if p.text.startswith("*จำนวนเงินค่าปรับรวม")]
+    assert totals == [f"*จำนวนเงินค่าปรับรวม {amount} บาท ({words})" for amount, words in [
+        ("1,000.00", "หนึ่งพันบาทถ้วน"), ("2,000.00", "สองพันบาทถ้วน"), ("3,000.00", "สามพันบาทถ้วน")]]
+
+
+def test_combined_document_skips_invalid_cases(tmp_path):
+    cases = calculate_batch({
+        "case_id": ["A1", "A2", "A3"],
+        "fine_amount": [1000.0, "abc", 3000.0],
+        "law": [LAW] * 3,
+        "section": [SECTION] * 3,
+    }, RULES)
+    invalid = []
+    path = tmp_path / "combined.docx"
+
+    assert export_combined(cases, str(path), on_invalid=lambda index, case: invalid.append(index)) == 2
+    assert invalid == [1]
+    assert len(docx.Document(str(path)).element.body.xpath('.//w:br[@w:type="page"]')) == 1
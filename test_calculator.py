@@ -0,0 +1,51 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from calculator import main
+
+RULES_CSV = "พ.ร.บ.,มาตรา,จำนวนเงินส่วนแบ่งสูงสุด,ความผิด\nยา พ.ศ. 2510,มาตรา 1,5000,ขายยา\n"
+
+
+@pytest.fixture
+def rules_path(tmp_path):
+    path = tmp_path / "rules.csv"
+    path.write_text(RULES_CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_cli_csv_to_jsonl_applies_cap_and_split(tmp_path, rules_path):
+    cases = tmp_path / "cases.csv"
+    cases.write_text(
+        "fine_amount,law,section,has_bounty_claimant\n"
+        "10000,ยา พ.ศ. 2510,มาตรา 1,true\n"
+        "1000,ยา พ.ศ. 2510,มาตรา 1,false\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+
+    assert main([str(cases), "-o", str(output), "--rules", rules_path]) == 0
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [row["actual_share"] for row in rows] == [5000, 600]
+    assert [(row["share1"], row["share2"], row["share3"]) for row in rows] == [(1250, 2500, 1250), (150, 300, 150)]
+    assert [row["has_bounty_claimant"] for row in rows] == [True, False]
+    assert rows[0]["offense"] == "ขายยา"
+
+
+def test_cli_jsonl_to_stdout_keeps_invalid_rows(tmp_path, rules_path, capsys):
+    cases = tmp_path / "cases.jsonl"
+    cases.write_text(
+        '{"fine_amount": 2000, "law": "ยา พ.ศ. 2510", "section": "มาตรา 1"}\n'
+        '{"fine_amount": "abc", "law": "ยา พ.ศ. 2510", "section": "มาตรา 1"}\n', encoding="utf-8")
+
+    assert main([str(cases), "--rules", rules_path]) == 0
+    result = pd.read_csv(io.StringIO(capsys.readouterr().out))
+    assert result["actual_share"].tolist()[0] == 1200
+    assert pd.isna(result["actual_share"].tolist()[1])
+
+
+def test_cli_rejects_missing_columns(tmp_path, rules_path):
+    cases = tmp_path / "cases.csv"
+    cases.write_text("fine_amount,law\n1000,ยา พ.ศ. 2510\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="section"):
+        main([str(cases), "--rules", rules_path])
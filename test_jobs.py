@@ -0,0 +1,70 @@
+import json
+import os
+import time
+import zipfile
+
+import jobs
+from jobs import JobManager
+from rules import load_rule_index
+from zipstream import ZipStreamWriter
+
+LAW, SECTION = next(iter(load_rule_index().rules))
+CASES = f"case_id,fine_amount,law,section\nA,1000,{LAW},{SECTION or ''}\nB,abc,{LAW},{SECTION or ''}\n" \
+        f"C,3000,{LAW},{SECTION or ''}\n"
+
+
+def wait(manager, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while manager.status(job_id)["status"] in (jobs.QUEUED, jobs.RUNNING):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    return manager.status(job_id)
+
+
+def make_job(directory, job_id, status):
+    os.makedirs(directory / job_id)
+    (directory / job_id / jobs.CASES_FILE).write_text(CASES, encoding="utf-8")
+    state = {"id": job_id, "filename": "cases.csv", "created_at": "2024-01-01T00:00:00", "status": status,
+             "total": 3, "done": 1, "invalid": 0, "invalid_rows": [], "error": None}
+    (directory / job_id / jobs.STATE_FILE).write_text(json.dumps(state), encoding="utf-8")
+
+
+def test_job_reports_invalid_rows(tmp_path):
+    manager = JobManager(str(tmp_path))
+    try:
+        state = wait(manager, manager.submit(CASES.encode("utf-8")))
+    finally:
+        manager.close()
+    assert (state["status"], state["total"], state["done"]) == (jobs.DONE, 3, 3)
+    assert (state["invalid"], state["invalid_rows"]) == (1, [2])
+
+
+def test_unfinished_job_resumes_from_checkpoint(tmp_path):
+    make_job(tmp_path, "interrupted", jobs.RUNNING)
+    # ใบแรกเขียนเสร็จก่อน process หยุด ใบถัดไปเขียนค้างไว้
+    with ZipStreamWriter(str(tmp_path / "interrupted" / jobs.SLIPS_FILE)) as archive:
+        archive.write("A.docx", b"written before restart")
+    with open(tmp_path / "interrupted" / jobs.SLIPS_FILE, "ab") as f:
+        f.write(b"PK\x03\x04 partial")
+
+    manager = JobManager(str(tmp_path))
+    try:
+        state = wait(manager, "interrupted")
+    finally:
+        manager.close()
+    assert state["status"] == jobs.DONE
+    with zipfile.ZipFile(tmp_path / "interrupted" / jobs.SLIPS_FILE) as archive:
+        assert archive.namelist() == ["A.docx", "C.docx"]
+        assert archive.read("A.docx") == b"written before restart"
+
+
+def test_finished_and_failed_jobs_are_not_requeued(tmp_path):
+    make_job(tmp_path, "done", jobs.DONE)
+    make_job(tmp_path, "failed", jobs.FAILED)
+    manager = JobManager(str(tmp_path))
+    try:
+        assert manager.status("done")["status"] == jobs.DONE
+        assert manager.status("failed")["status"] == jobs.FAILED
+    finally:
+        manager.close()
+    assert not os.path.exists(tmp_path / "done" / jobs.SLIPS_FILE)
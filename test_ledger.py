@@ -0,0 +1,89 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from calculator import calculate_batch, calculate_share
+from ledger import Ledger
+from rules import load_rule_index
+
+RULES = load_rule_index()
+KEYS = list(RULES.rules)[:3]
+CREATED = datetime(2024, 3, 15, 9, 30)
+
+
+def make_results():
+    return calculate_batch({
+        "fine_amount": [1000.0, 150000.0, 2500000.0, 0.01] * len(KEYS),
+        "law": [law for law, _ in KEYS for _ in range(4)],
+        "section": [section for _, section in KEYS for _ in range(4)],
+        "has_bounty_claimant": [True, False] * 2 * len(KEYS),
+        "offense_date": ["2024-01-31", "2567-02-01", None, "2023-12-01"] * len(KEYS),
+    }, RULES)
+
+
+def totals(ledger):
+    return ledger.totals("section") + ledger.totals("month")
+
+
+def test_entries_cannot_be_updated_or_deleted():
+    law, section = KEYS[0]
+    with Ledger(":memory:") as ledger:
+        ledger.append(dict(calculate_share(1000, law, section, RULES), law=law, section=section))
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            ledger._conn.execute("UPDATE entries SET fine = 0")
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            ledger._conn.execute("DELETE FROM entries")
+        assert len(ledger) == 1
+
+
+def test_append_frame_totals_match_trigger_totals():
+    results = make_results()
+    with Ledger(":memory:") as bulk, Ledger(":memory:") as single:
+        assert bulk.append_frame(results, created_at=CREATED) == len(results)
+        single.append_many(results.to_dict("records"), created_at=CREATED)
+        assert totals(bulk) == totals(single)
+        bulk.rebuild_totals()
+        assert totals(bulk) == totals(single)
+
+
+def test_month_follows_offense_date():
+    results = make_results()
+    with Ledger(":memory:") as ledger:
+        ledger.append_frame(results, created_at=CREATED)
+        months = {row["month"]: row["entries"] for row in ledger.totals("month")}
+    # วันที่ พ.ศ. อยู่เดือนเดียวกับ ค.ศ. และรายการที่ไม่มีวันที่ใช้เดือนที่บันทึก
+    assert months == {"2023-12": 3, "2024-01": 3, "2024-02": 3, "2024-03": 3}
+
+
+def test_append_frame_skips_rows_that_could_not_be_calculated():
+    law, section = KEYS[0]
+    results = calculate_batch({"fine_amount": [1000, "abc"], "law": [law] * 2, "section": [section] * 2}, RULES)
+    with Ledger(":memory:") as ledger:
+        assert ledger.append_frame(results) == 1
+        assert len(ledger) == 1
+
+
+class FailingTotalsInsert:
+    """connection ที่คำสั่ง INSERT INTO totals ล้มเหลว"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *args):
+        if sql.startswith("INSERT INTO totals"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.execute(sql, *args)
+
+
+def test_rebuild_totals_rolls_back_on_error():
+    with Ledger(":memory:") as ledger:
+        ledger.append_frame(make_results(), created_at=CREATED)
+        before = totals(ledger)
+        conn = ledger._conn
+        ledger._conn = FailingTotalsInsert(conn)
+        with pytest.raises(sqlite3.OperationalError):
+            ledger.rebuild_totals()
+        ledger._conn = conn
+        assert totals(ledger) == before
+        assert not conn.in_transaction
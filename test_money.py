@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from calculator import SHARE_RATE, SPLIT_RATES, calculate_batch, calculate_share
+from money import MAX_SATANG, share_breakdown, share_breakdown_array, split, to_satang, to_satang_array
+from rules import load_rule_index
+
+RULES = load_rule_index()
+
+
+@pytest.mark.parametrize("amount, satang", [
+    (0, 0), (1, 100), (1.005, 101), (0.125, 13), (0.115, 12), (-1.005, -100), (123456.789, 12345679),
+])
+def test_to_satang_rounds_half_up(amount, satang):
+    assert to_satang(amount) == satang
+    assert to_satang_array(np.array([amount], dtype=float))[0] == satang
+
+
+def test_to_satang_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        to_satang(float(MAX_SATANG))
+    with pytest.raises(ValueError):
+        to_satang(float("nan"))
+
+
+def test_to_satang_rejects_out_of_range_integers_and_decimals():
+    assert to_satang(MAX_SATANG // 100) == MAX_SATANG // 100 * 100
+    with pytest.raises(ValueError):
+        to_satang(MAX_SATANG // 100 + 1)
+    with pytest.raises(ValueError):
+        to_satang(-2 ** 62)
+    with pytest.raises(ValueError):
+        to_satang(Decimal("1e20"))
+    with pytest.raises(ValueError):
+        to_satang(Decimal("NaN"))
+
+
+def test_to_satang_array_rejects_out_of_range_integers():
+    assert to_satang_array(np.array([MAX_SATANG // 100], dtype=np.int64))[0] == MAX_SATANG // 100 * 100
+    with pytest.raises(ValueError):
+        to_satang_array(np.array([1, 2 ** 62], dtype=np.int64))
+    with pytest.raises(ValueError):
+        to_satang_array(np.array([2 ** 64 - 1], dtype=np.uint64))
+
+
+@pytest.mark.parametrize("total", [0, 1, 2, 3, 5, 99, 100, 101, 10 ** 12 + 3])
+def test_split_sums_to_total(total):
+    parts = split(total, SPLIT_RATES)
+    assert sum(parts) == total
+    assert all(abs(part - total * rate) < 1 for part, rate in zip(parts, SPLIT_RATES))
+
+
+def test_share_breakdown_invariants_and_array_agreement():
+    rng = np.random.default_rng(20240101)
+    fines = rng.integers(0, 10 ** 10, 20000)
+    caps = rng.choice([600000, 3000000, 6000000], len(fines))
+    has_limit = rng.random(len(fines)) < 0.7
+
+    calculated, actual, shares = share_breakdown_array(fines, caps, has_limit, SHARE_RATE, SPLIT_RATES)
+    assert (shares.sum(axis=1) == actual).all()
+    assert (actual <= calculated).all()
+    assert (actual[has_limit] <= caps[has_limit]).all()
+    assert (actual[~has_limit] == calculated[~has_limit]).all()
+
+    for i in range(0, len(fines), 997):
+        cap = int(caps[i]) if has_limit[i] else None
+        scalar = share_breakdown(int(fines[i]), cap, SHARE_RATE, SPLIT_RATES)
+        assert scalar == (calculated[i], actual[i], list(shares[i]))
+
+
+def test_calculate_batch_matches_calculate_share():
+    keys = list(RULES.rules)
+    cases = {
+        "fine_amount": [150000.0, 1000.5, 0.01, 2500000.0] * len(keys),
+        "law": [law for law, _ in keys for _ in range(4)],
+        "section": [section for _, section in keys for _ in range(4)],
+    }
+    result = calculate_batch(cases, RULES)
+    for row in result.itertuples():
+        expected = calculate_share(row.fine_amount, row.law, row.section, RULES)
+        assert row.actual_share == expected["actual_share"]
+        assert (row.share1, row.share2, row.share3) == (expected["share1"], expected["share2"], expected["share3"])
+        assert round(row.share1 + row.share2 + row.share3, 2) == row.actual_share
+
+
+def test_calculate_batch_marks_invalid_rows_nan():
+    law, section = next(iter(RULES.rules))
+    result = calculate_batch({
+        "fine_amount": [1000, "abc", None, 1e20, -1e20, 2000],
+        "law": [law] * 6,
+        "section": [section] * 6,
+    }, RULES)
+    assert result["calculated_share"].isna().tolist() == [False, True, True, True, True, False]
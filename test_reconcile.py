@@ -0,0 +1,78 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reconcile import AMOUNT_DATE_MATCH, AMOUNT_MISMATCH, UNMATCHED_PAYMENT, UNPAID_CASE, reconcile
+from rules import load_rule_index
+
+LAW, SECTION = next(iter(load_rule_index().rules))
+
+
+@pytest.fixture
+def run(tmp_path):
+    def run(cases, payments, **options):
+        cases_path = tmp_path / "results.csv"
+        payments_path = tmp_path / "payments.csv"
+        cases = pd.DataFrame(cases)
+        cases["law"] = LAW
+        cases["section"] = SECTION
+        cases.to_csv(cases_path, index=False)
+        pd.DataFrame(payments).to_csv(payments_path, index=False)
+        out = io.StringIO()
+        counts = reconcile(str(payments_path), str(cases_path), out, **options)
+        return counts, pd.read_csv(io.StringIO(out.getvalue()), dtype={"case_id": str})
+    return run
+
+
+def test_key_match_reports_only_differences(run):
+    counts, report = run(
+        {"case_id": ["A", "B"], "fine_amount": [1000, 2000], "offense_date": ["2024-01-10"] * 2},
+        {"case_id": ["A", "B"], "amount": [1000, 2100], "paid_date": ["2024-01-12"] * 2},
+    )
+    assert counts["matched_by_key"] == 2
+    assert report[["type", "case_id"]].values.tolist() == [[AMOUNT_MISMATCH, "B"]]
+
+
+def test_fallback_picks_nearest_date_once(run):
+    counts, report = run(
+        {"case_id": ["A", "B", "C"], "fine_amount": [1000] * 3,
+         "offense_date": ["2024-01-08", "2024-01-10", "2024-01-20"]},
+        {"case_id": [None, None, None], "amount": [1000] * 3,
+         "paid_date": ["2024-01-11", "2024-01-11", "2024-01-11"]},
+        date_tolerance=3,
+    )
+    matched = report[report["type"] == AMOUNT_DATE_MATCH]
+    # แถวแรกได้รายการที่วันที่ใกล้ที่สุด แถวที่สองได้รายการที่เหลือในช่วง แถวที่สามไม่มีคู่
+    assert matched[["payment_row", "case_id"]].values.tolist() == [[1, "B"], [2, "A"]]
+    assert report.loc[report["type"] == UNMATCHED_PAYMENT, "payment_row"].tolist() == [3]
+    assert report.loc[report["type"] == UNPAID_CASE, "case_id"].tolist() == ["C"]
+    assert counts["matched_by_amount_date"] == 2
+
+
+def test_fallback_prefers_closer_amount_then_first_row(run):
+    _, report = run(
+        {"case_id": ["A", "B", "C"], "fine_amount": [1000, 1000.5, 1000.5],
+         "offense_date": ["2024-01-10"] * 3},
+        {"case_id": [None], "amount": [1000.5], "paid_date": ["2024-01-10"]},
+        amount_tolerance=1,
+    )
+    assert report.loc[report["type"] == AMOUNT_DATE_MATCH, "case_id"].tolist() == ["B"]
+
+
+def test_fallback_with_repeated_amounts_matches_every_case_once(run):
+    rng = np.random.default_rng(0)
+    size = 3000
+    fines = rng.choice([1000, 2000, 5000], size)
+    dates = (np.datetime64("2024-01-01") + rng.integers(0, 5, size)).astype(str)
+    order = rng.permutation(size)
+    counts, report = run(
+        {"case_id": [f"C{i}" for i in range(size)], "fine_amount": fines, "offense_date": dates},
+        {"case_id": [None] * size, "amount": fines[order], "paid_date": dates[order]},
+        date_tolerance=0,
+    )
+    matched = report[report["type"] == AMOUNT_DATE_MATCH]
+    assert counts["matched_by_amount_date"] == size
+    assert matched["case_id"].is_unique
+    assert (matched["fine_amount"].to_numpy() == matched["paid_amount"].to_numpy()).all()
@@ -0,0 +1,110 @@
+import os
+import pickle
+from datetime import date
+
+import pytest
+
+import rules
+from calculator import calculate_batch
+from rules import load_rule_index, snapshot_path
+
+HEADER = "พ.ร.บ.,มาตรา,จำนวนเงินส่วนแบ่งสูงสุด,ความผิด\n"
+
+
+def write_rules(path, max_share):
+    path.write_text(HEADER + f"ยา พ.ศ. 2510,มาตรา 1,{max_share},\n", encoding="utf-8")
+
+
+def test_snapshot_is_written_and_reused(tmp_path, monkeypatch):
+    path = tmp_path / "rules.csv"
+    write_rules(path, 5000)
+    assert load_rule_index(str(path)).get("ยา พ.ศ. 2510", "มาตรา 1").max_share == 5000
+    assert os.path.exists(snapshot_path(str(path)))
+
+    monkeypatch.setattr(rules, "parse_rule_records", lambda raw: pytest.fail("parsed again"))
+    assert load_rule_index(str(path)).get("ยา พ.ศ. 2510", "มาตรา 1").max_share == 5000
+
+
+def test_snapshot_survives_mtime_change_with_same_content(tmp_path, monkeypatch):
+    path = tmp_path / "rules.csv"
+    write_rules(path, 5000)
+    load_rule_index(str(path))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    monkeypatch.setattr(rules, "parse_rule_records", lambda raw: pytest.fail("parsed again"))
+    assert load_rule_index(str(path)).get("ยา พ.ศ. 2510", "มาตรา 1").max_share == 5000
+    with open(snapshot_path(str(path)), "rb") as f:
+        assert pickle.load(f)["mtime_ns"] == os.stat(path).st_mtime_ns
+
+
+def test_snapshot_is_rebuilt_when_content_changes(tmp_path):
+    path = tmp_path / "rules.csv"
+    write_rules(path, 5000)
+    load_rule_index(str(path))
+    stat = os.stat(path)
+    # ขนาดไฟล์เท่าเดิม จึงต้องตัดสินจาก hash ของเนื้อหา
+    write_rules(path, 6000)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_rule_index(str(path)).get("ยา พ.ศ. 2510", "มาตรา 1").max_share == 6000
+
+
+def test_corrupt_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "rules.csv"
+    write_rules(path, 5000)
+    load_rule_index(str(path))
+    with open(snapshot_path(str(path)), "wb") as f:
+        f.write(b"not a pickle")
+    assert load_rule_index(str(path)).get("ยา พ.ศ. 2510", "มาตรา 1").max_share == 5000
+
+
+VERSIONED_HEADER = "พ.ร.บ.,มาตรา,จำนวนเงินส่วนแบ่งสูงสุด,ความผิด,มีผลตั้งแต่,มีผลถึง\n"
+
+
+def write_versions(path, *rows):
+    path.write_text(VERSIONED_HEADER + "".join(f"ยา พ.ศ. 2510,มาตรา 1,{row}\n" for row in rows), encoding="utf-8")
+    return load_rule_index(str(path), use_snapshot=False)
+
+
+def cap(index, on):
+    rule = index.get("ยา พ.ศ. 2510", "มาตรา 1", on=on)
+    return rule.max_share if rule is not None else None
+
+
+def test_version_end_date_is_inclusive(tmp_path):
+    index = write_versions(tmp_path / "rules.csv", "5000,,2020-01-01,2023-12-31", "8000,,2024-01-01,")
+    assert cap(index, "2019-12-31") is None
+    assert cap(index, "2020-01-01") == 5000
+    assert cap(index, "2023-12-31") == 5000
+    assert cap(index, "2024-01-01") == 8000
+    assert cap(index, "2099-01-01") == 8000
+
+
+def test_no_version_after_last_end_date(tmp_path):
+    index = write_versions(tmp_path / "rules.csv", "5000,,,2023-12-31")
+    assert cap(index, "1900-01-01") == 5000
+    assert cap(index, "2023-12-31") == 5000
+    assert cap(index, "2024-01-01") is None
+
+
+def test_buddhist_era_dates(tmp_path):
+    index = write_versions(tmp_path / "rules.csv", "5000,,2563-01-01,2566-12-31", "8000,,2024-01-01,")
+    assert cap(index, "2566-12-31") == 5000
+    assert cap(index, "2023-12-31") == 5000
+    assert cap(index, "2567-01-01") == 8000
+    assert cap(index, date(2024, 1, 1)) == 8000
+
+
+def test_overlapping_versions_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="ทับกัน"):
+        write_versions(tmp_path / "rules.csv", "5000,,2020-01-01,2024-01-01", "8000,,2024-01-01,")
+
+
+def test_batch_uses_version_in_effect_on_offense_date(tmp_path):
+    index = write_versions(tmp_path / "rules.csv", "5000,,2020-01-01,2023-12-31", "8000,,2024-01-01,")
+    dates = ["2023-12-31", "2567-01-01", "2019-12-31"]
+    result = calculate_batch({
+        "fine_amount": [100000] * 3, "law": ["ยา พ.ศ. 2510"] * 3, "section": ["มาตรา 1"] * 3,
+        "offense_date": dates,
+    }, index)
+    assert result["actual_share"].tolist() == [5000, 8000, 60000]
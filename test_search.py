@@ -0,0 +1,37 @@
+from search import SearchIndex, normalize
+
+
+def test_normalize_digits_spaces_and_vowel_order():
+    assert normalize("มาตรา ๑๒") == "มาตรา12"
+    assert normalize("ทํา") == normalize("ทำ")
+
+
+def test_exact_section_number_late_in_large_table():
+    entries = [(f"พระราชบัญญัติที่ {i}", f"มาตรา {section}", "ความผิด") for i in range(200) for section in range(50, 60)]
+    entries.append(("พระราชบัญญัติพิเศษ", "มาตรา 5", "ความผิด"))
+    hits = SearchIndex(entries).search("มาตรา 5")
+    assert hits[0].law == "พระราชบัญญัติพิเศษ"
+    assert hits[0].section == "มาตรา 5"
+
+
+def test_exact_number_must_match_whole_query():
+    index = SearchIndex([("ยา พ.ศ. 2510", "มาตรา 5", "ขายยา"), ("อาหาร พ.ศ. 2522", "ข้อ 5", "ฉลาก")])
+    assert [hit.law for hit in index.search("มาตรา 5")] == ["ยา พ.ศ. 2510"]
+
+
+def test_broad_query_ranks_matches_late_in_large_table():
+    # ทุกแถวมี "ยา" ในชื่อ พ.ร.บ. แต่มีเพียงแถวสุดท้ายที่มีในความผิด (คะแนนสูงกว่า)
+    entries = [("ยา พ.ศ. 2510", f"มาตรา {i}", "นำเข้าโดยไม่ได้รับอนุญาต") for i in range(5000)]
+    entries.append(("ยา พ.ศ. 2510", "มาตรา 9999", "ขายยาอันตราย"))
+    hits = SearchIndex(entries).search("ยา", limit=3)
+    assert hits[0].section == "มาตรา 9999"
+    assert [hit.score for hit in hits] == [2, 1, 1]
+
+
+def test_early_stop_matches_full_ranking():
+    entries = [(f"พ.ร.บ. {i % 7}", f"มาตรา {i % 13}", ["ขาย", "ขายยา", "นำเข้า ขาย", ""][i % 4]) for i in range(500)]
+    index = SearchIndex(entries)
+    for query in ("มาตรา", "มาตรา 1", "ขาย", "ขายยา", "พ.ร.บ. 3", "3"):
+        full = index.search(query, limit=len(entries))
+        for limit in (1, 5, 20):
+            assert index.search(query, limit=limit) == full[:limit]
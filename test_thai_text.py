@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from thai_text import CORRECTNESS_TABLE, convert_to_thai_text, convert_to_thai_text_batch
+
+
+@pytest.mark.parametrize("number, expected", CORRECTNESS_TABLE)
+def test_correctness_table(number, expected):
+    assert convert_to_thai_text(number) == expected
+
+
+def test_batch_matches_scalar():
+    numbers = [number for number, _ in CORRECTNESS_TABLE]
+    expected = [convert_to_thai_text(number) for number in numbers]
+    assert list(convert_to_thai_text_batch(numbers)) == expected
+
+
+def test_batch_keeps_series_index():
+    values = pd.Series([1021.5, 0, 1021.5], index=[10, 20, 30], name="fine_amount")
+    result = convert_to_thai_text_batch(values)
+    assert list(result.index) == [10, 20, 30]
+    assert result.name == "fine_amount"
+    assert result[10] == result[30] == "หนึ่งพันยี่สิบเอ็ดบาทห้าสิบสตางค์"
+
+
+@pytest.mark.parametrize("values", [
+    np.array([2 ** 53 + 1, 2 ** 62 + 1], dtype=np.int64),
+    [2 ** 53 + 1, 2 ** 62 + 1, 10 ** 30 + 1],
+])
+def test_batch_integers_are_exact(values):
+    assert list(convert_to_thai_text_batch(values)) == [convert_to_thai_text(int(value)) for value in values]
+
+
+def test_batch_rejects_nan():
+    with pytest.raises(ValueError):
+        convert_to_thai_text_batch([1.0, float("nan")])
@@ -0,0 +1,190 @@
+"""
+แปลงจำนวนเงินเป็นข้อความภาษาไทย (เช่น 1,021.50 -> "หนึ่งพันยี่สิบเอ็ดบาทห้าสิบสตางค์")
+
+ใช้ตารางคำอ่านที่คำนวณไว้ล่วงหน้า แบ่งจำนวนเต็มเป็นกลุ่มละ 6 หลัก (ล้าน) และ cache คำอ่าน
+ของแต่ละกลุ่ม จึงรองรับจำนวนเงินที่ใหญ่เท่าใดก็ได้ และมี convert_to_thai_text_batch
+สำหรับแปลงทั้งคอลัมน์ของ NumPy/pandas ในครั้งเดียว
+
+สตางค์ปัดครึ่งขึ้นด้วยกฎเดียวกับ money.to_satang (1.005 -> หนึ่งบาทหนึ่งสตางค์)
+"""
+import sys
+from decimal import Decimal
+from functools import lru_cache
+from numbers import Integral
+
+from money import to_satang, to_satang_array
+
+DIGITS = ["", "หนึ่ง", "สอง", "สาม", "สี่", "ห้า", "หก", "เจ็ด", "แปด", "เก้า"]
+
+# หลักร้อยถึงหลักแสนของแต่ละกลุ่ม (หลักสิบและหน่วยใช้ตาราง _BELOW_100)
+_HIGH_UNITS = ["ร้อย", "พัน", "หมื่น", "แสน"]
+
+_GROUP = 1000000
+
+
+def _below_100(n, after_higher):
+    """คำอ่าน 0-99 โดย after_higher คือมีเลขในหลักที่สูงกว่าอยู่ก่อน (หน่วย 1 อ่านว่า "เอ็ด")"""
+    tens, ones = divmod(n, 10)
+    if tens == 0:
+        words = ""
+    elif tens == 1:
+        words = "สิบ"
+    elif tens == 2:
+        words = "ยี่สิบ"
+    else:
+        words = DIGITS[tens] + "สิบ"
+    if ones == 1 and (tens or after_higher):
+        return words + "เอ็ด"
+    return words + DIGITS[ones]
+
+
+# ตารางคำอ่าน 0-99: [0] เมื่อไม่มีเลขนำหน้า, [1] เมื่อมีเลขในหลักที่สูงกว่า
+_BELOW_100 = (
+    [_below_100(n, False) for n in range(100)],
+    [_below_100(n, True) for n in range(100)],
+)
+
+
+def _pair(n, high_unit, low_unit):
+    """คำอ่านเลขสองหลัก n ที่หลักสูงมีหน่วย high_unit และหลักต่ำมีหน่วย low_unit"""
+    high, low = divmod(n, 10)
+    return (DIGITS[high] + high_unit if high else "") + (DIGITS[low] + low_unit if low else "")
+
+
+# ตารางคำอ่าน 0-9999 ร้อยของแต่ละกลุ่ม (หลักแสน หมื่น พัน ร้อย)
+_TEN_THOUSANDS = [_pair(n, _HIGH_UNITS[3], _HIGH_UNITS[2]) for n in range(100)]
+_THOUSANDS = [_pair(n, _HIGH_UNITS[1], _HIGH_UNITS[0]) for n in range(100)]
+_HUNDREDS = [high + low for high in _TEN_THOUSANDS for low in _THOUSANDS]
+
+
+@lru_cache(maxsize=1 << 16)
+def group_words(group, after_higher=False):
+    """คำอ่านของกลุ่ม 0-999,999 (after_higher = มีกลุ่มล้านที่สูงกว่าอยู่ก่อน)"""
+    hundreds, below_100 = divmod(group, 100)
+    return _HUNDREDS[hundreds] + _BELOW_100[bool(hundreds or after_higher)][below_100]
+
+
+def integer_words(n):
+    """คำอ่านจำนวนเต็มบวก n ไม่จำกัดจำนวนหลัก (ไม่รวมคำว่า "บาท")"""
+    if n < _GROUP:
+        return group_words(n)
+
+    groups = []
+    while n:
+        n, group = divmod(n, _GROUP)
+        groups.append(group)
+
+    words = []
+    for position in range(len(groups) - 1, -1, -1):
+        group = groups[position]
+        # กลุ่มที่ position มี "ล้าน" ต่อท้าย position ครั้ง กลุ่มที่เป็นศูนย์ไม่ต้องอ่าน
+        if group:
+            words.append(group_words(group, position < len(groups) - 1))
+            words.append("ล้าน" * position)
+    return "".join(words)
+
+
+def satang_words(total_satang):
+    """คำอ่านจำนวนเงินจากจำนวนเต็มในหน่วยสตางค์"""
+    if total_satang < 0:
+        return "ลบ" + satang_words(-total_satang)
+    if total_satang == 0:
+        return "ศูนย์บาทถ้วน"
+
+    baht, satang = divmod(total_satang, 100)
+    result = integer_words(baht) + "บาท" if baht else ""
+    if satang:
+        return result + _BELOW_100[0][satang] + "สตางค์"
+    return result + "ถ้วน"
+
+
+# Function to convert number to Thai text
+def convert_to_thai_text(number):
+    # บาทเต็มจำนวนไม่ต้องผ่าน to_satang จึงรับ int ขนาดใดก็ได้เหมือนแบบ batch
+    if isinstance(number, Integral):
+        return satang_words(int(number) * 100)
+    return satang_words(to_satang(number))
+
+
+def convert_to_thai_text_batch(values):
+    """
+    แปลงจำนวนเงินทั้งคอลัมน์ (list, NumPy array หรือ pandas Series) เป็นข้อความภาษาไทย
+
+    แปลงเฉพาะค่าที่ไม่ซ้ำกันเพียงครั้งเดียว คืน pandas Series (index เดิม) ถ้าส่ง Series มา
+    ไม่เช่นนั้นคืน NumPy array ของ str จำนวนเต็ม (dtype จำนวนเต็มหรือ int ของ Python)
+    แปลงตรงทุกค่าเหมือน convert_to_thai_text ไม่ผ่าน float
+    """
+    import numpy as np
+
+    # ถ้ายังไม่ได้ import pandas ค่าที่ส่งมาย่อมไม่ใช่ Series
+    pd = sys.modules.get("pandas")
+    is_series = pd is not None and isinstance(values, pd.Series)
+    amounts = np.asarray(values)
+    integers = amounts.dtype.kind in "iub" or (
+        amounts.dtype == object and all(isinstance(value, Integral) for value in amounts.flat))
+
+    if integers:
+        # บาทเต็มจำนวน: คูณเป็นสตางค์ด้วย int ของ Python จึงไม่ล้นหรือสูญเสียความละเอียด
+        unique, inverse = np.unique(amounts, return_inverse=True)
+        words = np.array([satang_words(int(value) * 100) for value in unique], dtype=object)
+    else:
+        amounts = amounts.astype(float)
+        if not np.isfinite(amounts).all():
+            raise ValueError("ไม่สามารถแปลงจำนวนเงินที่เป็น NaN หรือ inf เป็นข้อความได้")
+        unique, inverse = np.unique(to_satang_array(amounts), return_inverse=True)
+        words = np.array([satang_words(int(value)) for value in unique], dtype=object)
+    result = words[inverse.reshape(amounts.shape)]
+
+    if is_series:
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+
+# ตารางตรวจความถูกต้อง: python thai_text.py (exit 1 ถ้ามีรายการที่ไม่ตรง) หรือ pytest test_thai_text.py
+CORRECTNESS_TABLE = [
+    (0, "ศูนย์บาทถ้วน"),
+    (1, "หนึ่งบาทถ้วน"),
+    (10, "สิบบาทถ้วน"),
+    (11, "สิบเอ็ดบาทถ้วน"),
+    (20, "ยี่สิบบาทถ้วน"),
+    (21, "ยี่สิบเอ็ดบาทถ้วน"),
+    (101, "หนึ่งร้อยเอ็ดบาทถ้วน"),
+    (111, "หนึ่งร้อยสิบเอ็ดบาทถ้วน"),
+    (1001, "หนึ่งพันเอ็ดบาทถ้วน"),
+    (120000, "หนึ่งแสนสองหมื่นบาทถ้วน"),
+    (999999, "เก้าแสนเก้าหมื่นเก้าพันเก้าร้อยเก้าสิบเก้าบาทถ้วน"),
+    (1000000, "หนึ่งล้านบาทถ้วน"),
+    (1000001, "หนึ่งล้านเอ็ดบาทถ้วน"),
+    (1000011, "หนึ่งล้านสิบเอ็ดบาทถ้วน"),
+    (1000021, "หนึ่งล้านยี่สิบเอ็ดบาทถ้วน"),
+    (2000000, "สองล้านบาทถ้วน"),
+    (10000000, "สิบล้านบาทถ้วน"),
+    (11000000, "สิบเอ็ดล้านบาทถ้วน"),
+    (21000000, "ยี่สิบเอ็ดล้านบาทถ้วน"),
+    (21000021, "ยี่สิบเอ็ดล้านยี่สิบเอ็ดบาทถ้วน"),
+    (101000000, "หนึ่งร้อยเอ็ดล้านบาทถ้วน"),
+    (121121121, "หนึ่งร้อยยี่สิบเอ็ดล้านหนึ่งแสนสองหมื่นหนึ่งพันหนึ่งร้อยยี่สิบเอ็ดบาทถ้วน"),
+    (10 ** 12, "หนึ่งล้านล้านบาทถ้วน"),
+    (10 ** 12 + 1, "หนึ่งล้านล้านเอ็ดบาทถ้วน"),
+    (21 * 10 ** 12 + 21 * 10 ** 6, "ยี่สิบเอ็ดล้านล้านยี่สิบเอ็ดล้านบาทถ้วน"),
+    (0.01, "หนึ่งสตางค์"),
+    (0.5, "ห้าสิบสตางค์"),
+    (0.21, "ยี่สิบเอ็ดสตางค์"),
+    (1.11, "หนึ่งบาทสิบเอ็ดสตางค์"),
+    (0.995, "หนึ่งบาทถ้วน"),
+    (1234.56, "หนึ่งพันสองร้อยสามสิบสี่บาทห้าสิบหกสตางค์"),
+    (-25, "ลบยี่สิบห้าบาทถ้วน"),
+    (Decimal("1.005"), "หนึ่งบาทหนึ่งสตางค์"),
+    (1.005, "หนึ่งบาทหนึ่งสตางค์"),
+    (0.125, "สิบสามสตางค์"),
+]
+
+
+if __name__ == "__main__":
+    failures = [(number, expected, convert_to_thai_text(number))
+                for number, expected in CORRECTNESS_TABLE
+                if convert_to_thai_text(number) != expected]
+    for number, expected, actual in failures:
+        print(f"{number!r}: ได้ {actual} ควรเป็น {expected}")
+    print(f"ผ่าน {len(CORRECTNESS_TABLE) - len(failures)}/{len(CORRECTNESS_TABLE)} รายการ")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,244 @@
+"""
+เขียนไฟล์ zip แบบต่อท้าย (append-only) จาก bytes ที่บีบอัดไว้แล้ว
+
+ใช้ทั้งในการเรนเดอร์ใบสั่งชำระค่าปรับจากเทมเพลต (slip_template.py) และการรวมใบสั่ง
+จำนวนมากลงไฟล์ zip บนดิสก์ (bulk_export.py) โดย ZipStreamWriter สามารถอ่าน local header
+ของไฟล์ที่เขียนค้างไว้ (เช่นโปรแกรมหยุดกลางคัน) แล้วเขียนต่อจากรายการสุดท้ายที่สมบูรณ์ได้
+"""
+import os
+import struct
+import zipfile
+import zlib
+
+# เวลาในไฟล์ zip คงที่ (1980-01-01 00:00) เพื่อให้ข้อมูลเดียวกันได้ไฟล์เดียวกันทุกครั้ง
+DOS_TIME = 0
+DOS_DATE = (1 << 5) | 1
+
+_UTF8_FLAG = 0x800
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_DATA_DESCRIPTOR_FLAG = 0x8
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+
+
+def deflate(data):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _local_header(entry, extra_flags=0):
+    return _LOCAL_HEADER.pack(
+        b"PK\x03\x04", 20, entry.flags | extra_flags, entry.method, DOS_TIME, DOS_DATE,
+        entry.crc, entry.compressed_size, entry.size, len(entry.name), 0,
+    )
+
+
+class ZipEntry:
+    """ไฟล์หนึ่งใน zip พร้อม local header (local) ที่เขียนต่อท้ายไฟล์ได้ทันที"""
+
+    def __init__(self, name, data=None, method=zipfile.ZIP_DEFLATED):
+        self.name = name.encode("utf-8")
+        self.flags = 0 if self.name.isascii() else _UTF8_FLAG
+        self.method = method
+        self.local = None
+        if data is not None:
+            self.crc = zlib.crc32(data)
+            self.size = len(data)
+            compressed = deflate(data) if method == zipfile.ZIP_DEFLATED else data
+            self.compressed_size = len(compressed)
+            self.local = _local_header(self) + self.name + compressed
+
+    def central(self, offset):
+        if offset >= _ZIP64_LIMIT:
+            extra = struct.pack("<2HQ", 1, 8, offset)
+            version, offset = 45, _ZIP64_LIMIT
+        else:
+            extra = b""
+            version = 20
+        return _CENTRAL_HEADER.pack(
+            b"PK\x01\x02", version, version, self.flags, self.method, DOS_TIME, DOS_DATE,
+            self.crc, self.compressed_size, self.size, len(self.name), len(extra), 0, 0, 0, 0, offset,
+        ) + self.name + extra
+
+
+def central_directory(entries, offsets, start):
+    """central directory และ end record ของ entries ที่เริ่มต้นที่ offsets (ใช้ ZIP64 เมื่อจำเป็น)"""
+    central_dir = b"".join(entry.central(offset) for entry, offset in zip(entries, offsets))
+    count = len(entries)
+    size = len(central_dir)
+    tail = b""
+    if count >= _ZIP64_COUNT_LIMIT or start + size >= _ZIP64_LIMIT:
+        zip64_end = start + size
+        tail = _ZIP64_END_RECORD.pack(b"PK\x06\x06", 44, 45, 45, 0, 0, count, count, size, start)
+        tail += _ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, zip64_end, 1)
+        end = _END_RECORD.pack(
+            b"PK\x05\x06", 0, 0, _ZIP64_COUNT_LIMIT, _ZIP64_COUNT_LIMIT,
+            min(size, _ZIP64_LIMIT), _ZIP64_LIMIT, 0,
+        )
+    else:
+        end = _END_RECORD.pack(b"PK\x05\x06", 0, 0, count, count, size, start, 0)
+    return central_dir + tail + end
+
+
+def build_zip(entries):
+    """รวม ZipEntry ทั้งหมดเป็นไฟล์ zip (bytes) ในหน่วยความจำ"""
+    body = []
+    offsets = []
+    offset = 0
+    for entry in entries:
+        offsets.append(offset)
+        body.append(entry.local)
+        offset += len(entry.local)
+    return b"".join(body) + central_directory(entries, offsets, offset)
+
+
+class ZipEntryStream:
+    """
+    รายการใน ZipStreamWriter ที่กำลังเขียน (ได้จาก ZipStreamWriter.open)
+
+    local header ถูกเขียนก่อนพร้อม flag data descriptor เพื่อให้ _recover ข้ามรายการที่เขียนไม่จบ
+    เมื่อ close() จะกลับไปเขียน header ใหม่ที่มี crc และขนาดจริง (ไม่มี ZIP64 ขนาดต้องไม่ถึง 4 GiB)
+    """
+
+    def __init__(self, writer, entry, offset):
+        self._writer = writer
+        self._entry = entry
+        self._offset = offset
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+
+    def write(self, data):
+        entry = self._entry
+        entry.crc = zlib.crc32(data, entry.crc)
+        entry.size += len(data)
+        self._write_compressed(self._compressor.compress(data))
+
+    def _write_compressed(self, compressed):
+        self._writer._file.write(compressed)
+        self._entry.compressed_size += len(compressed)
+
+    def close(self):
+        if self._compressor is None:
+            return
+        self._write_compressed(self._compressor.flush())
+        self._compressor = None
+
+        entry = self._entry
+        if max(entry.size, entry.compressed_size) >= _ZIP64_LIMIT:
+            raise ValueError(f"{entry.name.decode('utf-8')} มีขนาดเกิน 4 GiB")
+        f = self._writer._file
+        end = f.tell()
+        f.seek(self._offset)
+        f.write(_local_header(entry))
+        f.seek(end)
+        self._writer.offsets.append(self._offset)
+        self._writer.entries.append(entry)
+        self._writer.names.add(entry.name.decode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # รายการที่เขียนไม่จบเพราะเกิดข้อผิดพลาดจะไม่อยู่ใน central directory
+        if exc_type is None:
+            self.close()
+
+
+class ZipStreamWriter:
+    """
+    เขียนไฟล์ zip ลงดิสก์ทีละรายการโดยไม่เก็บเนื้อหาไว้ในหน่วยความจำ
+
+    ถ้า resume=True และมีไฟล์เดิมอยู่ จะอ่านรายการที่เขียนสมบูรณ์แล้ว (names) และตัดส่วนที่
+    เขียนค้างไว้ทิ้งก่อนเขียนต่อ central directory จะถูกเขียนเมื่อ close()
+    ชื่อรายการต้องไม่ซ้ำกัน (โปรแกรม unzip ส่วนใหญ่เก็บไว้เพียงไฟล์เดียว) ชื่อที่ซ้ำจะเกิด ValueError
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.entries = []
+        self.offsets = []
+        if resume and os.path.exists(path):
+            self._file = open(path, "r+b")
+            self._recover()
+        else:
+            self._file = open(path, "wb")
+        self.names = {entry.name.decode("utf-8") for entry in self.entries}
+
+    def _recover(self):
+        f = self._file
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        offset = 0
+        while offset + _LOCAL_HEADER.size <= file_size:
+            f.seek(offset)
+            header = f.read(_LOCAL_HEADER.size)
+            (signature, _, flags, method, _, _, crc, compressed_size, size,
+             name_length, extra_length) = _LOCAL_HEADER.unpack(header)
+            if signature != b"PK\x03\x04" or flags & _DATA_DESCRIPTOR_FLAG:
+                break
+            end = offset + _LOCAL_HEADER.size + name_length + extra_length + compressed_size
+            if end > file_size:
+                break
+            entry = ZipEntry(f.read(name_length).decode("utf-8"), method=method)
+            entry.crc = crc
+            entry.size = size
+            entry.compressed_size = compressed_size
+            self.entries.append(entry)
+            self.offsets.append(offset)
+            offset = end
+
+        # ตัดรายการที่เขียนไม่สมบูรณ์และ central directory เดิมทิ้ง
+        f.truncate(offset)
+        f.seek(offset)
+
+    def _check_name(self, name):
+        if name in self.names:
+            raise ValueError(f"มีรายการชื่อ {name} ในไฟล์ zip แล้ว")
+
+    def write(self, name, data, method=zipfile.ZIP_STORED):
+        self._check_name(name)
+        entry = ZipEntry(name, data, method=method)
+        self.append(entry)
+        entry.local = None
+
+    def append(self, entry):
+        """เขียน ZipEntry ที่สร้างไว้แล้ว (เช่นส่วนของเทมเพลตที่ใช้ซ้ำ) โดยไม่แก้ไข entry"""
+        self._check_name(entry.name.decode("utf-8"))
+        self.offsets.append(self._file.tell())
+        self._file.write(entry.local)
+        self.entries.append(entry)
+        self.names.add(entry.name.decode("utf-8"))
+
+    def open(self, name):
+        """
+        เริ่มรายการใหม่ที่เขียนเนื้อหาได้ทีละส่วน (บีบอัดแบบ deflate ระหว่างเขียน) คืน ZipEntryStream
+
+        ต้อง close() รายการก่อนเขียนรายการถัดไป
+        """
+        self._check_name(name)
+        entry = ZipEntry(name)
+        entry.crc = entry.size = entry.compressed_size = 0
+        offset = self._file.tell()
+        self._file.write(_local_header(entry, _DATA_DESCRIPTOR_FLAG) + entry.name)
+        return ZipEntryStream(self, entry, offset)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        start = self._file.tell()
+        self._file.write(central_directory(self.entries, self.offsets, start))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # เขียน central directory เสมอ ไฟล์จึงเปิดได้แม้งานจะหยุดกลางคัน และยัง resume ต่อได้
+        self.close()